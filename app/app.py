@@ -7,7 +7,8 @@ from full_pages import polarization_cohesion_metrics
 from full_pages import user_analysis
 from styling import apply_global_styles
 from full_pages import home
-from components.ui_elements import app_footer
+from components.ui_elements import app_footer, sidebar_cache_stats
+from utils.artifacts import artifact_cache_stats
 
 # Aplicar estilos globales y configuración de página una vez
 apply_global_styles()
@@ -38,6 +39,9 @@ def main():
     elif page == "👨🏻‍💻 Análisis Individual de Usuarios":
         user_analysis.show_page()
 
+    # Estadísticas de la caché compartida de visualizaciones
+    sidebar_cache_stats(artifact_cache_stats())
+
     # Footer común a todas las páginas
     app_footer()
 
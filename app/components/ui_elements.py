@@ -1,6 +1,14 @@
 # components/ui_elements.py
+from functools import lru_cache
+
 import streamlit as st
 
+from utils.artifacts import load_text_artifact, prefetch_artifacts
+from utils.manifest import artifact_path, artifact_url
+from utils.settings import (
+    VIEW_MODE, PREFETCH_NEXT_VIEW, PLOT_RENDER_MODE, STATIC_URL_PREFIX, USER_SEARCH_PAGE_SIZE
+)
+
 def display_platform_overview(selected_platform, metrics):
     """Mostrar resumen de la plataforma seleccionada"""
 
@@ -46,6 +54,125 @@ def display_platform_overview(selected_platform, metrics):
 
     st.markdown('</div>', unsafe_allow_html=True)
 
+@lru_cache(maxsize=1)
+def _streamlit_serves_static_html():
+    """Versiones antiguas de Streamlit sirven los .html estáticos como text/plain"""
+    try:
+        from streamlit.web.server import app_static_file_handler
+    except ImportError:
+        return True
+    return ".html" in getattr(app_static_file_handler, "SAFE_APP_STATIC_FILE_EXTENSIONS", ())
+
+def plot_render_mode():
+    """Modo efectivo de envío de los HTML: 'static' o 'inline'"""
+    if PLOT_RENDER_MODE != "auto":
+        return PLOT_RENDER_MODE
+    if not st.get_option("server.enableStaticServing"):
+        return "inline"
+    return "static" if _streamlit_serves_static_html() else "inline"
+
+def render_html_artifact(record, height=650):
+    """
+    Mostrar un HTML del manifiesto. En modo "static" el iframe apunta a la URL
+    del archivo (el navegador lo descarga y cachea, sin pasar por el
+    websocket); en modo "inline" el contenido se envía desde la caché en memoria.
+    """
+    if plot_render_mode() == "static":
+        st.components.v1.iframe(artifact_url(record, STATIC_URL_PREFIX), height=height, scrolling=True)
+    else:
+        html_content = load_text_artifact(artifact_path(record))
+        st.components.v1.html(html_content, height=height, scrolling=True)
+
+def render_views(views, key):
+    """
+    Renderizar las vistas de análisis de una página.
+
+    `views` es una lista de tuplas (etiqueta, función_de_render, rutas_de_artefactos).
+    En modo "eager" se usan pestañas y se ejecutan todas las vistas; en modo
+    "lazy" sólo se ejecuta la vista seleccionada y, opcionalmente, se precargan
+    en segundo plano los artefactos de la siguiente.
+    """
+    labels = [label for label, _, _ in views]
+
+    if VIEW_MODE == "eager":
+        for tab, (_, render, _) in zip(st.tabs(labels), views):
+            with tab:
+                render()
+        return
+
+    selected = st.radio(
+        "Vista",
+        labels,
+        horizontal=True,
+        key=key,
+        label_visibility="collapsed"
+    )
+    index = labels.index(selected)
+    views[index][1]()
+
+    # La precarga sólo tiene sentido si el servidor lee el HTML (modo "inline")
+    if PREFETCH_NEXT_VIEW and len(views) > 1 and plot_render_mode() == "inline":
+        prefetch_artifacts(views[(index + 1) % len(views)][2])
+
+def _user_label(row):
+    """Texto de un resultado del buscador: usuario · candidato · comunidad · interacciones"""
+    parts = [row['username']]
+    if row['candidate']:
+        parts.append(row['candidate'])
+    if row['cluster_name']:
+        parts.append(row['cluster_name'])
+    if row['num_interaction']:
+        parts.append(f"{row['num_interaction']:,.0f} interacciones")
+    return " · ".join(parts)
+
+def user_search_selector(index, key, page_size=USER_SEARCH_PAGE_SIZE):
+    """
+    Buscador de usuarios sobre un `UserIndex`: caja de búsqueda, paginación
+    y selector con la página actual. Devuelve el usuario elegido (o None).
+    """
+    query = st.text_input(
+        "Buscar usuario",
+        key=f"{key}_query",
+        placeholder="Usuario, candidato o comunidad",
+        help="No distingue mayúsculas ni acentos; los resultados se ordenan por interacciones"
+    )
+
+    # La página se lee antes de crear su widget: si la búsqueda cambió y ya no
+    # existe, `search` la acota y se corrige el valor guardado
+    page_key = f"{key}_page"
+    result = index.search(query, page=st.session_state.get(page_key, 1) - 1, page_size=page_size)
+    if result['total'] == 0:
+        st.warning("⚠️ Ningún usuario coincide con la búsqueda.")
+        return None
+    st.session_state[page_key] = result['page'] + 1
+    if result['pages'] > 1:
+        st.number_input(
+            f"Página (de {result['pages']})", min_value=1, max_value=result['pages'], step=1, key=page_key
+        )
+    st.caption(f"{result['total']:,} usuarios encontrados")
+
+    rows = {row['username']: row for row in result['results']}
+    return st.selectbox(
+        "Usuarios disponibles",
+        list(rows),
+        format_func=lambda name: _user_label(rows[name]),
+        key=f"{key}_choice"
+    )
+
+def sidebar_cache_stats(stats):
+    """Mostrar en la barra lateral el uso de la caché de visualizaciones"""
+    total = stats['hits'] + stats['misses']
+    hit_rate = (stats['hits'] / total * 100) if total else 0.0
+    with st.sidebar.expander("⚙️ Caché de visualizaciones"):
+        st.caption(
+            f"Aciertos: **{stats['hits']}** · Fallos: **{stats['misses']}** "
+            f"({hit_rate:.0f}% de aciertos)"
+        )
+        st.caption(
+            f"{stats['entries']} archivos en memoria · "
+            f"{stats['bytes'] / 1024 / 1024:.1f} / {stats['max_bytes'] / 1024 / 1024:.0f} MB"
+        )
+
 def app_footer():
     st.markdown("---")
     st.markdown("""
@@ -1,11 +1,15 @@
 # Importamos las librerías necesarias
+import numpy as np
 import streamlit as st
 from pathlib import Path
 import os
 
 # Importamos funciones auxiliares desde módulos propios
 from utils.helpers import create_platform_metrics 
-from components.ui_elements import display_platform_overview
+from utils.manifest import get_manifest, list_platforms, artifact_path
+from utils.graphs import load_platform_graph, weight_threshold_mask
+from components.ui_elements import display_platform_overview, render_views, render_html_artifact
+from pipeline.plots import cluster_colors, network_figure
 
 
 current_script_dir = os.path.dirname(__file__)
@@ -47,6 +51,167 @@ def render_sidebar(platforms):
     return selected_platform
 
 
+def _artifact_files(platform_entry, name):
+    """Rutas de un artefacto de la plataforma (lista vacía si no existe)"""
+    record = platform_entry['artifacts'].get(name)
+    return [artifact_path(record)] if record else []
+
+
+def _cluster_files(platform_entry):
+    """Ruta del HTML de la comunidad seleccionada (o la primera) para precarga"""
+    names = sorted(n for n, files in platform_entry['clusters'].items() if files['html'])
+    if not names:
+        return []
+    selected = st.session_state.get("platform_cluster_selector")
+    name = selected if selected in names else names[0]
+    return [artifact_path(platform_entry['clusters'][name]['html'])]
+
+
+def render_interactive_network(graph_record, platform_name):
+    """Red construida en el proceso a partir de `graph.npz`, con filtros por comunidad y peso"""
+    graph = load_platform_graph(graph_record)
+    cluster_names = graph.node_attrs.get('cluster_name')
+    clusters = sorted(set(cluster_names.tolist())) if cluster_names is not None else []
+
+    col1, col2 = st.columns([2, 1])
+    with col1:
+        selected_clusters = st.multiselect(
+            "Comunidades visibles",
+            clusters,
+            default=clusters,
+            help="Oculta o muestra comunidades completas de la red",
+            key=f"network_cluster_filter_{platform_name}"
+        )
+    with col2:
+        weight_percentile = st.slider(
+            "Umbral de similitud (percentil)",
+            min_value=0, max_value=95, value=0, step=5,
+            help="Muestra sólo las conexiones con mayor similitud discursiva",
+            key=f"network_weight_percentile_{platform_name}"
+        )
+
+    # Colores de la red completa: ocultar una comunidad no cambia los de las demás
+    colors = cluster_colors(graph)
+    if clusters and len(selected_clusters) < len(clusters):
+        graph = graph.subgraph(np.flatnonzero(np.isin(cluster_names, selected_clusters)))
+
+    fig = network_figure(
+        graph,
+        title=f"Red de Usuarios de {platform_name} por similtud discursiva",
+        edge_mask=weight_threshold_mask(graph, weight_percentile / 100),
+        colors=colors
+    )
+    fig.update_layout(height=650)
+    st.plotly_chart(fig, use_container_width=True, theme=None)
+
+
+def render_network_view(platform_entry, platform_name):
+    """Pestaña: visualización de la red de usuarios"""
+    st.markdown('<p class="section-header">Red de Conexiones de Usuarios</p>', unsafe_allow_html=True)
+    graph_record = platform_entry['artifacts'].get("graph.npz")
+    network_record = platform_entry['artifacts'].get("network_plot.html")
+    if graph_record or network_record:
+        try:
+            st.markdown("""
+                <div class="info-card">
+                    <p style="color: var(--text-secondary); margin-bottom: 1rem;">
+                        Esta visualización muestra las conexiones entre usuarios basadas en similitud discursiva.
+                        Los nodos representan usuarios y las conexiones indican similitudes en el contenido.
+                    </p>
+                </div>
+            """, unsafe_allow_html=True)
+            # Preferimos los datos compactos de la red; el HTML queda como respaldo
+            if graph_record:
+                render_interactive_network(graph_record, platform_name)
+            else:
+                render_html_artifact(network_record, height=650)
+        except Exception as e:
+            st.error(f"Error al cargar la visualización de red: {e}")
+    else:
+        st.warning("⚠️ Visualización de red no disponible para esta plataforma.")
+        st.info("💡 Genera el archivo `network_plot.html` para ver esta visualización.")
+
+
+def render_density_view(platform_entry):
+    """Pestaña: visualización del análisis de densidad"""
+    st.markdown('<p class="section-header">Análisis de Densidad de Usuarios</p>', unsafe_allow_html=True)
+    density_record = platform_entry['artifacts'].get("density_plot.html")
+    if density_record:
+        try:
+            st.markdown("""
+                <div class="info-card">
+                    <p style="color: var(--text-secondary); margin-bottom: 1rem;">
+                        El análisis de densidad muestra la distribución espacial de usuarios y 
+                        la concentración de actividad en diferentes regiones de la red.
+                    </p>
+                </div>
+            """, unsafe_allow_html=True)
+            render_html_artifact(density_record, height=650)
+        except Exception as e:
+            st.error(f"Error al cargar la visualización de densidad: {e}")
+    else:
+        st.info("📊 Análisis de densidad no disponible para esta plataforma.")
+        st.info("💡 Genera el archivo `density_plot.html` para ver esta visualización.")
+
+
+def render_clusters_view(platform_entry):
+    """Pestaña: exploración detallada de comunidades (clusters)"""
+    st.markdown('<p class="section-header">Exploración Detallada de Comunidades</p>', unsafe_allow_html=True)
+    if platform_entry['clusters_folder']:
+        # Nombres de las comunidades con visualización HTML disponible
+        clusters = platform_entry['clusters']
+        cluster_names = sorted(name for name, files in clusters.items() if files['html'])
+
+        if cluster_names:
+            st.markdown("""
+                <div class="info-card">
+                    <p style="color: var(--text-secondary); margin-bottom: 1rem;">
+                        Los clusters agrupan usuarios con patrones discursivos similares. 
+                        Cada cluster incluye una nube de palabras y visualización interactiva.
+                    </p>
+                </div>
+            """, unsafe_allow_html=True)
+
+            # Selección del cluster por nombre limpio
+            col1, col2 = st.columns([2, 1])
+            with col1:
+                selected_cluster_name = st.selectbox(
+                    "Selecciona un cluster para explorar:",
+                    cluster_names,
+                    help="Cada cluster representa un grupo de usuarios con patrones similares",
+                    key="platform_cluster_selector"
+                )
+            with col2:
+                st.metric("Número de Comunidades encontradas", len(cluster_names))
+
+            if selected_cluster_name:
+                # Archivos de la comunidad seleccionada según el manifiesto
+                cluster_files = clusters[selected_cluster_name]
+
+                # Mostramos la visualización interactiva del cluster
+                st.markdown("#### 📊 Visualización Interactiva de la Comunidad")
+                try:
+                    render_html_artifact(cluster_files['html'], height=650)
+                except Exception as e:
+                    st.error(f"Error al cargar la visualización de la Comunidad: {e}")
+
+                if cluster_files['wordcloud']:
+                    wordcloud_file = artifact_path(cluster_files['wordcloud'])
+                    st.markdown("#### 🏷️ Nube de Palabras de la Comunidad")
+                    img_col1, img_col2, img_col3 = st.columns([1, 3, 1])
+                    with img_col2:
+                        st.image(
+                            str(wordcloud_file), 
+                            caption=f"Términos más relevantes - Comunidad {selected_cluster_name}",
+                        )
+        else:
+            st.warning("⚠️ No se encontraron archivos de clusters para esta plataforma.")
+            st.info("💡 Genera los archivos de clusters para explorar esta funcionalidad.")
+    else:
+        st.warning("📁 No existe la carpeta de clusters para esta plataforma.")
+        st.info(f"💡 Crea la estructura: `{BASE_PLOT_PATH}/[plataforma]/clusters/`")
+
+
 # Función principal que muestra la página
 def show_page():
     """Dashboard principal de análisis de plataformas"""
@@ -69,10 +234,10 @@ def show_page():
         st.info(f"📁 Estructura esperada: `{BASE_PLOT_PATH}/[nombre_plataforma]/`")
         return
 
-    # Cargamos los nombres de las plataformas desde las carpetas
+    # Cargamos los nombres de las plataformas desde el manifiesto de artefactos
     try:
-        platforms = [d.name for d in BASE_PLOT_PATH.iterdir() 
-                    if d.is_dir() and not d.name.startswith('.')]
+        manifest = get_manifest()
+        platforms = list_platforms(manifest)
 
         if not platforms:
             st.warning("⚠️ No se encontraron plataformas en la carpeta de datos.")
@@ -86,127 +251,22 @@ def show_page():
     selected_platform = render_sidebar(platforms)
 
     if selected_platform:
-        # Ruta a la carpeta específica de la plataforma
-        platform_folder = BASE_PLOT_PATH / selected_platform
-        metrics = create_platform_metrics(platform_folder)  # Cálculo de métricas
+        # Entrada de la plataforma en el manifiesto (archivos, tamaños y hashes)
+        platform_entry = manifest['platforms'][selected_platform]
+        metrics = create_platform_metrics(platform_entry)  # Cálculo de métricas
 
         # Mostramos la información general de la plataforma
         display_platform_overview(selected_platform, metrics)
 
-        # Pestañas para diferentes análisis
-        tab1, tab2, tab3 = st.tabs([
-            "🌐 Red de Usuarios", 
-            "📈 Análisis de Densidad", 
-            "🧠 Exploración de Comunidades"
-        ])
-
-        # TAB 1: Visualización de la red de usuarios
-        with tab1:
-            st.markdown('<p class="section-header">Red de Conexiones de Usuarios</p>', unsafe_allow_html=True)
-            network_file = platform_folder / "network_plot.html"
-            if network_file.exists():
-                try:
-                    with open(network_file, 'r', encoding='utf-8') as f:
-                        html_network = f.read()
-                    st.markdown("""
-                        <div class="info-card">
-                            <p style="color: var(--text-secondary); margin-bottom: 1rem;">
-                                Esta visualización muestra las conexiones entre usuarios basadas en similitud discursiva.
-                                Los nodos representan usuarios y las conexiones indican similitudes en el contenido.
-                            </p>
-                        </div>
-                    """, unsafe_allow_html=True)
-                    st.components.v1.html(html_network, height=650, scrolling=True)
-                except Exception as e:
-                    st.error(f"Error al cargar la visualización de red: {e}")
-            else:
-                st.warning("⚠️ Visualización de red no disponible para esta plataforma.")
-                st.info("💡 Genera el archivo `network_plot.html` para ver esta visualización.")
-
-        # TAB 2: Visualización del análisis de densidad
-        with tab2:
-            st.markdown('<p class="section-header">Análisis de Densidad de Usuarios</p>', unsafe_allow_html=True)
-            density_file = platform_folder / "density_plot.html"
-            if density_file.exists():
-                try:
-                    with open(density_file, 'r', encoding='utf-8') as f:
-                        html_density = f.read()
-                    st.markdown("""
-                        <div class="info-card">
-                            <p style="color: var(--text-secondary); margin-bottom: 1rem;">
-                                El análisis de densidad muestra la distribución espacial de usuarios y 
-                                la concentración de actividad en diferentes regiones de la red.
-                            </p>
-                        </div>
-                    """, unsafe_allow_html=True)
-                    st.components.v1.html(html_density, height=650, scrolling=True)
-                except Exception as e:
-                    st.error(f"Error al cargar la visualización de densidad: {e}")
-            else:
-                st.info("📊 Análisis de densidad no disponible para esta plataforma.")
-                st.info("💡 Genera el archivo `density_plot.html` para ver esta visualización.")
-
-        # TAB 3: Exploración detallada de comunidades (clusters)
-        with tab3:
-            st.markdown('<p class="section-header">Exploración Detallada de Comunidades</p>', unsafe_allow_html=True)
-            clusters_folder = platform_folder / "clusters"
-            if clusters_folder.exists():
-                # Obtenemos archivos de clusters disponibles y limpiamos nombres
-                cluster_files = sorted([
-                    f.name for f in clusters_folder.iterdir()
-                    if f.name.startswith("cluster_") and f.name.endswith(".html")
-                ])
-
-                # Creamos lista con nombres limpios para mostrar sin prefijo ni extensión
-                cluster_names = [f.replace("cluster_", "").replace(".html", "") for f in cluster_files]
-
-                if cluster_files:
-                    st.markdown("""
-                        <div class="info-card">
-                            <p style="color: var(--text-secondary); margin-bottom: 1rem;">
-                                Los clusters agrupan usuarios con patrones discursivos similares. 
-                                Cada cluster incluye una nube de palabras y visualización interactiva.
-                            </p>
-                        </div>
-                    """, unsafe_allow_html=True)
-
-                    # Selección del cluster por nombre limpio
-                    col1, col2 = st.columns([2, 1])
-                    with col1:
-                        selected_cluster_name = st.selectbox(
-                            "Selecciona un cluster para explorar:",
-                            cluster_names,
-                            help="Cada cluster representa un grupo de usuarios con patrones similares"
-                        )
-                    with col2:
-                        st.metric("Número de Comunidades encontradas", len(cluster_files))
-
-                    if selected_cluster_name:
-                        # Construimos el nombre del archivo a partir del nombre limpio seleccionado
-                        selected_cluster_file = f"cluster_{selected_cluster_name}.html"
-                        cluster_path = clusters_folder / selected_cluster_file
-                        wordcloud_file = clusters_folder / f"wordcloud_{selected_cluster_name}.png"
-
-                        # Mostramos la visualización interactiva del cluster
-                        st.markdown("#### 📊 Visualización Interactiva de la Comunidad")
-                        try:
-                            with open(cluster_path, 'r', encoding='utf-8') as f:
-                                html_cluster = f.read()
-                            st.components.v1.html(html_cluster, height=650, scrolling=True)
-                        except Exception as e:
-                            st.error(f"Error al cargar la visualización de la Comunidad: {e}")
-
-                        if wordcloud_file.exists():
-                            st.markdown("#### 🏷️ Nube de Palabras de la Comunidad")
-                            img_col1, img_col2, img_col3 = st.columns([1, 3, 1])
-                            with img_col2:
-                                st.image(
-                                    str(wordcloud_file), 
-                                    caption=f"Términos más relevantes - Comunidad {selected_cluster_name}",
-                                )
-                else:
-                    st.warning("⚠️ No se encontraron archivos de clusters para esta plataforma.")
-                    st.info("💡 Genera los archivos de clusters para explorar esta funcionalidad.")
-            else:
-                st.warning("📁 No existe la carpeta de clusters para esta plataforma.")
-                st.info(f"💡 Crea la estructura: `{BASE_PLOT_PATH}/[plataforma]/clusters/`")
\ No newline at end of file
+        # Vistas de análisis: en modo diferido sólo se carga la vista activa
+        render_views([
+            ("🌐 Red de Usuarios",
+             lambda: render_network_view(platform_entry, selected_platform),
+             _artifact_files(platform_entry, "network_plot.html")),
+            ("📈 Análisis de Densidad",
+             lambda: render_density_view(platform_entry),
+             _artifact_files(platform_entry, "density_plot.html")),
+            ("🧠 Exploración de Comunidades",
+             lambda: render_clusters_view(platform_entry),
+             _cluster_files(platform_entry)),
+        ], key="platform_view")
@@ -2,6 +2,9 @@ import streamlit as st
 import os
 from pathlib import Path
 
+from components.ui_elements import render_html_artifact
+from utils.manifest import get_manifest
+
 # Obtenemos la ruta del directorio donde se encuentra el script actual.
 current_script_dir = os.path.dirname(__file__)
 parent_dir = os.path.join(current_script_dir, os.pardir)
@@ -12,31 +15,30 @@ BASE_POLARIZATION_PATH = Path(os.path.join(BASE_PLOT_PATH, "polarization"))
 BASE_COHESION_PATH = Path(os.path.join(BASE_PLOT_PATH, "cohesion"))
 
 
-def get_available_categories(polarization_path: Path, cohesion_path: Path) -> list[str]:
+def get_available_categories(polarization_path: Path, cohesion_path: Path, manifest: dict) -> list[str]:
     """
     Obtiene una lista de categorías (nombres de archivo sin extensión)
-    que existen tanto en la carpeta de polarización como en la de cohesión.
+    que existen tanto en la carpeta de polarización como en la de cohesión,
+    según el manifiesto de artefactos.
     """
-    if not polarization_path.exists() or not polarization_path.is_dir():
+    if manifest.get('polarization') is None:
         st.warning(f"⚠️ La carpeta de gráficos de polarización no existe: {polarization_path}")
         return []
-    if not cohesion_path.exists() or not cohesion_path.is_dir():
+    if manifest.get('cohesion') is None:
         st.warning(f"⚠️ La carpeta de gráficos de cohesión no existe: {cohesion_path}")
         return []
 
-    polarization_files = {p.stem for p in polarization_path.glob("*.html") if p.is_file()}
-    cohesion_files = {c.stem for c in cohesion_path.glob("*.html") if c.is_file()}
+    polarization_files = set(manifest['polarization'])
+    cohesion_files = set(manifest['cohesion'])
 
     common_categories = sorted(list(polarization_files.intersection(cohesion_files)))
     return common_categories
 
-def display_html_file(file_path: Path, height: int = 650):
-    """Lee y muestra un archivo HTML en Streamlit."""
-    if file_path.exists():
+def display_html_file(file_path: Path, record: dict | None, height: int = 650):
+    """Muestra un archivo HTML del manifiesto en Streamlit."""
+    if record is not None:
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                html_content = f.read()
-            st.components.v1.html(html_content, height=height, scrolling=True)
+            render_html_artifact(record, height=height)
         except Exception as e:
             st.error(f"❌ Error al cargar el archivo HTML '{file_path.name}': {e}")
     else:
@@ -106,7 +108,8 @@ def show_page():
         st.info("Crea esta carpeta y añade los archivos HTML de cohesión (ej: medios.html, partidos.html).")
         return
 
-    available_categories = get_available_categories(BASE_POLARIZATION_PATH, BASE_COHESION_PATH)
+    manifest = get_manifest()
+    available_categories = get_available_categories(BASE_POLARIZATION_PATH, BASE_COHESION_PATH, manifest)
 
     if not available_categories:
         st.warning("⚠️ No se encontraron categorías comunes con métricas de polarización y cohesión.")
@@ -139,7 +142,7 @@ def show_page():
                 Visualización de las métricas de polarización para la categoría seleccionada.
             </p>
         """, unsafe_allow_html=True)
-        display_html_file(polarization_plot_file)
+        display_html_file(polarization_plot_file, manifest['polarization'].get(selected_category))
 
         st.markdown("---")
 
@@ -155,7 +158,7 @@ def show_page():
                 Visualización de las métricas de cohesión para la categoría seleccionada.
             </p>
         """, unsafe_allow_html=True)
-        display_html_file(cohesion_plot_file)
+        display_html_file(cohesion_plot_file, manifest['cohesion'].get(selected_category))
 
     else:
         st.info("ℹ️ Selecciona una categoría de la barra lateral para ver las métricas.")
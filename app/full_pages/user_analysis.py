@@ -3,6 +3,13 @@ import streamlit as st
 from pathlib import Path
 import os
 
+from utils.manifest import get_manifest, list_categories, artifact_path
+from utils.graphs import load_platform_graph, load_user_index
+from utils.helpers import category_user_index
+from components.ui_elements import render_views, render_html_artifact, user_search_selector
+from pipeline.ego import ego_network, neighbor_weights
+from pipeline.plots import network_figure, density_figure
+
 # Determinar la ruta base para los plots individuales
 current_script_dir = os.path.dirname(__file__)
 parent_dir = os.path.join(current_script_dir, os.pardir) # Esto debería ser 'app/'
@@ -11,11 +18,69 @@ BASE_PLOT_PATH = Path(os.path.join(parent_dir, "static", "plots", "individual"))
 # Constantes para los nombres de archivo de los plots
 NETWORK_PLOT_FILENAME = "network.html" # Asumiendo este nombre para la red
 DENSITY_PLOT_FILENAME = "density.html"      # Basado en tu ejemplo de ruta
+GRAPH_FILENAME = "graph.npz"                # Red compacta de cada plataforma
+
+# Origen de los análisis individuales
+SOURCE_PRECOMPUTED = "📁 Categorías precalculadas"
+SOURCE_PLATFORM = "⚡ Cualquier usuario de una plataforma"
+
+
+def platforms_with_graph(manifest):
+    """Plataformas con `graph.npz`, de las que se puede extraer cualquier ego-red"""
+    return [name for name, entry in manifest['platforms'].items() if GRAPH_FILENAME in entry['artifacts']]
+
+
+def render_source_selector(graph_platforms):
+    """Selector del origen de datos (sólo si hay redes de plataforma disponibles)"""
+    if not graph_platforms:
+        return SOURCE_PRECOMPUTED
+    with st.sidebar:
+        st.markdown("### 🔀 Origen de datos")
+        return st.radio(
+            "Origen de datos",
+            [SOURCE_PRECOMPUTED, SOURCE_PLATFORM],
+            help="Las ego-redes de plataforma se calculan al momento para cualquier usuario",
+            key="individual_source_selector",
+            label_visibility="collapsed"
+        )
+
+
+def render_platform_sidebar(manifest, graph_platforms):
+    """Barra lateral del modo en vivo: plataforma y usuario de su red"""
+    with st.sidebar:
+        st.markdown("### 🗂️ Panel de Control Individual")
+        st.markdown("---")
+
+        st.markdown("**Selecciona una plataforma:**")
+        selected_platform = st.selectbox(
+            "Plataformas disponibles",
+            graph_platforms,
+            help="Elige la plataforma cuya red deseas explorar",
+            key="individual_platform_selector"
+        )
+        graph_record = manifest['platforms'][selected_platform]['artifacts'][GRAPH_FILENAME]
+        try:
+            graph = load_platform_graph(graph_record)
+        except Exception as e:
+            st.error(f"❌ Error al cargar la red de '{selected_platform}': {e}")
+            return selected_platform, None, None
+
+        st.markdown("**Busca un usuario:**")
+        selected_user = user_search_selector(
+            load_user_index(graph_record),
+            key=f"individual_platform_user_{selected_platform}"
+        )
+
+        st.markdown("---")
+        st.markdown("### 📊 Información")
+        st.info(f"**{graph.num_nodes}** usuarios y **{graph.num_edges}** conexiones en '{selected_platform}'.")
+    return selected_platform, graph, selected_user
 
 # Función que genera la barra lateral del dashboard
-def render_sidebar(base_plot_path):
+def render_sidebar(base_plot_path, manifest):
     """
     Genera la barra lateral para la selección de categoría y usuario.
+    Las categorías y usuarios se leen del manifiesto de artefactos.
     """
     with st.sidebar:
         st.markdown("### 🗂️ Panel de Control Individual")
@@ -24,11 +89,7 @@ def render_sidebar(base_plot_path):
         # 1. Selector de Categorías
         st.markdown("**Selecciona una categoría:**")
         try:
-            # Listar directorios que no comiencen con '.'
-            categories = sorted([
-                d.name for d in base_plot_path.iterdir()
-                if d.is_dir() and not d.name.startswith('.')
-            ])
+            categories = list_categories(manifest)
         except Exception as e:
             st.error(f"❌ Error al cargar categorías: {e}")
             return None, None
@@ -49,31 +110,21 @@ def render_sidebar(base_plot_path):
         users_in_category = 0
         if selected_category:
             category_path = base_plot_path / selected_category
-            if not category_path.exists() or not category_path.is_dir():
+            if selected_category not in manifest['individual']:
                 st.warning(f"⚠️ La carpeta para la categoría '{selected_category}' no existe.")
                 return selected_category, None
 
-            st.markdown("**Selecciona un usuario:**")
-            try:
-                users = sorted([
-                    d.name for d in category_path.iterdir()
-                    if d.is_dir() and not d.name.startswith('.')
-                ])
-                users_in_category = len(users)
-            except Exception as e:
-                st.error(f"❌ Error al cargar usuarios para '{selected_category}': {e}")
-                return selected_category, None
-
-            if not users:
+            # Sólo se cuenta: la lista completa nunca se ordena ni se envía al navegador
+            users_in_category = len(manifest['individual'][selected_category])
+            if not users_in_category:
                 st.warning(f"⚠️ No se encontraron usuarios en la categoría '{selected_category}'.")
                 st.info(f"📁 Estructura esperada: `{category_path}/[nombre_usuario]/`")
                 return selected_category, None
 
-            selected_user = st.selectbox(
-                "Usuarios disponibles",
-                users,
-                help="Elige el usuario que deseas analizar",
-                key="individual_user_selector"
+            st.markdown("**Busca un usuario:**")
+            selected_user = user_search_selector(
+                category_user_index(manifest, selected_category),
+                key=f"individual_user_{selected_category}"
             )
 
         st.markdown("---")
@@ -86,12 +137,123 @@ def render_sidebar(base_plot_path):
         with st.expander("¿Cómo usar el dashboard?"):
             st.markdown("""
             1. **Selecciona** una categoría del menú.
-            2. **Selecciona** un usuario de la lista.
+            2. **Busca** un usuario por nombre, candidato o comunidad.
             3. **Explora** las pestañas para ver la red y el análisis de densidad del usuario.
             """)
     return selected_category, selected_user
 
 
+def _artifact_files(user_artifacts, name):
+    """Rutas de un artefacto del usuario (lista vacía si no existe)"""
+    return [artifact_path(user_artifacts[name])] if name in user_artifacts else []
+
+
+def render_network_view(selected_user, user_folder_path, user_artifacts):
+    """Pestaña: visualización de la red del usuario"""
+    st.markdown('<p class="section-header">Red de Conexiones del Usuario</p>', unsafe_allow_html=True)
+    if NETWORK_PLOT_FILENAME in user_artifacts:
+        try:
+            st.markdown("""
+                <div class="info-card">
+                    <p style="color: var(--text-secondary); margin-bottom: 1rem;">
+                        Esta visualización muestra las conexiones del usuario seleccionado basadas en similitud discursiva.
+                        Los nodos representan otros usuarios y las conexiones indican similitudes en el contenido.
+                    </p>
+                </div>
+            """, unsafe_allow_html=True)
+            render_html_artifact(user_artifacts[NETWORK_PLOT_FILENAME], height=650)
+        except Exception as e:
+            st.error(f"❌ Error al cargar la visualización de red: {e}")
+    else:
+        st.warning(f"⚠️ Visualización de red no disponible para '{selected_user}'.")
+        st.info(f"💡 Genera el archivo `{NETWORK_PLOT_FILENAME}` en `{user_folder_path}` para ver esta visualización.")
+
+
+def render_density_view(selected_user, user_folder_path, user_artifacts):
+    """Pestaña: visualización del análisis de densidad del usuario"""
+    st.markdown('<p class="section-header">Análisis de Densidad del Usuario</p>', unsafe_allow_html=True)
+    if DENSITY_PLOT_FILENAME in user_artifacts:
+        try:
+            st.markdown("""
+                <div class="info-card">
+                    <p style="color: var(--text-secondary); margin-bottom: 1rem;">
+                        El análisis de densidad muestra la distribución espacial del usuario seleccionado y 
+                        la concentración de su actividad en diferentes regiones de la red.
+                    </p>
+                </div>
+            """, unsafe_allow_html=True)
+            render_html_artifact(user_artifacts[DENSITY_PLOT_FILENAME], height=650)
+        except Exception as e:
+            st.error(f"❌ Error al cargar la visualización de densidad: {e}")
+    else:
+        st.warning(f"📊 Análisis de densidad no disponible para '{selected_user}'.")
+        st.info(f"💡 Genera el archivo `{DENSITY_PLOT_FILENAME}` en `{user_folder_path}` para ver esta visualización.")
+
+
+def render_ego_network_view(selected_user, selected_platform, ego):
+    """Pestaña (modo en vivo): ego-red del usuario dentro de la red de la plataforma"""
+    st.markdown('<p class="section-header">Red de Conexiones del Usuario</p>', unsafe_allow_html=True)
+    try:
+        st.markdown("""
+            <div class="info-card">
+                <p style="color: var(--text-secondary); margin-bottom: 1rem;">
+                    Usuarios conectados directamente con el usuario seleccionado, en las mismas posiciones
+                    que ocupan en la red de la plataforma.
+                </p>
+            </div>
+        """, unsafe_allow_html=True)
+        fig = network_figure(
+            ego,
+            title=f"Red de {selected_user} en {selected_platform}",
+            highlight_node=selected_user
+        )
+        fig.update_layout(height=650)
+        st.plotly_chart(fig, use_container_width=True, theme=None)
+    except Exception as e:
+        st.error(f"❌ Error al construir la red del usuario: {e}")
+
+
+def render_ego_density_view(selected_user, ego):
+    """Pestaña (modo en vivo): densidad de la ego-red"""
+    st.markdown('<p class="section-header">Análisis de Densidad del Usuario</p>', unsafe_allow_html=True)
+    # El KDE necesita al menos tres puntos no colineales
+    if ego.num_nodes < 3:
+        st.info(f"📊 '{selected_user}' tiene muy pocas conexiones para estimar una densidad.")
+        return
+    try:
+        fig = density_figure(ego.pos, title=f"Densidad de la red de {selected_user}")
+        fig.update_layout(height=650)
+        st.plotly_chart(fig, use_container_width=True, theme=None)
+    except Exception as e:
+        st.error(f"❌ Error al calcular la densidad: {e}")
+
+
+def show_platform_user(manifest, graph_platforms):
+    """Modo en vivo: ego-red extraída de la red compacta de la plataforma"""
+    selected_platform, graph, selected_user = render_platform_sidebar(manifest, graph_platforms)
+    if graph is None or not selected_user:
+        st.info("ℹ️ Selecciona una plataforma y un usuario en el panel de la izquierda para comenzar.")
+        return
+
+    ego = ego_network(graph, selected_user)
+    st.markdown(f"## Análisis de: **{selected_user}** (Plataforma: *{selected_platform}*)")
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Conexiones directas", ego.num_nodes - 1)
+    col2.metric("Aristas en la ego-red", ego.num_edges)
+    top_neighbors = neighbor_weights(graph, selected_user)[:1]
+    col3.metric("Vecino más similar", top_neighbors[0][0] if top_neighbors else "—")
+    st.markdown("---")
+
+    render_views([
+        ("🌐 Red de Usuario",
+         lambda: render_ego_network_view(selected_user, selected_platform, ego),
+         []),
+        ("📈 Análisis de Densidad",
+         lambda: render_ego_density_view(selected_user, ego),
+         []),
+    ], key="individual_view")
+
+
 # Función principal que muestra la página
 def show_page():
     """Dashboard de análisis individual de usuarios"""
@@ -107,6 +269,12 @@ def show_page():
 
     st.markdown("---")
 
+    manifest = get_manifest()
+    graph_platforms = platforms_with_graph(manifest)
+    if render_source_selector(graph_platforms) == SOURCE_PLATFORM:
+        show_platform_user(manifest, graph_platforms)
+        return
+
     # Validación de existencia de la carpeta de datos principal
     if not BASE_PLOT_PATH.exists():
         st.error(f"❌ No se encontró la carpeta de datos para análisis individuales. Asegúrate de que existe: `{BASE_PLOT_PATH}`")
@@ -114,7 +282,7 @@ def show_page():
         return
 
     # Mostramos la barra lateral y obtenemos la categoría y usuario seleccionados
-    selected_category, selected_user = render_sidebar(BASE_PLOT_PATH)
+    selected_category, selected_user = render_sidebar(BASE_PLOT_PATH, manifest)
 
     if selected_category and selected_user:
         st.markdown(f"## Análisis de: **{selected_user}** (Categoría: *{selected_category}*)")
@@ -122,62 +290,21 @@ def show_page():
 
         user_folder_path = BASE_PLOT_PATH / selected_category / selected_user
 
-        if not user_folder_path.exists() or not user_folder_path.is_dir():
+        user_artifacts = manifest['individual'].get(selected_category, {}).get(selected_user)
+        if user_artifacts is None:
             st.error(f"❌ No se encontró la carpeta para el usuario '{selected_user}' en la categoría '{selected_category}'.")
             st.info(f"📁 Verifica la ruta: `{user_folder_path}`")
             return
 
-        # Pestañas para diferentes análisis
-        tab1, tab2 = st.tabs([
-            "🌐 Red de Usuario",
-            "📈 Análisis de Densidad"
-        ])
-
-        # TAB 1: Visualización de la red del usuario
-        with tab1:
-            st.markdown('<p class="section-header">Red de Conexiones del Usuario</p>', unsafe_allow_html=True)
-            network_file = user_folder_path / NETWORK_PLOT_FILENAME
-            if network_file.exists():
-                try:
-                    with open(network_file, 'r', encoding='utf-8') as f:
-                        html_network = f.read()
-                    st.markdown("""
-                        <div class="info-card">
-                            <p style="color: var(--text-secondary); margin-bottom: 1rem;">
-                                Esta visualización muestra las conexiones del usuario seleccionado basadas en similitud discursiva.
-                                Los nodos representan otros usuarios y las conexiones indican similitudes en el contenido.
-                            </p>
-                        </div>
-                    """, unsafe_allow_html=True)
-                    st.components.v1.html(html_network, height=650, scrolling=True)
-                except Exception as e:
-                    st.error(f"❌ Error al cargar la visualización de red: {e}")
-            else:
-                st.warning(f"⚠️ Visualización de red no disponible para '{selected_user}'.")
-                st.info(f"💡 Genera el archivo `{NETWORK_PLOT_FILENAME}` en `{user_folder_path}` para ver esta visualización.")
-
-        # TAB 2: Visualización del análisis de densidad del usuario
-        with tab2:
-            st.markdown('<p class="section-header">Análisis de Densidad del Usuario</p>', unsafe_allow_html=True)
-            density_file = user_folder_path / DENSITY_PLOT_FILENAME
-            if density_file.exists():
-                try:
-                    with open(density_file, 'r', encoding='utf-8') as f:
-                        html_density = f.read()
-                    st.markdown("""
-                        <div class="info-card">
-                            <p style="color: var(--text-secondary); margin-bottom: 1rem;">
-                                El análisis de densidad muestra la distribución espacial del usuario seleccionado y 
-                                la concentración de su actividad en diferentes regiones de la red.
-                            </p>
-                        </div>
-                    """, unsafe_allow_html=True)
-                    st.components.v1.html(html_density, height=650, scrolling=True)
-                except Exception as e:
-                    st.error(f"❌ Error al cargar la visualización de densidad: {e}")
-            else:
-                st.warning(f"📊 Análisis de densidad no disponible para '{selected_user}'.")
-                st.info(f"💡 Genera el archivo `{DENSITY_PLOT_FILENAME}` en `{user_folder_path}` para ver esta visualización.")
+        # Vistas de análisis: en modo diferido sólo se carga la vista activa
+        render_views([
+            ("🌐 Red de Usuario",
+             lambda: render_network_view(selected_user, user_folder_path, user_artifacts),
+             _artifact_files(user_artifacts, NETWORK_PLOT_FILENAME)),
+            ("📈 Análisis de Densidad",
+             lambda: render_density_view(selected_user, user_folder_path, user_artifacts),
+             _artifact_files(user_artifacts, DENSITY_PLOT_FILENAME)),
+        ], key="individual_view")
     elif selected_category:
         st.info(f"ℹ️ Selecciona un usuario de la categoría '{selected_category}' para ver su análisis.")
     else:
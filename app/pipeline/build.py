@@ -0,0 +1,71 @@
+# pipeline/build.py
+"""
+Regenerar sin intervención todos los artefactos del dashboard en
+`app/static/plots` (en lugar de ejecutar las celdas del notebook):
+
+- red, densidad y `graph.npz` de cada plataforma;
+- página y nube de palabras de cada comunidad;
+- red y densidad de cada usuario de `config.CATEGORIES`;
+- comparaciones de cohesión y polarización por categoría;
+- `manifest.json` actualizado.
+
+Las plataformas y las páginas por usuario se procesan en un pool de procesos
+(`--jobs`). Cada archivo se escribe en un temporal del mismo directorio y se
+renombra, así que el dashboard nunca lee un archivo a medias. Las etapas ya
+calculadas se reutilizan de la caché (`pipeline.stages`). Desde `app/`:
+
+    python -m pipeline.build ../data.csv --jobs 4
+"""
+import argparse
+import logging
+import os
+import time
+
+from pipeline import config
+from pipeline.export import PLOTS_DIR
+from pipeline.stages import DEFAULT_CACHE_DIR, format_stage_report, run_pipeline
+from utils.manifest import MANIFEST_FILENAME, precompress_artifacts, read_manifest, refresh_manifest
+
+
+def build(data_path, output_root=PLOTS_DIR, cache_dir=DEFAULT_CACHE_DIR, platforms=None,
+          top_n=config.TOP_USERS, jobs=1, workers=1, manifest=True, gzip=False):
+    """Regenerar los artefactos y el manifiesto; devuelve el texto del resumen de tiempos"""
+    started = time.perf_counter()
+    _, report = run_pipeline(
+        data_path, cache_dir=cache_dir, output_root=output_root, platforms=platforms,
+        top_n=top_n, jobs=jobs, workers=workers
+    )
+    pipeline_seconds = time.perf_counter() - started
+
+    lines = [format_stage_report(report)]
+    if manifest:
+        manifest_started = time.perf_counter()
+        data = refresh_manifest(output_root, previous=read_manifest(output_root))
+        lines.append(f"Manifiesto en {time.perf_counter() - manifest_started:.2f}s "
+                     f"-> {os.path.join(output_root, MANIFEST_FILENAME)}")
+        if gzip:
+            lines.append(f"Variantes .gz escritas: {precompress_artifacts(data, output_root)}")
+    lines.append(f"Pipeline en {pipeline_seconds:.2f}s, total {time.perf_counter() - started:.2f}s "
+                 f"({jobs} proceso(s) para plataformas y usuarios)")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Regenerar los artefactos de app/static/plots")
+    parser.add_argument("csv", nargs="?", default="data.csv")
+    parser.add_argument("-n", type=int, default=config.TOP_USERS, help="Usuarios por plataforma")
+    parser.add_argument("--platforms", nargs="+", help="Sólo estas plataformas")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                        help="Procesos para plataformas y páginas por usuario")
+    parser.add_argument("--workers", type=int, default=1, help="Procesos dentro de cada plataforma")
+    parser.add_argument("--output", default=PLOTS_DIR)
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--no-manifest", action="store_true")
+    parser.add_argument("--gzip", action="store_true", help="Escribir variantes .gz de cada HTML")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(processName)s %(message)s")
+    print(build(
+        args.csv, output_root=args.output, cache_dir=args.cache_dir, platforms=args.platforms,
+        top_n=args.n, jobs=args.jobs, workers=args.workers, manifest=not args.no_manifest, gzip=args.gzip
+    ))
@@ -0,0 +1,428 @@
+# pipeline/clustering.py
+"""
+Búsqueda de hiperparámetros de clustering y fusión tardía (etapa `cluster`).
+
+Misma búsqueda que `get_best_model`/`get_labels_with_late_fusion` del
+notebook (las mismas configuraciones de `ParameterSampler` y los mismos
+criterios de selección), pero:
+
+- las configuraciones se reparten entre procesos;
+- lo que no depende de `n_clusters` se calcula una vez por representación:
+  el árbol jerárquico de cada `linkage` (Agglomerative, vía `memory`) y las
+  matrices de afinidad kNN/RBF (SpectralClustering con `affinity='precomputed'`);
+- cada resultado (etiquetas, puntaje, tiempo o error) se guarda en un JSONL,
+  de modo que una nueva ejecución sólo evalúa las configuraciones que faltan;
+- los errores se registran con `logging` en lugar de ignorarse.
+
+    from pipeline.clustering import get_labels_with_late_fusion
+    labels, info, results = get_labels_with_late_fusion(
+        X_views, tvector_columns, METRICS, MODELS, n_iter=16,
+        results_path="cache/clustering_X.jsonl", workers=4
+    )
+"""
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+from sklearn.base import clone
+from sklearn.cluster import AgglomerativeClustering, KMeans, SpectralClustering
+from sklearn.metrics import calinski_harabasz_score
+from sklearn.metrics.pairwise import rbf_kernel
+from sklearn.model_selection import ParameterSampler
+from sklearn.neighbors import kneighbors_graph
+
+logger = logging.getLogger(__name__)
+
+# Configuración de métricas de evaluación y modelos con sus rangos de hiperparámetros
+METRICS = {
+    'calinski_harabasz': calinski_harabasz_score
+}
+MODELS = {
+    'KMeans': {
+        'model': KMeans,
+        'params': {
+            'n_clusters': list(range(2, 10)),
+            'init': ['k-means++', 'random'],
+            'random_state': [42]
+        }
+    },
+    'Agglomerative': {
+        'model': AgglomerativeClustering,
+        'params': {
+            'n_clusters': list(range(2, 10)),
+            'linkage': ['ward', 'complete', 'average', 'single']
+        }
+    },
+    'SpectralClustering': {
+        'model': SpectralClustering,
+        'params': {
+            'n_clusters': list(range(2, 10)),
+            'affinity': ['nearest_neighbors', 'rbf'],
+            'random_state': [42],
+            'assign_labels': ['kmeans', 'discretize']
+        }
+    }
+}
+
+
+def evaluate_clustering(X, labels, metrics):
+    results = {}
+    # Algunos algoritmos pueden generar etiquetas -1 para outliers, evitar errores:
+    if len(set(labels)) == 1 or -1 in labels:
+        # Cluster único o etiquetas inválidas, métrica no computable o mínima
+        for metric_name in metrics.keys():
+            results[metric_name] = -np.inf
+        return results
+
+    for metric_name, metric_func in metrics.items():
+        results[metric_name] = metric_func(X, labels)
+    return results
+
+
+def view_fingerprint(X):
+    """Hash del contenido de una representación (forma, tipo y datos)"""
+    X = np.ascontiguousarray(X)
+    digest = hashlib.sha256(f"{X.shape}:{X.dtype}".encode())
+    digest.update(X.view(np.uint8).ravel() if X.size else b'')
+    return digest.hexdigest()
+
+
+def config_key(fingerprint, model_name, params, metrics):
+    payload = json.dumps(
+        {'view': fingerprint, 'model': model_name, 'params': params, 'metrics': sorted(metrics)},
+        sort_keys=True, default=str
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ResultStore:
+    """Resultados por configuración en un JSONL (una línea por evaluación)"""
+
+    def __init__(self, path=None):
+        self.path = path
+        self.records = {}
+        if path and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Última línea a medio escribir de una ejecución interrumpida
+                        continue
+                    self.records[record['key']] = record
+
+    def __contains__(self, key):
+        return key in self.records
+
+    def get(self, key):
+        return self.records.get(key)
+
+    def add(self, record):
+        self.records[record['key']] = record
+        if self.path:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record) + "\n")
+
+
+def _shared_key(model_cls, params):
+    """Cálculo compartido que necesita una configuración (None si no hay)"""
+    if issubclass(model_cls, AgglomerativeClustering):
+        return ('tree', params.get('linkage', 'ward'))
+    if issubclass(model_cls, SpectralClustering):
+        affinity = params.get('affinity', 'rbf')
+        if affinity == 'nearest_neighbors':
+            return ('knn', params.get('n_neighbors', 10))
+        if affinity == 'rbf':
+            return ('rbf', params.get('gamma', 1.0))
+    return None
+
+
+def _fit_labels(model_cls, params, X, shared, shared_key, workdir):
+    """Ajustar una configuración reutilizando lo ya calculado para su grupo"""
+    if shared_key is None:
+        model = clone(model_cls(**params))
+        model.fit(X)
+        return model.labels_
+
+    kind = shared_key[0]
+    if kind == 'tree':
+        # El árbol completo no depende de n_clusters: `memory` lo guarda tras el primer ajuste
+        model = clone(model_cls(**params, memory=workdir, compute_full_tree=True))
+        model.fit(X)
+        return model.labels_
+
+    if shared_key not in shared:
+        if kind == 'knn':
+            connectivity = kneighbors_graph(X, n_neighbors=shared_key[1], include_self=True)
+            shared[shared_key] = 0.5 * (connectivity + connectivity.T)
+        else:
+            shared[shared_key] = rbf_kernel(X, gamma=shared_key[1])
+    model = clone(model_cls(**{**params, 'affinity': 'precomputed'}))
+    model.fit(shared[shared_key])
+    return model.labels_
+
+
+def _run_group(task):
+    """Evaluar un grupo de configuraciones que comparten cálculo previo (en un proceso del pool)"""
+    X = np.load(task['x_path'])
+    shared = {}
+    workdir = tempfile.mkdtemp(prefix="clustering-")
+    records = []
+    try:
+        for key, params in task['configs']:
+            started = time.perf_counter()
+            record = {
+                'key': key,
+                'view': task['view_name'],
+                'model_name': task['model_name'],
+                'params': params,
+            }
+            try:
+                labels = _fit_labels(task['model_cls'], params, X, shared, task['shared_key'], workdir)
+                evaluation = evaluate_clustering(X, labels, task['metrics'])
+                record.update(
+                    labels=np.asarray(labels).tolist(),
+                    scores=evaluation,
+                    score=list(evaluation.values())[0],
+                    error=None
+                )
+            except Exception as e:
+                record.update(labels=None, scores=None, score=None, error=f"{type(e).__name__}: {e}")
+            record['seconds'] = time.perf_counter() - started
+            records.append(record)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return records
+
+
+def sample_configurations(models, n_iter):
+    """Configuraciones de cada modelo, en el mismo orden que `optimize_hyperparameters`"""
+    return {
+        model_name: list(ParameterSampler(model_info['params'], n_iter=n_iter, random_state=42))
+        for model_name, model_info in models.items()
+    }
+
+
+def run_search(views, view_names, metrics, models, n_iter=20, results_path=None, workers=None):
+    """
+    Evaluar todas las configuraciones de todos los modelos para cada
+    representación. Devuelve el `ResultStore` y, por representación y modelo,
+    la lista de claves en orden de muestreo.
+    """
+    store = ResultStore(results_path)
+    configurations = sample_configurations(models, n_iter)
+    keys = {}
+    tasks = []
+
+    tmpdir = tempfile.mkdtemp(prefix="clustering-views-")
+    try:
+        for X, view_name in zip(views, view_names):
+            X = np.ascontiguousarray(X, dtype=np.float64)
+            fingerprint = view_fingerprint(X)
+            x_path = os.path.join(tmpdir, f"{fingerprint}.npy")
+            if not os.path.exists(x_path):
+                np.save(x_path, X)
+
+            keys[view_name] = {}
+            for model_name, param_sets in configurations.items():
+                model_cls = models[model_name]['model']
+                groups = {}
+                keys[view_name][model_name] = []
+                for i, params in enumerate(param_sets):
+                    key = config_key(fingerprint, model_name, params, metrics)
+                    keys[view_name][model_name].append(key)
+                    if key in store:
+                        continue
+                    shared_key = _shared_key(model_cls, params)
+                    # Sin cálculo compartido, cada configuración es una tarea independiente
+                    group_id = shared_key if shared_key is not None else ('config', i)
+                    groups.setdefault(group_id, []).append((key, params))
+                for group_id, configs in groups.items():
+                    tasks.append({
+                        'view_name': view_name,
+                        'x_path': x_path,
+                        'model_name': model_name,
+                        'model_cls': model_cls,
+                        'shared_key': None if group_id[0] == 'config' else group_id,
+                        'configs': configs,
+                        'metrics': metrics,
+                    })
+
+        pending = sum(len(task['configs']) for task in tasks)
+        logger.info("Clustering: %d configuraciones nuevas en %d grupos", pending, len(tasks))
+
+        def collect(records):
+            for record in records:
+                store.add(record)
+                if record['error']:
+                    logger.warning(
+                        "%s %s %s falló en %.2fs: %s", record['view'], record['model_name'],
+                        record['params'], record['seconds'], record['error']
+                    )
+                else:
+                    logger.info(
+                        "%s %s %s -> %.4f (%.2fs)", record['view'], record['model_name'],
+                        record['params'], record['score'], record['seconds']
+                    )
+
+        if workers == 1 or len(tasks) <= 1:
+            for task in tasks:
+                collect(_run_group(task))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(_run_group, task) for task in tasks]
+                for future in as_completed(futures):
+                    collect(future.result())
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+    return store, keys
+
+
+def best_result(store, model_name, keys):
+    """Mejor configuración de un modelo (primera con el mayor puntaje, como el notebook)"""
+    best_score = float('-inf')
+    best_params = None
+    best_labels = None
+    for key in keys:
+        record = store.get(key)
+        if record is None or record['error']:
+            continue
+        if record['score'] > best_score:
+            best_score = record['score']
+            best_params = record['params']
+            best_labels = np.asarray(record['labels'])
+    return {
+        'best_params': best_params,
+        'best_labels': best_labels,
+        'best_score': best_score,
+        'model_name': model_name
+    }
+
+
+def get_best_model(X, metrics, models, n_iter=20, results_path=None, workers=None):
+    store, keys = run_search([X], ['X'], metrics, models, n_iter, results_path, workers)
+    results = [best_result(store, model_name, keys['X'][model_name]) for model_name in models]
+    return max(results, key=lambda x: x['best_score']), results
+
+
+def align_labels_hungarian(reference_labels, target_labels):
+    ref_clusters, ref_index = np.unique(reference_labels, return_inverse=True)
+    target_clusters, target_index = np.unique(target_labels, return_inverse=True)
+
+    # Tabla de contingencia en una sola pasada
+    cost_matrix = np.zeros((len(ref_clusters), len(target_clusters)))
+    np.add.at(cost_matrix, (ref_index, target_index), -1)
+
+    row_indices, col_indices = linear_sum_assignment(cost_matrix)
+
+    label_mapping = {}
+    for i, j in zip(row_indices, col_indices):
+        if j < len(target_clusters):
+            label_mapping[target_clusters[j]] = ref_clusters[i]
+
+    aligned_labels = np.copy(target_labels)
+    for old_label, new_label in label_mapping.items():
+        aligned_labels[target_labels == old_label] = new_label
+
+    return aligned_labels
+
+
+def late_fusion_weighted_voting(labels_dict, scores_dict):
+    views = list(labels_dict.keys())
+    n_samples = len(list(labels_dict.values())[0])
+
+    total_score = sum(scores_dict.values())
+    weights = {view: score / total_score for view, score in scores_dict.items()}
+
+    reference_view = views[0]
+    reference_labels = labels_dict[reference_view]
+    aligned_labels = {reference_view: reference_labels}
+
+    for view in views[1:]:
+        aligned_labels[view] = align_labels_hungarian(
+            reference_labels, labels_dict[view]
+        )
+
+    final_labels = np.zeros(n_samples, dtype=int)
+    voting_confidence = np.zeros(n_samples)
+
+    for i in range(n_samples):
+        cluster_votes = {}
+        for view, labels in aligned_labels.items():
+            cluster_votes[labels[i]] = cluster_votes.get(labels[i], 0) + weights[view]
+        best_cluster, best_weight = max(cluster_votes.items(), key=lambda x: x[1])
+        final_labels[i] = best_cluster
+        voting_confidence[i] = best_weight
+
+    voting_info = {
+        'weights': weights,
+        'aligned_labels': aligned_labels,
+        'confidence': voting_confidence
+    }
+    return final_labels, voting_info
+
+
+def get_labels_with_late_fusion(views, view_names, metrics, models, n_iter=20, results_path=None, workers=None):
+    store, keys = run_search(views, view_names, metrics, models, n_iter, results_path, workers)
+
+    results = {}
+    for name in view_names:
+        all_results = [best_result(store, model_name, keys[name][model_name]) for model_name in models]
+        results[name] = {
+            'best': max(all_results, key=lambda x: x['best_score']),
+            'all': all_results
+        }
+
+    best_global_result = max([res['best'] for res in results.values()], key=lambda x: x['best_score'])
+    model_name = best_global_result['model_name']
+    best_params = best_global_result['best_params']
+    if best_params is None:
+        # Sin ninguna configuración válida no hay etiquetas que fusionar
+        errors = [
+            store.get(key)['error']
+            for name in view_names for key in keys[name][model_name]
+            if store.get(key) is not None and store.get(key)['error']
+        ]
+        where = f"en {results_path}" if results_path else "en el log (advertencias de `run_search`)"
+        raise ValueError(
+            f"Todas las configuraciones de {model_name} (y de los demás modelos) fallaron; "
+            f"el error de cada configuración está {where}, campo 'error'. "
+            f"Primer error de {model_name}: {errors[0] if errors else 'desconocido'}"
+        )
+
+    # La configuración ganadora ya se evaluó en todas las representaciones (mismo
+    # muestreo), así que sus etiquetas salen del almacén en lugar de reajustarse
+    param_sets = sample_configurations({model_name: models[model_name]}, n_iter)[model_name]
+    winner = param_sets.index(best_params)
+
+    labels_per_view = {}
+    scores_per_view = {}
+    for i, view_name in enumerate(view_names):
+        record = store.get(keys[view_name][model_name][winner])
+        if record is None or record['error']:
+            model_instance = clone(models[model_name]['model'](**best_params))
+            model_instance.fit(views[i])
+            labels = model_instance.labels_
+            score = list(evaluate_clustering(views[i], labels, metrics).values())[0]
+        else:
+            labels, score = np.asarray(record['labels']), record['score']
+        labels_per_view[view_name] = labels
+        scores_per_view[view_name] = score
+
+    fusion_labels, fusion_info = late_fusion_weighted_voting(
+        labels_per_view, scores_per_view
+    )
+
+    return fusion_labels, fusion_info, results
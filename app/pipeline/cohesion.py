@@ -0,0 +1,319 @@
+# pipeline/cohesion.py
+"""
+Métricas de cohesión de las redes individuales (etapa `cohesion`).
+
+`calculate_cohesion_metrics` del notebook recorría en serie todas las
+ego-redes de `individual_networks`. Aquí:
+
+- las redes se reparten entre procesos, enviando sólo la estructura (número de
+  nodos y aristas como índices), no los atributos con vectores;
+- cada red se convierte a no dirigida una sola vez para todas las métricas;
+- los grupos costosos (`paths`, `connectivity`) tienen un tiempo límite; si se
+  agota, la métrica queda en NaN y se registra, sin detener la ejecución;
+- `mode='fast'` usa BFS vectorizado (scipy) para caminos y diámetro, con
+  muestreo de orígenes en componentes grandes, y una conectividad acotada: la
+  cota inferior aproximada de networkx, que es exacta cuando alcanza el grado
+  mínimo; si no, la conectividad de aristas se corta en el grado mínimo;
+- cada resultado se agrega a un JSONL al terminar, así que una nueva
+  ejecución sólo calcula las redes que faltan.
+
+En modo `exact` los valores son los mismos que los del notebook.
+
+    from pipeline.cohesion import batch_cohesion_metrics
+    cohesion_df = batch_cohesion_metrics(
+        individual_networks, results_path="cache/cohesion.jsonl", mode='fast', workers=4
+    )
+"""
+import hashlib
+import logging
+import os
+import signal
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+
+import networkx as nx
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from networkx.algorithms import approximation
+from scipy.sparse.csgraph import connected_components, shortest_path
+
+from pipeline.clustering import ResultStore
+
+logger = logging.getLogger(__name__)
+
+# Columnas de `cohesion_df`, en el orden del notebook
+METRIC_COLUMNS = [
+    'densidad', 'clustering_promedio', 'transitividad', 'reciprocidad',
+    'camino_mas_corto_medio', 'diametro', 'conectividad_nodos', 'conectividad_aristas',
+]
+
+# Segundos máximos por grupo de métricas (None: sin límite)
+DEFAULT_TIMEOUTS = {
+    'clustering': None,
+    'paths': 60,
+    'connectivity': 60,
+}
+
+# En modo rápido, número máximo de orígenes BFS por componente
+FAST_PATH_SOURCES = 256
+
+
+class MetricTimeout(BaseException):
+    """
+    Tiempo agotado en un grupo de métricas. Hereda de `BaseException` para que
+    los `except Exception` de las métricas no la absorban: si no, la alarma
+    (de un solo disparo) se perdería y el resto del grupo correría sin límite.
+    """
+
+
+@contextmanager
+def time_limit(seconds):
+    """Interrumpir el bloque tras `seconds` (SIGALRM; sólo en el hilo principal de Unix)"""
+    if (not seconds or not hasattr(signal, 'setitimer')
+            or threading.current_thread() is not threading.main_thread()):
+        yield
+        return
+
+    def handler(signum, frame):
+        raise MetricTimeout()
+
+    previous = signal.signal(signal.SIGALRM, handler)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def _largest_strong_component(G):
+    if nx.is_strongly_connected(G):
+        return G
+    return G.subgraph(max(nx.strongly_connected_components(G), key=len))
+
+
+def _exact_paths(G):
+    """Camino más corto medio y diámetro como el notebook (componente fuerte mayor)"""
+    sub = _largest_strong_component(G)
+    try:
+        avg_sp = nx.average_shortest_path_length(sub, weight=None)
+    except Exception:
+        avg_sp = np.nan
+    try:
+        diam = nx.diameter(sub)
+    except Exception:
+        diam = np.nan
+    return avg_sp, diam
+
+
+def _fast_paths(G, max_sources=FAST_PATH_SOURCES, seed=0):
+    """
+    Las mismas métricas con BFS de scipy sobre la componente fuerte mayor.
+    Exactas hasta `max_sources` nodos; por encima se estiman con orígenes
+    muestreados (el diámetro es entonces una cota inferior).
+    """
+    n = G.number_of_nodes()
+    if n == 0:
+        return np.nan, np.nan
+    A = nx.to_scipy_sparse_array(G, nodelist=list(G.nodes), weight=None, format='csr')
+    _, labels = connected_components(A, directed=True, connection='strong')
+    largest = np.flatnonzero(labels == np.argmax(np.bincount(labels)))
+    A = sp.csr_matrix(A)[largest][:, largest]
+    size = len(largest)
+    if size == 1:
+        return 0.0, 0
+
+    sources = np.arange(size)
+    if size > max_sources:
+        sources = np.sort(np.random.default_rng(seed).choice(size, max_sources, replace=False))
+    distances = shortest_path(A, method='D', unweighted=True, indices=sources)
+    return float(distances.sum() / (len(sources) * (size - 1))), int(distances.max())
+
+
+def _exact_connectivity(und):
+    return nx.node_connectivity(und), nx.edge_connectivity(und)
+
+
+def _fast_connectivity(und):
+    """Conectividad acotada: κ ≤ λ ≤ grado mínimo"""
+    if not nx.is_connected(und):
+        return 0, 0
+    min_degree = min(degree for _, degree in und.degree())
+    node_conn = approximation.node_connectivity(und)
+    if node_conn >= min_degree:
+        return node_conn, min_degree
+    return node_conn, nx.edge_connectivity(und, cutoff=min_degree)
+
+
+def cohesion_metrics(G, mode='exact', timeouts=None):
+    """
+    Métricas de cohesión de una red dirigida. Devuelve `(métricas, grupos que
+    agotaron su tiempo)`.
+    """
+    timeouts = {**DEFAULT_TIMEOUTS, **(timeouts or {})}
+    timed_out = []
+    metrics = {'densidad': nx.density(G)}
+
+    # Una sola conversión a no dirigida para clustering, transitividad y conectividad
+    und = G.to_undirected()
+
+    def measure(group, compute, default):
+        try:
+            with time_limit(timeouts.get(group)):
+                return compute()
+        except MetricTimeout:
+            timed_out.append(group)
+            return default
+        except Exception:
+            return default
+
+    metrics['clustering_promedio'], metrics['transitividad'] = measure(
+        'clustering', lambda: (nx.average_clustering(und), nx.transitivity(und)), (np.nan, np.nan)
+    )
+    try:
+        metrics['reciprocidad'] = nx.reciprocity(G)
+    except Exception:
+        metrics['reciprocidad'] = np.nan
+
+    paths = _fast_paths if mode == 'fast' else _exact_paths
+    metrics['camino_mas_corto_medio'], metrics['diametro'] = measure(
+        'paths', lambda: paths(G), (np.nan, np.nan)
+    )
+
+    connectivity = _fast_connectivity if mode == 'fast' else _exact_connectivity
+    metrics['conectividad_nodos'], metrics['conectividad_aristas'] = measure(
+        'connectivity', lambda: connectivity(und), (np.nan, np.nan)
+    )
+    return metrics, timed_out
+
+
+def calculate_cohesion_metrics(G):
+    """Compatibilidad con el notebook: métricas exactas, sin límite de tiempo"""
+    return cohesion_metrics(G, mode='exact', timeouts={group: None for group in DEFAULT_TIMEOUTS})[0]
+
+
+def compact_graph(G):
+    """(número de nodos, aristas como pares de índices) en el orden de networkx"""
+    index = {node: i for i, node in enumerate(G.nodes)}
+    edges = np.array([(index[u], index[v]) for u, v in G.edges], dtype=np.int32).reshape(-1, 2)
+    return G.number_of_nodes(), edges
+
+
+def _rebuild(num_nodes, edges):
+    G = nx.DiGraph()
+    G.add_nodes_from(range(num_nodes))
+    G.add_edges_from(edges.tolist())
+    return G
+
+
+def _json_value(value):
+    """Escalares de NumPy a tipos de Python (NaN se conserva)"""
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _run_graph(task):
+    started = time.perf_counter()
+    metrics, timed_out = cohesion_metrics(_rebuild(task['num_nodes'], task['edges']), task['mode'], task['timeouts'])
+    record = {
+        'key': task['key'],
+        'platform': task['platform'],
+        'category': task['category'],
+        'username': task['username'],
+        'mode': task['mode'],
+        'seconds': time.perf_counter() - started,
+        'timed_out': timed_out,
+    }
+    record.update({name: _json_value(value) for name, value in metrics.items()})
+    return record
+
+
+def iter_ego_networks(individual_networks):
+    """(plataforma, categoría, usuario, red) de `individual_networks[plataforma][categoría][usuario]`"""
+    for platform, category_data in individual_networks.items():
+        for category, networks in category_data.items():
+            for username, G in networks.items():
+                yield platform, category, username, G
+
+
+def graph_key(platform, category, username, mode, num_nodes, edges):
+    digest = hashlib.sha256()
+    digest.update(f"{platform}\0{category}\0{username}\0{mode}\0{num_nodes}\0".encode('utf-8'))
+    digest.update(np.ascontiguousarray(edges).tobytes())
+    return digest.hexdigest()
+
+
+def batch_cohesion_metrics(networks, results_path=None, mode='exact', workers=None, timeouts=None):
+    """
+    Métricas de cohesión de muchas redes en paralelo. `networks` es el dict
+    anidado `individual_networks` o un iterable de (plataforma, categoría,
+    usuario, red). Devuelve `cohesion_df` en el orden de entrada.
+    """
+    if mode not in ('exact', 'fast'):
+        raise ValueError(f"Modo de cohesión desconocido: {mode}")
+    if isinstance(networks, dict):
+        networks = iter_ego_networks(networks)
+    workers = workers or os.cpu_count() or 1
+    store = ResultStore(results_path)
+
+    keys, tasks = [], []
+    for platform, category, username, G in networks:
+        num_nodes, edges = compact_graph(G)
+        key = graph_key(platform, category, username, mode, num_nodes, edges)
+        keys.append(key)
+        if key in store:
+            continue
+        tasks.append({
+            'key': key, 'platform': platform, 'category': category, 'username': username,
+            'num_nodes': num_nodes, 'edges': edges, 'mode': mode, 'timeouts': timeouts,
+        })
+    logger.info("Cohesión: %d redes nuevas de %d", len(tasks), len(keys))
+
+    def collect(record):
+        store.add(record)
+        if record['timed_out']:
+            logger.warning(
+                "%s - %s - %s: tiempo agotado en %s", record['platform'], record['category'],
+                record['username'], ", ".join(record['timed_out'])
+            )
+
+    if workers == 1 or len(tasks) <= 1:
+        for task in tasks:
+            collect(_run_graph(task))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_run_graph, task) for task in tasks]
+            for future in as_completed(futures):
+                collect(future.result())
+
+    rows = [store.get(key) for key in keys]
+    return pd.DataFrame(
+        [{name: row[name] for name in ['platform', 'category', 'username'] + METRIC_COLUMNS} for row in rows],
+        columns=['platform', 'category', 'username'] + METRIC_COLUMNS
+    )
+
+
+def check_timeouts(num_nodes=1500, timeout=0.5, seed=0):
+    """
+    Comprobación de regresión de los tiempos límite: en una red grande, el
+    grupo `paths` debe registrarse como agotado y la llamada completa no debe
+    tardar mucho más que la suma de los límites.
+    """
+    G = nx.gnp_random_graph(num_nodes, 8 / num_nodes, seed=seed, directed=True)
+    started = time.perf_counter()
+    metrics, timed_out = cohesion_metrics(G, mode='exact', timeouts={'paths': timeout, 'connectivity': timeout})
+    seconds = time.perf_counter() - started
+
+    assert 'paths' in timed_out, f"El tiempo agotado en `paths` no se registró: {timed_out}"
+    assert np.isnan(metrics['camino_mas_corto_medio']) and np.isnan(metrics['diametro'])
+    # Margen para densidad, clustering y reciprocidad, que no tienen límite
+    assert seconds < 2 * timeout + 1.5, f"La llamada tardó {seconds:.2f}s con límites de {timeout}s"
+    return {'nodes': num_nodes, 'timed_out': timed_out, 'seconds': seconds}
+
+
+if __name__ == "__main__":
+    result = check_timeouts()
+    print(f"{result['nodes']} nodos: tiempo agotado en {', '.join(result['timed_out'])} "
+          f"en {result['seconds']:.2f}s")
@@ -0,0 +1,97 @@
+# pipeline/config.py
+"""
+Parámetros del análisis que antes vivían en celdas del notebook: nombres de
+comunidades, categorías de usuarios relevantes, colores de partido y
+parámetros de cada etapa. `pipeline.stages` incluye los que usa cada etapa
+en su clave de caché, así que cambiar uno sólo recalcula lo que depende de él.
+"""
+
+# Usuarios tomados por plataforma (los de más interacciones)
+TOP_USERS = 1000
+
+# Correcciones de candidato en los datos de origen: usuario -> candidato
+CANDIDATE_FIXES = {
+    'Xóchitl Gálvez Ruiz': 'Xóchitl Gálvez',
+    'Xochitl2024': 'Xóchitl Gálvez',
+    'XochitlGalvez': 'Xóchitl Gálvez',
+}
+
+# Representaciones vectoriales (columnas del notebook), en el orden de la fusión
+VECTOR_COLUMNS = ['tf-idf_vectors', 'doc2vec_tf_embs', 'topic_vectors']
+
+TFIDF_PARAMS = {'ngram_range': (1, 2), 'max_features': 3000}
+
+DOC2VEC_PARAMS = {
+    'vocab_size': 20000,
+    'maxlen': 200,
+    'embed_dim': 128,
+    'hidden_units': 64,
+    'test_size': 0.2,
+    'random_state': 42,
+    'epochs': 20,
+    'batch_size': 32,
+}
+
+TOPIC_PARAMS = {'strategy': 'warm', 'tol': 0.01, 'patience': 2}
+
+# Configuraciones muestreadas por modelo en la búsqueda de clustering
+CLUSTER_ITERATIONS = 16
+
+# Nombre de cada comunidad por plataforma (índice de `voted_cluster`)
+CLUSTER_NAMES = {
+    'Facebook': {
+        0: 'Partidarios de Xóchitl Gálvez y Oposición',
+        1: 'Noticias y Figuras Políticas Diversas',
+        2: 'Partidarios de Morena y la 4T',
+        3: 'Partidarios de Movimiento Ciudadano',
+        4: 'Contenido de Memes y Entretenimiento',
+    },
+    'Instagram': {
+        0: 'Medios Globales y Nacionales con Figuras Políticas Diversas',
+        1: 'Figuras Políticas, Medios y Contenido Diverso',
+        2: 'Movimiento Ciudadano (Políticos y Afines)',
+        3: 'Líderes de Oposición y Partidarios de Xóchitl Gálvez',
+        4: 'Partidarios de Claudia Sheinbaum y la 4T (Morena y Afines)',
+        5: 'Partidos Políticos de Oposición (PRI, PAN, PRD y Afines)',
+    },
+    'X': {
+        0: 'Líderes Políticos y Medios Globales',
+        1: 'Actores Clave del Escenario Político Mexicano',
+        2: 'Movimiento Ciudadano y Críticos Políticos',
+        3: 'Partidarios de Oposición y Críticos de la 4T (Xóchitl Gálvez)',
+    },
+    'Youtube': {
+        0: 'Canales de Noticias y Opinión Variada',
+        1: 'Medios de Comunicación y Análisis Político',
+    },
+}
+
+# Usuarios relevantes por categoría (sus ego-redes se analizan aparte)
+CATEGORIES = {
+    'politicos': [
+        'Claudia Sheinbaum', 'Claudia Sheinbaum Pardo', 'Xóchitl Gálvez Ruiz', 'Xochitl2024',
+        'Jorge Álvarez Máynez', 'Mario Delgado Carrillo', 'Mario Delgado', 'Miguel Torruco Garza',
+        'Samuel García', 'Kenia López Rabadán', 'Rocío Nahle', 'Tatiana Clouthier', 'Lilia Aguilar',
+        'Renán Barrera', 'Marcelo Ebrard', 'Alejandro Moreno',
+    ],
+    'medios': [
+        'El Universal Online', 'Conexión Mx', 'Sin Censura TV', 'EL FINANCIERO',
+        'Campaigns and Elections Mexico', 'Radio Fórmula', 'MILENIO', 'sdpnoticias', 'Político MX',
+        'LA OCTAVA', 'Reporte Índigo', 'Imagen Noticias', 'El Heraldo de México', 'La Jornada',
+        'Once Noticias',
+    ],
+    'partidos': [
+        'Partido del Trabajo México', 'Partido Morena', 'PRI', 'Movimiento Ciudadano',
+        'Partido Acción Nacional', 'PartidoMorenaMx',
+    ],
+}
+
+# Colores representativos de los partidos
+PARTY_COLORS = {
+    'Jorge Álvarez Máynez': '#FF5E00',
+    'Xóchitl Gálvez': '#005BAC',
+    'Claudia Sheinbaum': '#A6192E',
+}
+
+# Modo de las métricas de cohesión ('exact' reproduce el notebook)
+COHESION_MODE = 'exact'
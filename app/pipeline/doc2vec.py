@@ -0,0 +1,103 @@
+# pipeline/doc2vec.py
+"""
+Embeddings de documentos supervisados (`doc2vec_tf_embs`), la función
+`train_doc2vec_supervised` del notebook. TensorFlow se importa sólo al
+entrenar, para que el resto del pipeline y el dashboard no dependan de él.
+
+Con `model_path`, el tokenizer y los pesos del encoder se guardan tras el
+primer entrenamiento y las siguientes ejecuciones sólo codifican, con numpy,
+los documentos que no están en la caché de embeddings (`pipeline.embeddings`).
+"""
+import logging
+import os
+import random
+
+import numpy as np
+
+from pipeline.embeddings import Doc2VecEncoder, EmbeddingCache
+
+logger = logging.getLogger(__name__)
+
+
+def train_doc2vec_supervised(df, text_col, label_col, vocab_size=20000, maxlen=200, embed_dim=128,
+                             hidden_units=64, test_size=0.2, random_state=123, epochs=10, batch_size=32):
+    """
+    Entrenar embedding → pooling → capa oculta → softmax para predecir
+    `label_col` y devolver `(modelo, tokenizer, encoder, embeddings)`, con los
+    embeddings de la capa de pooling de todos los documentos.
+    """
+    try:
+        import tensorflow as tf
+        from tensorflow.keras.preprocessing.sequence import pad_sequences
+        from tensorflow.keras.preprocessing.text import Tokenizer
+    except ImportError as e:
+        raise ImportError("Entrenar los embeddings doc2vec requiere `tensorflow`") from e
+    from sklearn.model_selection import train_test_split
+    from sklearn.preprocessing import LabelEncoder
+
+    # Semillas fijas para que el entrenamiento sea determinista
+    np.random.seed(random_state)
+    random.seed(random_state)
+    tf.random.set_seed(random_state)
+
+    le = LabelEncoder()
+    y_int = le.fit_transform(df[label_col])
+    y_cat = tf.keras.utils.to_categorical(y_int, num_classes=len(le.classes_))
+
+    tokenizer = Tokenizer(num_words=vocab_size, oov_token="<OOV>")
+    tokenizer.fit_on_texts(df[text_col])
+    seqs = tokenizer.texts_to_sequences(df[text_col])
+    X = pad_sequences(seqs, maxlen=maxlen, padding='post')
+
+    X_train, X_val, y_train, y_val = train_test_split(
+        X, y_cat, test_size=test_size, random_state=random_state
+    )
+
+    inp = tf.keras.Input(shape=(maxlen,), name="input_doc")
+    x = tf.keras.layers.Embedding(input_dim=vocab_size, output_dim=embed_dim, name="word_embedding")(inp)
+    x = tf.keras.layers.GlobalAveragePooling1D(name="doc_pooling")(x)
+    x = tf.keras.layers.Dense(hidden_units, activation='relu', name="dense_relu")(x)
+    out = tf.keras.layers.Dense(y_cat.shape[1], activation='softmax', name="pred_label")(x)
+
+    model = tf.keras.Model(inputs=inp, outputs=out, name="Doc2Vec_Supervised")
+    model.compile(optimizer='adam', loss='categorical_crossentropy', metrics=['accuracy'])
+    model.fit(
+        X_train, y_train, validation_data=(X_val, y_val),
+        epochs=epochs, batch_size=batch_size, verbose=0
+    )
+
+    encoder = tf.keras.Model(
+        inputs=model.input, outputs=model.get_layer('doc_pooling').output, name="Doc2Vec_Encoder"
+    )
+    doc_embeddings = encoder.predict(X, batch_size=batch_size, verbose=0)
+    return model, tokenizer, encoder, doc_embeddings
+
+
+def load_or_train_encoder(df, params, model_path, text_col='clean_doc', label_col='candidate_name'):
+    """Encoder guardado en `model_path` o, si no existe, entrenado con `df` y guardado ahí"""
+    if os.path.exists(model_path):
+        return Doc2VecEncoder.load(model_path)
+    _, tokenizer, keras_encoder, _ = train_doc2vec_supervised(df, text_col, label_col, **params)
+    encoder = Doc2VecEncoder.from_keras(tokenizer, keras_encoder, params.get('maxlen', 200))
+    encoder.save(model_path)
+    logger.info("Encoder doc2vec guardado en %s", model_path)
+    return encoder
+
+
+def doc2vec_embeddings(df, params, text_col='clean_doc', label_col='candidate_name',
+                       model_path=None, cache_path=None):
+    """
+    Sólo los embeddings (float32), con los parámetros de `config.DOC2VEC_PARAMS`.
+    Sin `model_path` se entrena y predice con Keras en cada llamada, como el
+    notebook; con él se reutiliza el encoder guardado y, con `cache_path`, los
+    embeddings de los documentos ya vistos.
+    """
+    if model_path is None:
+        *_, embeddings = train_doc2vec_supervised(df, text_col, label_col, **params)
+        return np.asarray(embeddings, dtype=np.float32)
+
+    encoder = load_or_train_encoder(df, params, model_path, text_col, label_col)
+    cache = EmbeddingCache(cache_path, encoder)
+    embeddings = cache.embed(df[text_col].tolist())
+    logger.info("doc2vec: %d documentos en caché, %d codificados", cache.report['hits'], cache.report['encoded'])
+    return embeddings
@@ -0,0 +1,43 @@
+# pipeline/ego.py
+"""
+Extracción de ego-redes (usuario + vecinos a 1 salto).
+
+Sobre la red compacta (`GraphData`) la extracción sólo lee dos filas CSR
+(aristas salientes y entrantes), por lo que puede hacerse en el dashboard para
+cualquier usuario en milisegundos, reutilizando las posiciones de la red de la
+plataforma.
+"""
+import numpy as np
+
+
+def ego_node_indices(graph, node_index):
+    """Índices (ordenados) del nodo y de sus predecesores y sucesores"""
+    successors, _ = graph.successors(node_index)
+    predecessors, _ = graph.predecessors(node_index)
+    return np.union1d(np.union1d(successors, predecessors), [node_index])
+
+
+def ego_network(graph, username):
+    """
+    Ego-red de `username` como `GraphData`: subgrafo inducido por el usuario y
+    sus vecinos, con las posiciones del layout de la plataforma.
+    """
+    node_index = graph.index[username]
+    return graph.subgraph(ego_node_indices(graph, node_index))
+
+
+def neighbor_weights(graph, username):
+    """Peso máximo (entrada o salida) de cada vecino, ordenado de mayor a menor"""
+    node_index = graph.index[username]
+    weights = {}
+    for neighbors, edge_weights in (graph.successors(node_index), graph.predecessors(node_index)):
+        for j, w in zip(neighbors.tolist(), edge_weights.tolist()):
+            weights[j] = max(weights.get(j, 0.0), w)
+    names = graph.usernames
+    return sorted(((names[j], w) for j, w in weights.items()), key=lambda item: item[1], reverse=True)
+
+
+def get_individual_network(graph, individual_node):
+    """Versión para networkx (la del notebook): subgrafo del nodo y sus vecinos"""
+    neighbors = set(graph.predecessors(individual_node)).union(graph.successors(individual_node))
+    return graph.subgraph(list(neighbors) + [individual_node]).copy()
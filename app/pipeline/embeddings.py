@@ -0,0 +1,193 @@
+# pipeline/embeddings.py
+"""
+Inferencia de los embeddings doc2vec sin TensorFlow.
+
+El encoder de `train_doc2vec_supervised` es `Embedding` → `GlobalAveragePooling1D`:
+el embedding de un documento es el promedio de las filas de la matriz de
+embeddings de sus tokens, sobre las `maxlen` posiciones de la secuencia
+rellenada (incluido el relleno, índice 0, porque la capa no usa máscara).
+Basta con guardar el vocabulario del `Tokenizer` y esa matriz para reproducirlo
+con numpy, por lotes y sólo en CPU:
+
+- `Doc2VecEncoder` replica `texts_to_sequences` (`num_words`, token OOV, filtros
+  y minúsculas) y `pad_sequences(padding='post')` (truncado por el inicio);
+- `EmbeddingCache` guarda el embedding de cada documento bajo el sha256 de su
+  texto, así que sólo se codifican los documentos nuevos o modificados.
+
+    from pipeline.embeddings import Doc2VecEncoder, EmbeddingCache
+    encoder = Doc2VecEncoder.load("cache/doc2vec/X.npz")
+    vectors = EmbeddingCache("cache/doc2vec/X-embeddings.npz", encoder).embed(df['clean_doc'])
+"""
+import hashlib
+import io
+import json
+import os
+
+import numpy as np
+import scipy.sparse as sp
+
+from pipeline.export import atomic_write
+
+ENCODER_FORMAT_VERSION = 1
+EMBEDDING_DTYPE = np.float32
+DEFAULT_BATCH_SIZE = 4096
+
+
+def document_key(text):
+    return hashlib.sha256(str(text).encode('utf-8')).hexdigest()
+
+
+class Doc2VecEncoder:
+    """Vocabulario del `Tokenizer` de Keras y matriz de la capa `word_embedding`"""
+
+    def __init__(self, word_index, embeddings, maxlen, num_words=None, oov_token=None,
+                 filters='!"#$%&()*+,-./:;<=>?@[\\]^_`{|}~\t\n', lower=True, split=' '):
+        self.word_index = dict(word_index)
+        self.embeddings = np.ascontiguousarray(embeddings, dtype=EMBEDDING_DTYPE)
+        self.maxlen = int(maxlen)
+        self.num_words = int(num_words) if num_words else None
+        self.oov_token = oov_token
+        self.filters = filters
+        self.lower = bool(lower)
+        self.split = split
+        self._translate = str.maketrans({c: split for c in filters})
+        self._oov_index = self.word_index.get(oov_token) if oov_token is not None else None
+        self._digest = None
+
+    @classmethod
+    def from_keras(cls, tokenizer, encoder, maxlen):
+        """Extraer vocabulario y pesos de un `Tokenizer` y del encoder entrenado"""
+        if tokenizer.char_level:
+            raise ValueError("El tokenizer por caracteres no está soportado")
+        embeddings = encoder.get_layer('word_embedding').get_weights()[0]
+        return cls(
+            tokenizer.word_index, embeddings, maxlen, num_words=tokenizer.num_words,
+            oov_token=tokenizer.oov_token, filters=tokenizer.filters, lower=tokenizer.lower,
+            split=tokenizer.split
+        )
+
+    def config(self):
+        return {
+            'format_version': ENCODER_FORMAT_VERSION,
+            'maxlen': self.maxlen,
+            'num_words': self.num_words,
+            'oov_token': self.oov_token,
+            'filters': self.filters,
+            'lower': self.lower,
+            'split': self.split,
+            'word_index': self.word_index,
+        }
+
+    def _payload(self):
+        buffer = io.BytesIO()
+        np.savez_compressed(
+            buffer, config=np.array(json.dumps(self.config(), ensure_ascii=False)), embeddings=self.embeddings
+        )
+        return buffer.getvalue()
+
+    @property
+    def digest(self):
+        """sha256 del vocabulario y los pesos (identifica al modelo en la caché)"""
+        if self._digest is None:
+            digest = hashlib.sha256(json.dumps(self.config(), sort_keys=True, ensure_ascii=False).encode('utf-8'))
+            digest.update(self.embeddings.tobytes())
+            self._digest = digest.hexdigest()
+        return self._digest
+
+    def save(self, path):
+        atomic_write(path, self._payload(), mode='wb')
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            config = json.loads(str(data['config']))
+            embeddings = data['embeddings']
+        if config.pop('format_version') != ENCODER_FORMAT_VERSION:
+            raise ValueError(f"Versión de encoder no soportada en {path}")
+        word_index = config.pop('word_index')
+        maxlen = config.pop('maxlen')
+        return cls(word_index, embeddings, maxlen, **config)
+
+    def text_to_sequence(self, text):
+        """Índices de los tokens, como `Tokenizer.texts_to_sequences`"""
+        text = str(text)
+        if self.lower:
+            text = text.lower()
+        sequence = []
+        for word in text.translate(self._translate).split(self.split):
+            if not word:
+                continue
+            i = self.word_index.get(word)
+            if i is not None and not (self.num_words and i >= self.num_words):
+                sequence.append(i)
+            elif self._oov_index is not None:
+                sequence.append(self._oov_index)
+        # pad_sequences trunca por el inicio (truncating='pre')
+        return sequence[-self.maxlen:]
+
+    def _encode_batch(self, texts):
+        sequences = [self.text_to_sequence(text) for text in texts]
+        lengths = np.fromiter((len(s) for s in sequences), dtype=np.int64, count=len(sequences))
+        indptr = np.zeros(len(sequences) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+        indices = np.fromiter((i for s in sequences for i in s), dtype=np.int64, count=int(indptr[-1]))
+        counts = sp.csr_matrix(
+            (np.ones(len(indices)), indices, indptr), shape=(len(sequences), len(self.embeddings))
+        )
+        # Σ de las filas de los tokens + relleno (índice 0) hasta maxlen, entre maxlen
+        sums = counts @ self.embeddings.astype(np.float64)
+        sums += np.outer(self.maxlen - lengths, self.embeddings[0])
+        return (sums / self.maxlen).astype(EMBEDDING_DTYPE)
+
+    def encode(self, texts, batch_size=DEFAULT_BATCH_SIZE):
+        """Embeddings (n x dim, float32) de `texts`, por lotes"""
+        texts = list(texts)
+        out = np.empty((len(texts), self.embeddings.shape[1]), dtype=EMBEDDING_DTYPE)
+        for start in range(0, len(texts), batch_size):
+            out[start:start + batch_size] = self._encode_batch(texts[start:start + batch_size])
+        return out
+
+
+class EmbeddingCache:
+    """
+    Embeddings por documento (clave: sha256 del texto) de un encoder. Si el
+    archivo corresponde a otro encoder (otro `digest`) se descarta.
+    """
+
+    def __init__(self, path, encoder):
+        self.path = path
+        self.encoder = encoder
+        self.vectors = {}
+        if path and os.path.exists(path):
+            with np.load(path, allow_pickle=False) as data:
+                if str(data['encoder']) == encoder.digest:
+                    self.vectors = dict(zip(data['keys'].tolist(), data['vectors']))
+        self.report = {'hits': 0, 'encoded': 0}
+
+    def save(self):
+        keys = list(self.vectors)
+        vectors = (
+            np.stack([self.vectors[k] for k in keys]) if keys
+            else np.empty((0, self.encoder.embeddings.shape[1]), dtype=EMBEDDING_DTYPE)
+        )
+        buffer = io.BytesIO()
+        np.savez(buffer, encoder=np.array(self.encoder.digest), keys=np.array(keys, dtype=str), vectors=vectors)
+        atomic_write(self.path, buffer.getvalue(), mode='wb')
+
+    def embed(self, texts, batch_size=DEFAULT_BATCH_SIZE):
+        """Embeddings de `texts`; sólo se codifican (una vez) los documentos sin entrada"""
+        keys = [document_key(text) for text in texts]
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in self.vectors and key not in missing:
+                missing[key] = text
+        if missing:
+            encoded = self.encoder.encode(missing.values(), batch_size=batch_size)
+            self.vectors.update(zip(missing, encoded))
+            if self.path:
+                self.save()
+        self.report = {'hits': len(keys) - len(missing), 'encoded': len(missing)}
+        if not keys:
+            return np.empty((0, self.encoder.embeddings.shape[1]), dtype=EMBEDDING_DTYPE)
+        return np.stack([self.vectors[key] for key in keys])
@@ -0,0 +1,153 @@
+# pipeline/export.py
+"""
+Exportación de figuras de Plotly a los HTML que consume el dashboard.
+
+`fig.write_html(path)` incrusta el bundle completo de Plotly.js (~3.5 MB) en
+cada archivo. Aquí los HTML referencian un único asset versionado en
+`<carpeta de salida>/vendor/` (por defecto `app/static/plots/vendor/`), que el
+navegador descarga una sola vez. Su URL se arma con el prefijo estático
+configurado (`DASHBOARD_STATIC_URL_PREFIX`) y el `baseUrlPath` de Streamlit;
+si la salida está fuera de `app/static`, la referencia es relativa al HTML:
+
+    from pipeline.export import write_figure_html
+    write_figure_html(network_fig, "app/static/plots/platforms/X/network_plot.html")
+
+Para migrar HTML ya generados (desde la carpeta `app/`):
+
+    python -m pipeline.export
+"""
+import os
+import re
+import tempfile
+
+from utils.settings import STATIC_URL_PREFIX
+
+current_script_dir = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.normpath(os.path.join(current_script_dir, os.pardir))
+STATIC_DIR = os.path.join(APP_DIR, "static")
+PLOTS_DIR = os.path.join(STATIC_DIR, "plots")
+
+# Carpeta de los assets compartidos, dentro de la carpeta de salida
+VENDOR_FOLDER = "vendor"
+
+# Bloque <script> con el bundle de Plotly.js que genera `include_plotlyjs=True`
+_EMBEDDED_PLOTLYJS_RE = re.compile(
+    r'<script[^>]*>(?P<bundle>/\*\*\s*\n\* plotly\.js v(?P<version>[\w.\-]+).*?)</script>',
+    re.DOTALL
+)
+
+
+def plotlyjs_filename(version):
+    return f"plotly-{version}.min.js"
+
+
+def atomic_write(path, data, mode='w', encoding='utf-8'):
+    """Escribir en un archivo temporal del mismo directorio y renombrar"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", dir=directory)
+    try:
+        with os.fdopen(fd, mode, encoding=None if 'b' in mode else encoding) as f:
+            f.write(data)
+        # mkstemp crea el archivo con 0600; los artefactos deben ser legibles
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def vendor_dir(output_root=PLOTS_DIR):
+    return os.path.join(output_root, VENDOR_FOLDER)
+
+
+def _base_url_path():
+    """`server.baseUrlPath` de Streamlit ('' si no está configurado o instalado)"""
+    try:
+        from streamlit import config
+    except ImportError:
+        return ""
+    return (config.get_option("server.baseUrlPath") or "").strip("/")
+
+
+def static_url(path, html_path=None):
+    """
+    URL con la que el navegador pide `path`. Dentro de `app/static` se usa el
+    prefijo estático configurado (relativo a la raíz del dashboard, es decir,
+    tras el `baseUrlPath`); fuera, la ruta relativa a `html_path`.
+    """
+    rel_path = os.path.relpath(os.path.abspath(path), STATIC_DIR)
+    if rel_path.split(os.sep)[0] != os.pardir:
+        rel_url = rel_path.replace(os.sep, '/')
+        if STATIC_URL_PREFIX.startswith(('/', 'http://', 'https://')):
+            return f"{STATIC_URL_PREFIX}/{rel_url}"
+        return "/" + "/".join(part for part in (_base_url_path(), STATIC_URL_PREFIX, rel_url) if part)
+    if html_path is None:
+        raise ValueError(f"{path} está fuera de {STATIC_DIR}: se necesita `html_path` para una URL relativa")
+    return os.path.relpath(os.path.abspath(path), os.path.dirname(os.path.abspath(html_path))).replace(os.sep, '/')
+
+
+def ensure_plotlyjs_asset(version=None, source=None, output_root=PLOTS_DIR):
+    """
+    Garantizar que `<output_root>/vendor/plotly-<versión>.min.js` existe y
+    devolver su ruta. Por defecto se usa el bundle de la instalación de plotly.
+    """
+    if version is None:
+        from plotly.offline import get_plotlyjs, get_plotlyjs_version
+        version = get_plotlyjs_version()
+        source = source or get_plotlyjs
+    path = os.path.join(vendor_dir(output_root), plotlyjs_filename(version))
+    if not os.path.exists(path):
+        content = source() if callable(source) else source
+        atomic_write(path, content)
+    return path
+
+
+def write_figure_html(fig, path, shared_plotlyjs=True, output_root=PLOTS_DIR):
+    """
+    Guardar una figura como HTML. Con `shared_plotlyjs` el archivo sólo
+    contiene la figura y un <script src> al bundle compartido de `output_root`.
+    """
+    include_plotlyjs = static_url(ensure_plotlyjs_asset(output_root=output_root), path) if shared_plotlyjs else True
+    html = fig.to_html(include_plotlyjs=include_plotlyjs, full_html=True)
+    atomic_write(path, html)
+    return path
+
+
+def strip_embedded_plotlyjs(html, path, output_root=PLOTS_DIR):
+    """
+    Sustituir el bundle incrustado del HTML guardado en `path` por una
+    referencia al asset compartido de la misma versión (que se crea a partir
+    del propio bundle si falta). Devuelve el HTML sin cambios si no contiene
+    un bundle incrustado.
+    """
+    match = _EMBEDDED_PLOTLYJS_RE.search(html)
+    if match is None:
+        return html
+    asset = ensure_plotlyjs_asset(version=match.group('version'), source=match.group('bundle'), output_root=output_root)
+    url = static_url(asset, path)
+    tag = f'<script charset="utf-8" src="{url}"></script>'
+    return html[:match.start()] + tag + html[match.end():]
+
+
+def dedupe_plot_directory(root=PLOTS_DIR):
+    """Migrar todos los HTML de `root` al bundle compartido; devuelve bytes ahorrados"""
+    saved = 0
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            if not filename.endswith(".html"):
+                continue
+            path = os.path.join(dirpath, filename)
+            with open(path, 'r', encoding='utf-8') as f:
+                html = f.read()
+            new_html = strip_embedded_plotlyjs(html, path, output_root=root)
+            if new_html is not html:
+                atomic_write(path, new_html)
+                saved += len(html.encode('utf-8')) - len(new_html.encode('utf-8'))
+    return saved
+
+
+if __name__ == "__main__":
+    saved_bytes = dedupe_plot_directory()
+    print(f"Bundle de Plotly.js deduplicado: {saved_bytes / 1024 / 1024:.1f} MB liberados en {PLOTS_DIR}")
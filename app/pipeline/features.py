@@ -0,0 +1,192 @@
+# pipeline/features.py
+"""
+Almacén de características por plataforma (etapa `features`).
+
+El notebook guardaba cada vector como lista de Python en una columna del
+DataFrame (`.toarray().tolist()`), lo normalizaba fila por fila y lo volvía a
+convertir en matriz para la similitud. Aquí cada representación vive en una
+sola matriz alineada con `usernames`:
+
+- TF-IDF como matriz dispersa CSR (float32);
+- doc2vec y NMF como arreglos densos contiguos float32.
+
+La normalización se hace en el lugar y la similitud coseno se calcula
+directamente sobre las matrices. Cada etapa registra su tiempo y el pico de
+memoria (tracemalloc):
+
+    store = FeatureStore(platform_df['username'])
+    store.add('tf-idf_vectors', tfidf_features(platform_df['clean_doc']))
+    store.add('doc2vec_tf_embs', doc_embeddings)
+    store.normalize()
+    combined = store.combined_similarity({'tf-idf_vectors': 0.5, 'doc2vec_tf_embs': 0.5})
+    print(format_memory_report(store.report))
+"""
+import io
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.preprocessing import normalize as _normalize_rows
+
+from pipeline.export import atomic_write
+
+FEATURE_DTYPE = np.float32
+
+
+@contextmanager
+def track_stage(report, stage):
+    """Registrar en `report[stage]` la duración y el pico de memoria del bloque"""
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        peak = tracemalloc.get_traced_memory()[1]
+        report[stage] = {
+            'seconds': time.perf_counter() - started,
+            'peak_mb': max(peak - baseline, 0) / 1024 / 1024,
+        }
+        if started_tracing:
+            tracemalloc.stop()
+
+
+def format_memory_report(report):
+    return "\n".join(
+        f"{stage:<28} {values['seconds']:8.2f}s  pico {values['peak_mb']:9.1f} MB"
+        for stage, values in report.items()
+    )
+
+
+def tfidf_features(docs, ngram_range=(1, 2), max_features=3000):
+    """Matriz TF-IDF dispersa (CSR float32), como `create_tf_idf_vectors`"""
+    vectorizer = TfidfVectorizer(ngram_range=ngram_range, max_features=max_features, dtype=FEATURE_DTYPE)
+    return vectorizer.fit_transform(docs).tocsr()
+
+
+class FeatureStore:
+    """Representaciones vectoriales de los usuarios de una plataforma, alineadas por índice"""
+
+    def __init__(self, usernames):
+        self.usernames = np.asarray(usernames, dtype=str)
+        self.features = {}
+        self.normalized = set()
+        self.report = {}
+
+    @classmethod
+    def from_frame(cls, df, columns):
+        """Construir el almacén a partir de columnas de listas (formato del notebook)"""
+        store = cls(df['username'])
+        for column in columns:
+            with track_stage(store.report, f"from_frame:{column}"):
+                store.add(column, np.array(df[column].to_list(), dtype=FEATURE_DTYPE))
+        return store
+
+    def __len__(self):
+        return len(self.usernames)
+
+    def __contains__(self, name):
+        return name in self.features
+
+    def __getitem__(self, name):
+        return self.features[name]
+
+    def add(self, name, matrix):
+        """Registrar una representación (dispersa -> CSR, densa -> float32 contigua)"""
+        if sp.issparse(matrix):
+            matrix = sp.csr_matrix(matrix, dtype=FEATURE_DTYPE)
+        else:
+            matrix = np.ascontiguousarray(matrix, dtype=FEATURE_DTYPE)
+            if matrix.ndim != 2:
+                raise ValueError(f"La representación '{name}' debe ser una matriz 2D")
+        if matrix.shape[0] != len(self):
+            raise ValueError(
+                f"La representación '{name}' tiene {matrix.shape[0]} filas para {len(self)} usuarios"
+            )
+        self.features[name] = matrix
+        self.normalized.discard(name)
+        return matrix
+
+    def normalize(self, names=None):
+        """
+        Normalizar (L2) cada fila en el lugar. Las filas nulas se dejan igual,
+        como `safe_normalize` del notebook.
+        """
+        for name in names or list(self.features):
+            if name in self.normalized:
+                continue
+            with track_stage(self.report, f"normalize:{name}"):
+                _normalize_rows(self.features[name], norm='l2', copy=False)
+            self.normalized.add(name)
+
+    def similarity(self, name):
+        """
+        Similitud coseno entre usuarios (n x n, float32) con la diagonal en 0,
+        equivalente a `create_similarity_matrix`.
+        """
+        with track_stage(self.report, f"similarity:{name}"):
+            matrix = self.features[name]
+            if name not in self.normalized:
+                matrix = _normalize_rows(matrix, norm='l2', copy=True)
+            product = matrix @ matrix.T
+            similarity = product.toarray() if sp.issparse(product) else product
+            similarity = np.ascontiguousarray(similarity, dtype=FEATURE_DTYPE)
+            np.fill_diagonal(similarity, 0)
+        return similarity
+
+    def combined_similarity(self, weights):
+        """Suma ponderada de similitudes, acumulada en una sola matriz (`combine_matrices`)"""
+        combined = np.zeros((len(self), len(self)), dtype=FEATURE_DTYPE)
+        for name, weight in weights.items():
+            similarity = self.similarity(name)
+            with track_stage(self.report, f"combine:{name}"):
+                similarity *= FEATURE_DTYPE(weight)
+                combined += similarity
+            del similarity
+        return combined
+
+    def similarity_frame(self, matrix):
+        """DataFrame indexado por usuario (formato que esperan las funciones del notebook)"""
+        return pd.DataFrame(matrix, index=self.usernames, columns=self.usernames)
+
+    def save(self, path):
+        """Guardar todas las representaciones en un `.npz` (escritura atómica)"""
+        arrays = {'usernames': self.usernames, 'normalized': np.array(sorted(self.normalized), dtype=str)}
+        for i, (name, matrix) in enumerate(self.features.items()):
+            arrays[f'name_{i}'] = np.array(name)
+            if sp.issparse(matrix):
+                arrays[f'csr_{i}_data'] = matrix.data
+                arrays[f'csr_{i}_indices'] = matrix.indices
+                arrays[f'csr_{i}_indptr'] = matrix.indptr
+                arrays[f'csr_{i}_shape'] = np.array(matrix.shape)
+            else:
+                arrays[f'dense_{i}'] = matrix
+        buffer = io.BytesIO()
+        np.savez(buffer, **arrays)
+        atomic_write(path, buffer.getvalue(), mode='wb')
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            store = cls(data['usernames'])
+            i = 0
+            while f'name_{i}' in data.files:
+                name = str(data[f'name_{i}'])
+                if f'dense_{i}' in data.files:
+                    store.add(name, data[f'dense_{i}'])
+                else:
+                    store.add(name, sp.csr_matrix(
+                        (data[f'csr_{i}_data'], data[f'csr_{i}_indices'], data[f'csr_{i}_indptr']),
+                        shape=tuple(data[f'csr_{i}_shape'])
+                    ))
+                i += 1
+            store.normalized = set(data['normalized'].tolist())
+        return store
@@ -0,0 +1,263 @@
+# pipeline/graph.py
+"""
+Construcción de la red de influencia (etapa `graph`).
+
+`create_influence_network` del notebook recorría las n² parejas de usuarios
+con `similarity_matrix.loc[u1, u2]` dos veces (percentil y aristas) y buscaba
+cada nodo con `df[df['username'] == user].iloc[0]`. Aquí el umbral y las
+aristas salen de operaciones sobre la matriz completa y los atributos de una
+tabla indexada por usuario, en una sola pasada. El `nx.DiGraph` resultante es
+idéntico (mismos nodos, aristas, orden, atributos y tipos).
+
+Comparar ambas versiones (desde la carpeta `app/`):
+
+    python -m pipeline.graph [n_usuarios]
+"""
+import time
+from itertools import combinations
+
+import networkx as nx
+import numpy as np
+import pandas as pd
+
+from pipeline.graph_store import GraphData, cluster_weight_matrix, graph_from_networkx
+from pipeline.similarity import blocked_percentile, threshold_adjacency
+
+# Percentil de similitud a partir del cual se crea una arista
+EDGE_PERCENTILE = 90
+
+# Etiqueta numérica de cada candidato (el resto es 0)
+CANDIDATE_LABELS = {
+    'Claudia Sheinbaum': 1,
+    'Jorge Álvarez Máynez': 3,
+}
+
+# Atributo del nodo -> columna de `df`
+NODE_COLUMNS = {
+    'candidate': 'candidate_name',
+    'num_interaction': 'num_interaction',
+    'tf_idf_vector': 'tf-idf_vectors',
+    'doc2vec_vector': 'doc2vec_tf_embs',
+    'topic_vector': 'topic_vectors',
+    'cluster': 'voted_cluster',
+    'cluster_name': 'cluster_name',
+}
+
+
+def node_attribute_table(df, usernames):
+    """
+    Atributos de cada usuario de `usernames` (en ese orden), tomados de la
+    primera fila de `df` con ese usuario, como hacía `.iloc[0]`.
+    """
+    table = df.drop_duplicates('username', keep='first').set_index('username')
+    missing = pd.Index(usernames).difference(table.index)
+    if len(missing):
+        raise KeyError(f"Usuarios sin fila en el DataFrame: {list(missing[:5])}")
+    table = table.loc[usernames]
+
+    # `to_numpy()` conserva los escalares de NumPy que devolvía la fila de pandas
+    columns = {attr: list(table[column].to_numpy()) for attr, column in NODE_COLUMNS.items()}
+    candidates = columns['candidate']
+    rows = []
+    for i in range(len(usernames)):
+        rows.append({
+            'candidate': candidates[i],
+            'candidate_label': CANDIDATE_LABELS.get(candidates[i], 0),
+            'num_interaction': columns['num_interaction'][i],
+            'tf_idf_vector': columns['tf_idf_vector'][i],
+            'doc2vec_vector': columns['doc2vec_vector'][i],
+            'topic_vector': columns['topic_vector'][i],
+            'cluster': columns['cluster'][i],
+            'cluster_name': columns['cluster_name'][i],
+        })
+    return rows
+
+
+def similarity_edges(matrix, percentile=EDGE_PERCENTILE):
+    """
+    Aristas (fila, columna, peso) con peso mayor que el percentil de todos los
+    valores de la matriz, en orden fila por fila.
+    """
+    threshold = np.percentile(matrix, percentile)
+    rows, cols = np.nonzero(matrix > threshold)
+    return rows, cols, matrix[rows, cols]
+
+
+def create_influence_network(df, similarity_matrix, percentile=EDGE_PERCENTILE):
+    """Red dirigida de similitud discursiva (misma salida que la versión del notebook)"""
+    usernames = similarity_matrix.index.tolist()
+    columns = similarity_matrix.columns.tolist()
+    matrix = similarity_matrix.to_numpy()
+
+    G = nx.DiGraph()
+    G.add_nodes_from(zip(usernames, node_attribute_table(df, usernames)))
+
+    rows, cols, weights = similarity_edges(matrix, percentile)
+    G.add_edges_from(
+        (usernames[i], columns[j], {'weight': w})
+        for i, j, w in zip(rows.tolist(), cols.tolist(), weights)
+    )
+    return G
+
+
+def create_sparse_influence_network(df, usernames, adjacency):
+    """
+    Red dirigida a partir de una similitud dispersa (CSR alineada con
+    `usernames`, ver `pipeline.similarity.sparse_similarity`): una arista por
+    cada valor guardado, fila por fila.
+    """
+    usernames = list(usernames)
+    adjacency = adjacency.tocsr()
+    G = nx.DiGraph()
+    G.add_nodes_from(zip(usernames, node_attribute_table(df, usernames)))
+
+    rows = np.repeat(np.arange(len(usernames)), np.diff(adjacency.indptr))
+    G.add_edges_from(
+        (usernames[i], usernames[j], {'weight': w})
+        for i, j, w in zip(rows.tolist(), adjacency.indices.tolist(), adjacency.data)
+    )
+    return G
+
+
+def create_influence_network_memmap(df, usernames, matrix, percentile=EDGE_PERCENTILE, block_size=1024):
+    """
+    `create_influence_network` sobre una similitud combinada mapeada en disco
+    (`pipeline.similarity.combined_similarity_memmap`): el percentil y las
+    aristas se calculan por bloques de filas, sin cargar la matriz completa.
+    """
+    threshold = blocked_percentile(matrix, percentile, block_size)
+    return create_sparse_influence_network(df, usernames, threshold_adjacency(matrix, threshold, block_size))
+
+
+def get_inter_cluster_weights(G):
+    """
+    Pares de clusters y peso total de las aristas entre ellos (en ambos
+    sentidos), como la función del notebook, a partir de `cluster_weight_matrix`.
+    Acepta un `nx.DiGraph` o un `GraphData`.
+    """
+    if not isinstance(G, GraphData):
+        G = graph_from_networkx(G, {node: (0.0, 0.0) for node in G.nodes})
+    names, weights = cluster_weight_matrix(G)
+    between = weights + weights.T
+
+    source, target, source_target_weight = [], [], []
+    for i, j in combinations(range(len(names)), 2):
+        source.append(names[i])
+        target.append(names[j])
+        source_target_weight.append(int(between[i, j]))
+    return source, target, source_target_weight
+
+
+def _create_influence_network_reference(df, similarity_matrix):
+    """Versión original del notebook; sólo se conserva como referencia para `benchmark`"""
+    G = nx.DiGraph()
+    influence_weights = []
+
+    for user in similarity_matrix.index:
+        row = df[df['username'] == user].iloc[0]
+        candidate = row['candidate_name']
+        if candidate == 'Claudia Sheinbaum':
+            candidate_label = 1
+        elif candidate == 'Jorge Álvarez Máynez':
+            candidate_label = 3
+        else:
+            candidate_label = 0
+
+        G.add_node(
+            user,
+            candidate=candidate,
+            candidate_label=candidate_label,
+            num_interaction=row['num_interaction'],
+            tf_idf_vector=row['tf-idf_vectors'],
+            doc2vec_vector=row['doc2vec_tf_embs'],
+            topic_vector=row['topic_vectors'],
+            cluster=row['voted_cluster'],
+            cluster_name=row['cluster_name']
+        )
+
+    for u1 in similarity_matrix.index:
+        for u2 in similarity_matrix.columns:
+            influence_weights.append(similarity_matrix.loc[u1, u2])
+
+    threshold = np.percentile(influence_weights, 90)
+
+    for u1 in similarity_matrix.index:
+        for u2 in similarity_matrix.columns:
+            weight = similarity_matrix.loc[u1, u2]
+            if weight > threshold:
+                G.add_edge(u1, u2, weight=weight)
+
+    return G
+
+
+def graphs_identical(G1, G2):
+    """Mismos nodos y aristas, en el mismo orden, con atributos y tipos iguales"""
+    if list(G1.nodes) != list(G2.nodes) or list(G1.edges) != list(G2.edges):
+        return False
+
+    def same(a, b):
+        if type(a) is not type(b):
+            return False
+        return a == b
+
+    for node in G1.nodes:
+        attrs1, attrs2 = G1.nodes[node], G2.nodes[node]
+        if attrs1.keys() != attrs2.keys() or not all(same(attrs1[k], attrs2[k]) for k in attrs1):
+            return False
+    return all(same(G1.edges[e]['weight'], G2.edges[e]['weight']) for e in G1.edges)
+
+
+def synthetic_platform(n_users, seed=0):
+    """DataFrame y matriz de similitud sintéticos con las columnas del pipeline"""
+    rng = np.random.default_rng(seed)
+    usernames = [f"user_{i}" for i in range(n_users)]
+    vectors = rng.random((n_users, 16))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    similarity = vectors @ vectors.T
+    np.fill_diagonal(similarity, 0)
+    clusters = rng.integers(0, 4, n_users)
+    df = pd.DataFrame({
+        'username': usernames,
+        'candidate_name': rng.choice(['Claudia Sheinbaum', 'Xóchitl Gálvez', 'Jorge Álvarez Máynez'], n_users),
+        'num_interaction': rng.integers(1, 10_000, n_users),
+        'tf-idf_vectors': vectors.tolist(),
+        'doc2vec_tf_embs': vectors[:, :8].tolist(),
+        'topic_vectors': vectors[:, :4].tolist(),
+        'voted_cluster': clusters,
+        'cluster_name': [f"Comunidad {c}" for c in clusters],
+    })
+    return df, pd.DataFrame(similarity, index=usernames, columns=usernames)
+
+
+def benchmark(n_users=300, seed=0):
+    """Tiempo de la versión original y de la vectorizada, y si las redes coinciden"""
+    df, similarity = synthetic_platform(n_users, seed)
+
+    started = time.perf_counter()
+    reference = _create_influence_network_reference(df, similarity)
+    reference_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    G = create_influence_network(df, similarity)
+    seconds = time.perf_counter() - started
+
+    return {
+        'users': n_users,
+        'edges': G.number_of_edges(),
+        'reference_seconds': reference_seconds,
+        'seconds': seconds,
+        'speedup': reference_seconds / seconds if seconds > 0 else float('inf'),
+        'identical': graphs_identical(reference, G),
+    }
+
+
+if __name__ == "__main__":
+    import sys
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    result = benchmark(n)
+    print(
+        f"{result['users']} usuarios, {result['edges']} aristas: "
+        f"original {result['reference_seconds']:.2f}s, vectorizada {result['seconds']:.3f}s "
+        f"(x{result['speedup']:.0f}), idénticas: {result['identical']}"
+    )
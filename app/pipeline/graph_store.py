@@ -0,0 +1,224 @@
+# pipeline/graph_store.py
+"""
+Formato compacto de las redes de plataforma.
+
+En lugar de hornear cada red en un HTML, el pipeline guarda por plataforma un
+`graph.npz` junto a los demás artefactos (`static/plots/platforms/<plataforma>/`)
+con:
+
+- tabla de nodos: usuario, candidato, etiqueta, interacciones, cluster
+- aristas en formato CSR (indptr/indices) con pesos float32
+- coordenadas del layout (float32, n x 2)
+
+El dashboard reconstruye la figura a partir de estos arreglos (ver
+`pipeline.plots.network_figure`), lo que permite filtrar y resaltar sin volver a
+ejecutar el notebook.
+"""
+import io
+
+import numpy as np
+import scipy.sparse as sp
+
+from pipeline.export import atomic_write
+
+GRAPH_FILENAME = "graph.npz"
+GRAPH_FORMAT_VERSION = 1
+
+# Atributos de nodo que se conservan (el resto, como los vectores, no se exporta)
+NODE_ATTRIBUTES = ('candidate', 'candidate_label', 'num_interaction', 'cluster', 'cluster_name')
+
+
+class GraphData:
+    """Red dirigida en arreglos: nodos, aristas CSR y posiciones"""
+
+    def __init__(self, usernames, indptr, indices, weights, pos, node_attrs):
+        self.usernames = np.asarray(usernames, dtype=str)
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self.weights = np.asarray(weights, dtype=np.float32)
+        self.pos = np.asarray(pos, dtype=np.float32).reshape(-1, 2)
+        self.node_attrs = dict(node_attrs)
+        self._index = None
+        self._transpose = None
+
+    @property
+    def num_nodes(self):
+        return len(self.usernames)
+
+    @property
+    def num_edges(self):
+        return len(self.indices)
+
+    @property
+    def index(self):
+        """Diccionario usuario -> posición (se construye una vez)"""
+        if self._index is None:
+            self._index = {name: i for i, name in enumerate(self.usernames.tolist())}
+        return self._index
+
+    def _in_edges(self):
+        """CSR de la red traspuesta (aristas entrantes), calculada una vez"""
+        if self._transpose is None:
+            sources = self.edge_sources()
+            order = np.argsort(self.indices, kind='stable')
+            indptr = np.zeros(self.num_nodes + 1, dtype=np.int64)
+            np.cumsum(np.bincount(self.indices, minlength=self.num_nodes), out=indptr[1:])
+            self._transpose = (indptr, sources[order], self.weights[order])
+        return self._transpose
+
+    def successors(self, i):
+        """Índices y pesos de las aristas salientes del nodo `i`"""
+        start, end = self.indptr[i], self.indptr[i + 1]
+        return self.indices[start:end], self.weights[start:end]
+
+    def predecessors(self, i):
+        """Índices y pesos de las aristas entrantes al nodo `i`"""
+        indptr, indices, weights = self._in_edges()
+        start, end = indptr[i], indptr[i + 1]
+        return indices[start:end], weights[start:end]
+
+    def edge_sources(self):
+        return np.repeat(np.arange(self.num_nodes, dtype=np.int32), np.diff(self.indptr))
+
+    def out_degree(self):
+        return np.diff(self.indptr)
+
+    def in_degree(self):
+        return np.bincount(self.indices, minlength=self.num_nodes)
+
+    def degree(self):
+        """Grado total (entrada + salida), como `nx.DiGraph.degree`"""
+        return self.out_degree() + self.in_degree()
+
+    def subgraph(self, nodes):
+        """Subgrafo inducido por los índices `nodes` (en ese orden)"""
+        nodes = np.asarray(nodes, dtype=np.int64)
+        remap = np.full(self.num_nodes, -1, dtype=np.int64)
+        remap[nodes] = np.arange(len(nodes))
+
+        sources = self.edge_sources()
+        keep = (remap[sources] >= 0) & (remap[self.indices] >= 0)
+        new_src = remap[sources[keep]]
+        new_dst = remap[self.indices[keep]]
+        new_w = self.weights[keep]
+
+        order = np.lexsort((new_dst, new_src))
+        new_src, new_dst, new_w = new_src[order], new_dst[order], new_w[order]
+        indptr = np.zeros(len(nodes) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(new_src, minlength=len(nodes)), out=indptr[1:])
+
+        return GraphData(
+            self.usernames[nodes], indptr, new_dst, new_w, self.pos[nodes],
+            {key: values[nodes] for key, values in self.node_attrs.items()}
+        )
+
+
+def cluster_membership(labels):
+    """Nombres de cluster ordenados y matriz de pertenencia P (n x k, CSR)"""
+    names, codes = np.unique(np.asarray(labels).astype(str), return_inverse=True)
+    P = sp.csr_matrix(
+        (np.ones(len(codes)), (np.arange(len(codes)), codes)), shape=(len(codes), len(names))
+    )
+    return names.tolist(), P
+
+
+def cluster_weight_matrix(graph, attribute='cluster_name'):
+    """
+    Peso total de las aristas entre clusters, `M = Pᵀ A P` (k x k, float64):
+    `M[a, b]` suma las aristas que salen de `a` y llegan a `b`; la diagonal
+    es el peso interno de cada cluster.
+    """
+    names, P = cluster_membership(graph.node_attrs[attribute])
+    A = sp.csr_matrix(
+        (graph.weights.astype(np.float64), graph.indices, graph.indptr),
+        shape=(graph.num_nodes, graph.num_nodes)
+    )
+    return names, (P.T @ A @ P).toarray()
+
+
+def graph_from_networkx(G, layout):
+    """Convertir una red de networkx (y su layout) al formato compacto"""
+    usernames = list(G.nodes())
+    index = {node: i for i, node in enumerate(usernames)}
+
+    sources, targets, weights = [], [], []
+    for u, v, w in G.edges(data='weight', default=1.0):
+        sources.append(index[u])
+        targets.append(index[v])
+        weights.append(w)
+    sources = np.asarray(sources, dtype=np.int64)
+    targets = np.asarray(targets, dtype=np.int32)
+    weights = np.asarray(weights, dtype=np.float32)
+
+    order = np.argsort(sources, kind='stable')
+    indptr = np.zeros(len(usernames) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=len(usernames)), out=indptr[1:])
+
+    node_attrs = {}
+    for key in NODE_ATTRIBUTES:
+        values = [G.nodes[node].get(key) for node in usernames]
+        if any(value is None for value in values):
+            continue
+        node_attrs[key] = np.asarray(values)
+
+    pos = np.array([layout[node] for node in usernames], dtype=np.float32)
+    return GraphData(usernames, indptr, targets[order], weights[order], pos, node_attrs)
+
+
+def to_networkx(graph):
+    """Reconstruir el `nx.DiGraph` (útil para métricas de networkx)"""
+    import networkx as nx
+
+    G = nx.DiGraph()
+    names = graph.usernames.tolist()
+    attr_lists = {key: values.tolist() for key, values in graph.node_attrs.items()}
+    for i, name in enumerate(names):
+        G.add_node(name, **{key: values[i] for key, values in attr_lists.items()})
+    sources = graph.edge_sources()
+    G.add_weighted_edges_from(
+        zip([names[i] for i in sources], [names[j] for j in graph.indices], graph.weights.tolist())
+    )
+    return G
+
+
+def _loadable_array(key, values):
+    """
+    `load_graph_data` usa `allow_pickle=False`: los arreglos de objetos se
+    convierten a cadenas o se rechazan aquí, al escribir, y no en el dashboard.
+    """
+    values = np.asarray(values)
+    if values.dtype != object:
+        return values
+    if all(isinstance(v, str) for v in values.flat):
+        return values.astype(str)
+    raise ValueError(f"El atributo '{key}' es un arreglo de objetos que no se puede guardar sin pickle")
+
+
+def save_graph_data(graph, path):
+    """Guardar la red en `.npz` comprimido (escritura atómica)"""
+    arrays = {
+        'format_version': np.array(GRAPH_FORMAT_VERSION),
+        'usernames': graph.usernames,
+        'indptr': graph.indptr,
+        'indices': graph.indices,
+        'weights': graph.weights,
+        'pos': graph.pos,
+    }
+    for key, values in graph.node_attrs.items():
+        arrays[f'node_{key}'] = _loadable_array(key, values)
+    buffer = io.BytesIO()
+    np.savez_compressed(buffer, **arrays)
+    atomic_write(path, buffer.getvalue(), mode='wb')
+    return path
+
+
+def load_graph_data(path):
+    with np.load(path, allow_pickle=False) as data:
+        if int(data['format_version']) != GRAPH_FORMAT_VERSION:
+            raise ValueError(f"Formato de red no soportado en {path}")
+        node_attrs = {
+            key[len('node_'):]: data[key] for key in data.files if key.startswith('node_')
+        }
+        return GraphData(
+            data['usernames'], data['indptr'], data['indices'], data['weights'], data['pos'], node_attrs
+        )
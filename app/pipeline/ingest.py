@@ -0,0 +1,173 @@
+# pipeline/ingest.py
+"""
+Lectura de `data.csv` por bloques (etapa `ingest`).
+
+El notebook cargaba el CSV completo y hacía tres `groupby` (suma de
+interacciones, moda del candidato y lista de textos) más dos `merge`. Aquí se
+lee en dos pasadas, sólo con las columnas necesarias y tipos compactos:
+
+1. agregados por (plataforma, usuario): interacciones y conteo de candidatos;
+2. textos, únicamente de los `n` usuarios principales de cada plataforma.
+
+La memoria depende del número de usuarios y de los textos seleccionados, no
+del tamaño del archivo. El resultado tiene las mismas filas, orden y columnas
+que `top_users` en el notebook:
+
+    from pipeline.ingest import load_top_users
+    top_users, report = load_top_users('data.csv', n=1000)
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+KEYS = ['platform', 'username']
+DEFAULT_CHUNKSIZE = 250_000
+
+_AGGREGATE_DTYPES = {'platform': 'category', 'candidate_name': 'category', 'username': object}
+
+
+class _Accumulator:
+    """Agregados parciales por bloque, compactados cuando crecen demasiado"""
+
+    def __init__(self, keys):
+        self.keys = keys
+        self.parts = []
+        self.rows = 0
+        self.compacted_rows = 0
+
+    def add(self, frame):
+        self.parts.append(frame)
+        self.rows += len(frame)
+        # Compactar cuando lo pendiente duplica lo ya agregado mantiene el coste amortizado
+        if self.rows > 2 * max(self.compacted_rows, 100_000):
+            self.compact()
+
+    def compact(self):
+        if not self.parts:
+            return pd.DataFrame(columns=self.keys + ['value'])
+        merged = pd.concat(self.parts, ignore_index=True)
+        merged = merged.groupby(self.keys, sort=False, observed=True)['value'].sum().reset_index()
+        self.parts = [merged]
+        self.rows = self.compacted_rows = len(merged)
+        return merged
+
+
+def _as_object(series):
+    """Columna categórica a objeto (las categorías varían entre bloques)"""
+    return series.astype(object) if isinstance(series.dtype, pd.CategoricalDtype) else series
+
+
+def aggregate_users(path, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Primera pasada: interacciones totales y candidato más frecuente por
+    (plataforma, usuario). En empate de la moda gana el nombre menor, como
+    `Series.mode()[0]`.
+    """
+    interactions = _Accumulator(KEYS)
+    candidates = _Accumulator(KEYS + ['candidate_name'])
+    integer_interactions = True
+    rows = 0
+
+    reader = pd.read_csv(
+        path,
+        usecols=KEYS + ['num_interaction', 'candidate_name'],
+        dtype=_AGGREGATE_DTYPES,
+        chunksize=chunksize,
+    )
+    for chunk in reader:
+        rows += len(chunk)
+        integer_interactions &= pd.api.types.is_integer_dtype(chunk['num_interaction'])
+        chunk['platform'] = _as_object(chunk['platform'])
+        chunk['candidate_name'] = _as_object(chunk['candidate_name'])
+
+        sums = chunk.groupby(KEYS, sort=False)['num_interaction'].sum()
+        interactions.add(sums.rename('value').reset_index())
+
+        counts = chunk.groupby(KEYS + ['candidate_name'], sort=False).size()
+        candidates.add(counts.rename('value').reset_index())
+
+    totals = interactions.compact().rename(columns={'value': 'num_interaction'})
+    if integer_interactions:
+        totals['num_interaction'] = totals['num_interaction'].astype(np.int64)
+
+    modes = candidates.compact().sort_values(
+        KEYS + ['value', 'candidate_name'], ascending=[True, True, False, True]
+    ).drop_duplicates(KEYS)[KEYS + ['candidate_name']]
+
+    # Usuarios sin ningún candidato no tienen moda; el notebook fallaba con ellos
+    aggregates = totals.merge(modes, on=KEYS, how='inner')
+    aggregates = aggregates.sort_values(KEYS, kind='stable').reset_index(drop=True)
+    return aggregates, rows
+
+
+def select_top_users(aggregates, n):
+    """Los `n` usuarios con más interacciones de cada plataforma"""
+    ranked = aggregates.sort_values(
+        ['platform', 'num_interaction'], ascending=[True, False], kind='stable'
+    )
+    return ranked.groupby('platform', sort=False).head(n).reset_index(drop=True)
+
+
+def collect_texts(path, top_users, chunksize=DEFAULT_CHUNKSIZE):
+    """Segunda pasada: lista de textos (en orden del archivo) de cada usuario seleccionado"""
+    selected = pd.MultiIndex.from_frame(top_users[KEYS])
+    texts = {key: [] for key in selected}
+
+    reader = pd.read_csv(
+        path, usecols=KEYS + ['text'], dtype={'platform': 'category', 'username': object}, chunksize=chunksize
+    )
+    for chunk in reader:
+        platforms = _as_object(chunk['platform'])
+        mask = pd.MultiIndex.from_arrays([platforms, chunk['username']]).isin(selected)
+        if not mask.any():
+            continue
+        for platform, username, text in zip(platforms[mask], chunk['username'][mask], chunk['text'][mask]):
+            texts[(platform, username)].append(text)
+
+    return [texts[key] for key in selected]
+
+
+def load_top_users(path='data.csv', n=1000, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    `top_users` del notebook (plataforma, usuario, interacciones, candidato y
+    lista de textos) leyendo el CSV por bloques. Devuelve `(top_users, reporte)`.
+    """
+    started = time.perf_counter()
+    aggregates, rows = aggregate_users(path, chunksize=chunksize)
+    aggregated_at = time.perf_counter()
+
+    top_users = select_top_users(aggregates, n)
+    top_users['text'] = collect_texts(path, top_users, chunksize=chunksize)
+    finished = time.perf_counter()
+
+    report = {
+        'rows': rows,
+        'users': len(aggregates),
+        'selected_users': len(top_users),
+        'aggregate_seconds': aggregated_at - started,
+        'texts_seconds': finished - aggregated_at,
+        'seconds': finished - started,
+    }
+    return top_users, report
+
+
+def format_report(report):
+    return (
+        f"{report['rows']:,} filas, {report['users']:,} usuarios -> {report['selected_users']:,} seleccionados "
+        f"en {report['seconds']:.2f}s (agregados {report['aggregate_seconds']:.2f}s, "
+        f"textos {report['texts_seconds']:.2f}s)"
+    )
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Agregar data.csv por usuario y plataforma")
+    parser.add_argument("csv", nargs="?", default="data.csv")
+    parser.add_argument("-n", type=int, default=1000, help="Usuarios por plataforma")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    args = parser.parse_args()
+
+    top_users, report = load_top_users(args.csv, n=args.n, chunksize=args.chunksize)
+    print(format_report(report))
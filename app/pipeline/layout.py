@@ -0,0 +1,186 @@
+# pipeline/layout.py
+"""
+Layout de las redes de plataforma (etapa `layout`).
+
+El notebook llamaba `nx.spring_layout(G, k=0.1)` desde cero para cada red de
+plataforma y para cada ego-red, con posiciones distintas en cada ejecución.
+Aquí el layout se calcula una vez por plataforma y se guarda en su
+`graph.npz` (`GraphData.pos`); las ego-redes (`pipeline.ego.ego_network`) y el
+gráfico de densidad reutilizan esas posiciones.
+
+El algoritmo es el mismo Fruchterman-Reingold de networkx (mismas fuerzas,
+temperatura y criterio de parada), pero:
+
+- parte de la proyección PCA de las representaciones de los usuarios (o de
+  posiciones aleatorias con semilla fija), así que es determinista y usuarios
+  con discurso parecido empiezan cerca;
+- la atracción se calcula sólo sobre las aristas (CSR) y la repulsión por
+  bloques de filas, sin la matriz n x n x 2 de networkx;
+- en redes grandes (`repulsion='grid'`) la repulsión se aproxima con los
+  centroides de una rejilla, O(n · celdas) por iteración.
+
+    from pipeline.layout import layout_graph_file
+    layout_graph_file("app/static/plots/platforms/X/graph.npz", features=doc2vec_matrix)
+"""
+import numpy as np
+import scipy.sparse as sp
+
+from pipeline.graph_store import load_graph_data, save_graph_data
+
+DEFAULT_K = 0.1
+DEFAULT_ITERATIONS = 50
+# A partir de este número de nodos la repulsión se aproxima con la rejilla
+GRID_THRESHOLD = 5000
+GRID_SIZE = 32
+
+
+def initial_positions(num_nodes, features=None, seed=42):
+    """
+    Posiciones iniciales en [0, 1]²: las dos primeras componentes principales
+    de `features` (signo fijado) o, sin ellas, uniformes con semilla fija.
+    """
+    if features is None or num_nodes < 3:
+        return np.random.RandomState(seed).rand(num_nodes, 2)
+    X = features.toarray() if sp.issparse(features) else np.asarray(features, dtype=np.float64)
+    X = X - X.mean(axis=0)
+    U, S, _ = np.linalg.svd(X, full_matrices=False)
+    pos = U[:, :2] * S[:2]
+    if pos.shape[1] < 2:
+        pos = np.hstack([pos, np.zeros((num_nodes, 2 - pos.shape[1]))])
+    # El signo de cada componente de la SVD es arbitrario: se fija para que sea reproducible
+    signs = np.sign(pos[np.argmax(np.abs(pos), axis=0), np.arange(2)])
+    pos *= np.where(signs == 0, 1, signs)
+    span = pos.max(axis=0) - pos.min(axis=0)
+    pos = (pos - pos.min(axis=0)) / np.where(span > 0, span, 1)
+    # Un poco de ruido separa usuarios con la misma representación
+    return pos + np.random.RandomState(seed).rand(num_nodes, 2) * 1e-3
+
+
+def _repulsion_block(points, others, k, mass=None):
+    """
+    Σ_j m_j k² (p_i - q_j) / |p_i - q_j|² para cada fila de `points`, con la
+    distancia acotada en 0.01 como networkx. Se calcula como
+    p_i Σ_j w_ij - (W q)_i, sin el arreglo n x n x 2 de diferencias.
+    """
+    squared = (
+        (points ** 2).sum(axis=1)[:, None] + (others ** 2).sum(axis=1)[None, :]
+        - 2 * points @ others.T
+    )
+    np.clip(squared, 1e-4, None, out=squared)
+    weights = (k * k) / squared
+    if mass is not None:
+        weights *= mass
+    return points * weights.sum(axis=1)[:, None] - weights @ others
+
+
+def _repulsion_exact(pos, k, block_size=1024):
+    force = np.empty_like(pos)
+    for start in range(0, len(pos), block_size):
+        force[start:start + block_size] = _repulsion_block(pos[start:start + block_size], pos, k)
+    return force
+
+
+def _repulsion_grid(pos, k, grid_size=GRID_SIZE, block_size=4096):
+    """Repulsión de los centroides de la rejilla, ponderados por sus nodos"""
+    low = pos.min(axis=0)
+    span = np.maximum(pos.max(axis=0) - low, 1e-9)
+    cells = np.minimum(((pos - low) / span * grid_size).astype(np.int64), grid_size - 1)
+    cell_ids = cells[:, 0] * grid_size + cells[:, 1]
+    mass = np.bincount(cell_ids, minlength=grid_size * grid_size)
+    occupied = np.flatnonzero(mass)
+    centroids = np.stack([
+        np.bincount(cell_ids, weights=pos[:, d], minlength=grid_size * grid_size)[occupied] / mass[occupied]
+        for d in range(2)
+    ], axis=1)
+    mass = mass[occupied].astype(pos.dtype)
+
+    force = np.empty_like(pos)
+    for start in range(0, len(pos), block_size):
+        force[start:start + block_size] = _repulsion_block(pos[start:start + block_size], centroids, k, mass)
+    return force
+
+
+def fruchterman_reingold(adjacency, pos, k=DEFAULT_K, iterations=DEFAULT_ITERATIONS,
+                         threshold=1e-4, repulsion='auto'):
+    """
+    Fruchterman-Reingold sobre una adyacencia dispersa (n x n, pesos como en
+    networkx: la arista i->j atrae a i hacia j). Devuelve posiciones sin escalar.
+    """
+    adjacency = sp.csr_matrix(adjacency, dtype=np.float64)
+    n = adjacency.shape[0]
+    pos = np.array(pos, dtype=np.float64)
+    if n == 0:
+        return pos
+    if k is None:
+        k = np.sqrt(1.0 / n)
+    if repulsion == 'auto':
+        repulsion = 'grid' if n > GRID_THRESHOLD else 'exact'
+    repel = _repulsion_grid if repulsion == 'grid' else _repulsion_exact
+
+    sources = np.repeat(np.arange(n), np.diff(adjacency.indptr))
+    targets = adjacency.indices
+    weights = adjacency.data
+
+    t = max(np.ptp(pos[:, 0]), np.ptp(pos[:, 1])) * 0.1
+    dt = t / (iterations + 1)
+    for _ in range(iterations):
+        displacement = repel(pos, k)
+        # Atracción sólo sobre las aristas existentes
+        delta = pos[sources] - pos[targets]
+        distance = np.clip(np.linalg.norm(delta, axis=1), 0.01, None)
+        pull = delta * (weights * distance / k)[:, None]
+        for d in range(2):
+            displacement[:, d] -= np.bincount(sources, weights=pull[:, d], minlength=n)
+
+        length = np.clip(np.linalg.norm(displacement, axis=1), 0.01, None)
+        delta_pos = displacement * (t / length)[:, None]
+        pos += delta_pos
+        t -= dt
+        if np.linalg.norm(delta_pos) / n < threshold:
+            break
+    return pos
+
+
+def rescale(pos, scale=1.0):
+    """Centrar y escalar a [-scale, scale], como `nx.rescale_layout`"""
+    pos = pos - pos.mean(axis=0)
+    limit = np.abs(pos).max() if len(pos) else 0
+    return pos * (scale / limit) if limit > 0 else pos
+
+
+def graph_adjacency(graph):
+    """Adyacencia CSR de un `GraphData`"""
+    return sp.csr_matrix(
+        (graph.weights, graph.indices, graph.indptr), shape=(graph.num_nodes, graph.num_nodes)
+    )
+
+
+def compute_layout(graph, features=None, k=DEFAULT_K, iterations=DEFAULT_ITERATIONS, seed=42, repulsion='auto'):
+    """Posiciones (n x 2, float32) para un `GraphData`; `features` alineado con sus nodos"""
+    pos = initial_positions(graph.num_nodes, features, seed=seed)
+    pos = fruchterman_reingold(graph_adjacency(graph), pos, k=k, iterations=iterations, repulsion=repulsion)
+    return rescale(pos).astype(np.float32)
+
+
+def spring_positions(G, features=None, k=DEFAULT_K, iterations=DEFAULT_ITERATIONS, seed=42):
+    """Sustituto determinista de `nx.spring_layout(G, k=0.1)`: dict nodo -> (x, y)"""
+    import networkx as nx
+
+    nodes = list(G.nodes)
+    adjacency = nx.to_scipy_sparse_array(G, nodelist=nodes, weight='weight', format='csr')
+    pos = initial_positions(len(nodes), features, seed=seed)
+    pos = rescale(fruchterman_reingold(adjacency, pos, k=k, iterations=iterations))
+    return dict(zip(nodes, pos))
+
+
+def layout_graph_file(path, features=None, force=False, **kwargs):
+    """
+    Calcular y guardar el layout de `graph.npz` si todavía no tiene uno (o si
+    `force`). Devuelve el `GraphData` con sus posiciones.
+    """
+    graph = load_graph_data(path)
+    if not force and graph.num_nodes and np.any(graph.pos):
+        return graph
+    graph.pos = compute_layout(graph, features, **kwargs)
+    save_graph_data(graph, path)
+    return graph
@@ -0,0 +1,419 @@
+# pipeline/plots.py
+"""
+Figuras de Plotly para redes y densidades, construidas a partir de arreglos
+(`GraphData`) con trazas vectorizadas. Las usa tanto el pipeline (exportación a
+HTML) como el dashboard (render en el proceso a partir de `graph.npz`).
+"""
+import numpy as np
+import plotly.graph_objects as go
+from plotly.colors import qualitative, sample_colorscale
+from plotly.subplots import make_subplots
+
+from pipeline.config import PARTY_COLORS
+from pipeline.density import density_surface
+from pipeline.graph_store import graph_from_networkx
+
+NEON_COLORS = [
+    '#00FFFF', '#FF0080', '#00FF41', '#FF4000', '#8000FF', '#FFFF00',
+    '#FF0040', '#40FF00', '#0080FF', '#FF8000', '#80FF00', '#FF00FF'
+]
+
+# A partir de estos nodos o aristas visibles la red se dibuja en modo vista general
+LOD_NODE_THRESHOLD = 1000
+LOD_EDGE_THRESHOLD = 20000
+# Máximo de aristas en la vista general (se conservan las de mayor peso)
+OVERVIEW_MAX_EDGES = 15000
+
+# Orden de los atributos en el texto flotante (el mismo que en la red original)
+HOVER_ATTRIBUTES = ('candidate', 'candidate_label', 'num_interaction', 'cluster', 'cluster_name')
+
+
+def cluster_colors(graph):
+    """Color neón por nombre de cluster (orden alfabético, como en el notebook)"""
+    names = graph.node_attrs.get('cluster_name')
+    if names is None:
+        return {}
+    unique = sorted({str(name) for name in names.tolist()})
+    return {name: NEON_COLORS[i % len(NEON_COLORS)] for i, name in enumerate(unique)}
+
+
+def node_hover_texts(graph, degree):
+    """Texto flotante de cada nodo, construido una sola vez por nodo"""
+    columns = [
+        (key.capitalize(), graph.node_attrs[key].tolist())
+        for key in HOVER_ATTRIBUTES if key in graph.node_attrs
+    ]
+    texts = []
+    for i, name in enumerate(graph.usernames.tolist()):
+        parts = [
+            f"<b>User: {name}</b><br>",
+            f"<span style='color: #00FFFF'>Connections:</span> {degree[i]}<br>",
+        ]
+        for label, values in columns:
+            value = values[i]
+            if len(str(value)) < 100:
+                parts.append(f"<span style='color: #00FFFF'>{label}:</span> {value}<br>")
+        texts.append("".join(parts))
+    return texts
+
+
+def edge_segments(graph, mask=None):
+    """Coordenadas de aristas como segmentos [x0, x1, NaN] en un solo arreglo"""
+    sources = graph.edge_sources()
+    targets = graph.indices
+    if mask is not None:
+        sources, targets = sources[mask], targets[mask]
+    xs = np.empty((len(sources), 3), dtype=np.float32)
+    ys = np.empty((len(sources), 3), dtype=np.float32)
+    xs[:, 0], xs[:, 1], xs[:, 2] = graph.pos[sources, 0], graph.pos[targets, 0], np.nan
+    ys[:, 0], ys[:, 1], ys[:, 2] = graph.pos[sources, 1], graph.pos[targets, 1], np.nan
+    return xs.ravel(), ys.ravel()
+
+
+def decimate_edges(graph, max_edges, mask=None, keep_node=None):
+    """
+    Máscara con las `max_edges` aristas de mayor peso (dentro de `mask`),
+    más todas las del nodo `keep_node` (índice) si se indica.
+    """
+    keep = np.ones(graph.num_edges, dtype=bool) if mask is None else np.asarray(mask, dtype=bool).copy()
+    candidates = np.flatnonzero(keep)
+    if len(candidates) > max_edges:
+        top = candidates[np.argpartition(graph.weights[candidates], -max_edges)[-max_edges:]]
+        keep[:] = False
+        keep[top] = True
+    if keep_node is not None:
+        incident = (graph.edge_sources() == keep_node) | (graph.indices == keep_node)
+        keep |= incident if mask is None else incident & mask
+    return keep
+
+
+def network_figure(graph, title="Network", highlight_node=None, edge_mask=None, detail='auto', colors=None):
+    """
+    Figura de la red (mismo estilo que `plot_network` del notebook).
+    `edge_mask` permite ocultar aristas (p. ej. por umbral de peso) sin
+    reconstruir la red. `colors` (nombre de cluster -> color) fija los colores,
+    p. ej. los de la red completa al dibujar sólo algunas comunidades.
+
+    `detail='overview'` (automático por encima de `LOD_NODE_THRESHOLD` nodos o
+    `LOD_EDGE_THRESHOLD` aristas visibles) dibuja con WebGL (`Scattergl`), sin halos y con sólo las
+    `OVERVIEW_MAX_EDGES` aristas de mayor peso; `'full'` es el dibujo completo.
+    """
+    visible_edges = graph.num_edges if edge_mask is None else int(np.count_nonzero(edge_mask))
+    if detail == 'auto':
+        large = graph.num_nodes > LOD_NODE_THRESHOLD or visible_edges > LOD_EDGE_THRESHOLD
+        detail = 'overview' if large else 'full'
+    overview = detail == 'overview'
+    Scatter = go.Scattergl if overview else go.Scatter
+
+    colors_by_cluster = cluster_colors(graph) if colors is None else colors
+    degree = graph.degree()
+    highlight_index = graph.index.get(str(highlight_node)) if highlight_node is not None else None
+
+    if overview:
+        edge_mask = decimate_edges(graph, OVERVIEW_MAX_EDGES, edge_mask, keep_node=highlight_index)
+    edge_x, edge_y = edge_segments(graph, edge_mask)
+    edge_trace = Scatter(
+        x=edge_x, y=edge_y,
+        line=dict(width=1, color='rgba(100, 100, 255, 0.3)'),
+        hoverinfo='none', mode='lines',
+        showlegend=False
+    )
+
+    cluster_names = graph.node_attrs.get('cluster_name')
+    visible_clusters = set(map(str, cluster_names.tolist())) if cluster_names is not None else set()
+    if cluster_names is not None:
+        node_colors = np.array([colors_by_cluster.get(str(c), '#FFFFFF') for c in cluster_names.tolist()], dtype=object)
+    else:
+        node_colors = np.full(graph.num_nodes, '#FFFFFF', dtype=object)
+
+    node_sizes = 4 + np.log(degree + 1) / np.log(64) * 3
+    halo_sizes = node_sizes * 2.5
+    outer_halo_sizes = node_sizes * 3.5
+    symbols = np.full(graph.num_nodes, 'circle', dtype=object)
+
+    if highlight_index is not None:
+        h = highlight_index
+        node_colors[h] = '#FFD700'
+        halo_sizes[h] = node_sizes[h] * 4
+        outer_halo_sizes[h] = node_sizes[h] * 6
+        node_sizes[h] = node_sizes[h] * 1.8
+        symbols[h] = 'star'
+
+    node_x, node_y = graph.pos[:, 0], graph.pos[:, 1]
+
+    outer_halo_trace = Scatter(
+        x=node_x, y=node_y, mode='markers',
+        hoverinfo='none',
+        marker=dict(color=node_colors, size=outer_halo_sizes, opacity=0.08, line=dict(width=0)),
+        showlegend=False
+    )
+    halo_trace = Scatter(
+        x=node_x, y=node_y, mode='markers',
+        hoverinfo='none',
+        marker=dict(color=node_colors, size=halo_sizes, opacity=0.15, line=dict(width=0)),
+        showlegend=False
+    )
+    node_trace = Scatter(
+        x=node_x, y=node_y,
+        mode='markers',
+        hoverinfo='text',
+        text=node_hover_texts(graph, degree),
+        marker=dict(
+            showscale=False,
+            color=node_colors,
+            size=node_sizes,
+            line=dict(width=0),
+            opacity=0.7,
+            symbol=symbols
+        ),
+        showlegend=False
+    )
+
+    # Leyenda: colores de los clusters
+    legend_traces = [
+        go.Scatter(
+            x=[None], y=[None],
+            mode='markers',
+            marker=dict(size=10, color=color),
+            legendgroup=str(name),
+            showlegend=True,
+            name=f'{name}'
+        )
+        for name, color in colors_by_cluster.items()
+        if cluster_names is None or name in visible_clusters
+    ]
+
+    # En la vista general los halos se omiten: triplican los marcadores
+    traces = [edge_trace, node_trace] if overview else [outer_halo_trace, halo_trace, edge_trace, node_trace]
+    annotations = []
+    if overview:
+        shown = int(np.count_nonzero(edge_mask))
+        annotations.append(dict(
+            text=f"Vista general: {shown:,} de {visible_edges:,} aristas (las de mayor peso)",
+            xref='paper', yref='paper', x=0, y=0, xanchor='left', yanchor='bottom',
+            showarrow=False, font=dict(color='#CCCCCC', size=11, family='Arial')
+        ))
+
+    fig = go.Figure(data=legend_traces + traces,
+                    layout=go.Layout(
+                        title={
+                            'text': f'<span style="color: #000000; font-size: 24px;"><b>{title}</b></span>',
+                            'x': 0.5, 'xanchor': 'center'
+                        },
+                        showlegend=True,
+                        hovermode='closest',
+                        plot_bgcolor='#040238',
+                        paper_bgcolor='rgb(246, 248, 250)',
+                        font=dict(color='#000000', family='Arial Black'),
+                        margin=dict(b=20, l=5, r=5, t=60),
+                        xaxis=dict(showgrid=False, zeroline=False, showticklabels=False, showline=False),
+                        yaxis=dict(showgrid=False, zeroline=False, showticklabels=False, showline=False),
+                        annotations=annotations
+                    ))
+
+    fig.update_layout(
+        hoverlabel=dict(
+            bgcolor="rgba(0, 0, 0, 0.8)",
+            bordercolor="cyan",
+            font_size=12,
+            font_family="Arial"
+        ),
+    )
+    return fig
+
+
+def density_figure(pos, title="Node Density Plot", bandwidth=None, grid_size=100, weights=None):
+    """
+    Figura de densidad de nodos a partir de las coordenadas (n x 2), con
+    pesos opcionales por nodo (p. ej. `num_interaction`)
+    """
+    # KDE gaussiano por binning + FFT sobre una malla regular (ver pipeline.density)
+    xi, yi, zz_log = density_surface(pos, grid_size=grid_size, weights=weights, bw_method=bandwidth)
+
+    density_trace = go.Contour(
+        x=xi, y=yi, z=zz_log,
+        colorscale='Hot',
+        contours=dict(coloring='heatmap', showlabels=False),
+        hoverinfo='skip',
+        showscale=True,
+        colorbar=dict(title='log2(1 + Densidad)')
+    )
+    return go.Figure(data=[density_trace],
+                     layout=go.Layout(
+                         title=f'<b>{title}</b>',
+                         xaxis=dict(showgrid=False, zeroline=False, showticklabels=False),
+                         yaxis=dict(showgrid=False, zeroline=False, showticklabels=False),
+                         margin=dict(b=20, l=5, r=5, t=40)
+                     ))
+
+
+def plot_network(graph, layout, title="Network", highlight_node=None):
+    """Compatibilidad con el notebook: acepta un grafo de networkx y su layout"""
+    return network_figure(graph_from_networkx(graph, layout), title=title, highlight_node=highlight_node)
+
+
+def plot_node_density(graph, layout, title="Node Density Plot", bandwidth=None, grid_size=100, weights=None):
+    """Compatibilidad con el notebook: acepta un grafo de networkx y su layout"""
+    coords = np.array([layout[n] for n in graph.nodes()])
+    return density_figure(coords, title=title, bandwidth=bandwidth, grid_size=grid_size, weights=weights)
+
+
+def plot_arc_diagram(source, target, weights, title):
+    """
+    Diagrama de arcos entre clusters (mismo estilo que el del notebook), p. ej.
+    `plot_arc_diagram(*get_inter_cluster_weights(G), title=...)`.
+    """
+    all_nodes = sorted(set(source) | set(target))
+    node_indices = {name: idx for idx, name in enumerate(all_nodes)}
+    x = list(range(len(all_nodes)))
+    positions = [i / max(len(all_nodes) - 1, 1) for i in x]
+    node_colors = sample_colorscale('Viridis', positions, colortype='rgb') if all_nodes else []
+
+    fig = go.Figure()
+    max_weight = max(weights) if len(weights) and max(weights) > 0 else 1
+    for s, t, w in zip(source, target, weights):
+        if w <= 0:
+            continue
+        x0, x1 = node_indices[s], node_indices[t]
+        fig.add_trace(go.Scatter(
+            x=[x0, (x0 + x1) / 2, x1],
+            y=[0, abs(x1 - x0) * 0.3, 0],
+            mode='lines',
+            line=dict(width=1 + (w / max_weight) * 4, color='LightSkyBlue', shape='spline'),
+            hoverinfo='text',
+            text=f'{s} → {t}<br>Peso: {w:.2f}',
+            showlegend=False
+        ))
+
+    fig.add_trace(go.Scatter(
+        x=x,
+        y=[0] * len(all_nodes),
+        mode='markers',
+        marker=dict(size=22, color=node_colors, line=dict(width=1.5, color='black')),
+        hoverinfo='text',
+        text=all_nodes,
+        showlegend=False
+    ))
+
+    annotations = [
+        dict(x=i, y=-0.3, text=name, showarrow=False, textangle=65,
+             font=dict(size=12), xanchor='center', yanchor='top')
+        for i, name in enumerate(all_nodes)
+    ]
+    fig.update_layout(
+        title=title,
+        title_font_size=20,
+        showlegend=False,
+        plot_bgcolor='white',
+        xaxis=dict(showgrid=False, zeroline=False, showticklabels=False),
+        yaxis=dict(showgrid=False, zeroline=False, showticklabels=False),
+        margin=dict(t=60, b=20, l=20, r=20),
+        height=500,
+        annotations=annotations
+    )
+    return fig
+
+
+def _subplot_grid(num_metrics):
+    if num_metrics <= 2:
+        return 1, num_metrics
+    if num_metrics <= 4:
+        return 2, 2
+    if num_metrics <= 6:
+        return 2, 3
+    return (num_metrics + 2) // 3, 3
+
+
+def metric_bars_figure(df, title, columns=None, decimals=2):
+    """
+    Una gráfica de barras por métrica (usuarios ordenados de mayor a menor),
+    como `plot_cohesion`/`plot_polarization` del notebook. `df` tiene las
+    columnas `platform`, `category`, `username` y las métricas.
+    """
+    if columns is None:
+        columns = [col for col in df.columns if col not in ('platform', 'category', 'username')]
+    rows, cols = _subplot_grid(len(columns))
+    fig = make_subplots(
+        rows=rows, cols=cols,
+        subplot_titles=[f"<b>{col.replace('_', ' ').title()}</b>" for col in columns],
+        vertical_spacing=0.1 if rows > 1 else 0,
+        horizontal_spacing=0.07 if cols > 1 else 0
+    )
+    bar_colors = qualitative.Plotly
+    platforms = df['platform'] if 'platform' in df.columns else ['N/A'] * len(df)
+    df = df.assign(_platform=list(platforms))
+
+    for i, metric in enumerate(columns):
+        row, col = i // cols + 1, i % cols + 1
+        df_sorted = df.sort_values(by=metric, ascending=False)
+        label = metric.replace('_', ' ').title()
+        fig.add_trace(
+            go.Bar(
+                x=df_sorted['username'],
+                y=df_sorted[metric],
+                name=label,
+                marker_color=bar_colors[i % len(bar_colors)],
+                hovertext=[
+                    f"<b>Usuario:</b> {user}<br><b>{label}:</b> {value:.{decimals}f} ({platform})"
+                    for user, value, platform in zip(df_sorted['username'], df_sorted[metric], df_sorted['_platform'])
+                ],
+                hoverinfo='text',
+                textposition='none',
+            ),
+            row=row, col=col
+        )
+        fig.update_xaxes(type='category', tickangle=45, row=row, col=col)
+        fig.update_yaxes(title_text="Value", showgrid=True, gridwidth=0.5, gridcolor='LightGrey', row=row, col=col)
+
+    fig.update_layout(
+        title_text=title,
+        title_x=0.5,
+        height=max(600, 800 * rows),
+        width=max(800, 600 * cols if cols > 1 else 700),
+        showlegend=False,
+        template="plotly_white",
+        font=dict(family="Arial, sans-serif", size=12, color="black"),
+        paper_bgcolor='rgb(246, 248, 250)',
+        plot_bgcolor='rgba(240,240,240,0.95)',
+        margin=dict(l=60, r=60, t=80, b=120)
+    )
+    return fig
+
+
+def plot_cohesion(df, title):
+    return metric_bars_figure(df, title, decimals=2)
+
+
+def plot_polarization(df, title):
+    return metric_bars_figure(df, title, decimals=4)
+
+
+def cluster_analysis_figure(candidate_counts, title, num_users, avg_interactions, top_users):
+    """Pastel de candidatos de una comunidad con sus estadísticas (`plot_cluster_analysis` del notebook)"""
+    pie = go.Pie(
+        labels=candidate_counts.index,
+        values=candidate_counts.values,
+        marker=dict(colors=[PARTY_COLORS.get(name, '#888888') for name in candidate_counts.index],
+                    line=dict(color='#111111', width=1)),
+        textinfo='percent+label',
+        pull=[0.02] * len(candidate_counts),
+        opacity=0.9,
+        domain=dict(x=[0.15, 0.85], y=[0.3, 1.0])
+    )
+    stats_text = (
+        f"Usuarios: {num_users}<br>"
+        f"Prom. Interacciones: {avg_interactions:.2f}<br>"
+        f"Principales usuarios: {', '.join(top_users)}<br>"
+    )
+    layout = go.Layout(
+        title=dict(text=title, x=0.5, xanchor="center", font=dict(size=18)),
+        width=1250,
+        height=750,
+        paper_bgcolor='rgb(246, 248, 250)',
+        plot_bgcolor='#FFFFFF',
+        annotations=[dict(
+            text=stats_text, x=0.5, y=0.1, showarrow=False, font=dict(size=13),
+            align="center", xanchor="center", yanchor="top"
+        )]
+    )
+    return go.Figure(data=[pie], layout=layout)
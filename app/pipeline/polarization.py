@@ -0,0 +1,160 @@
+# pipeline/polarization.py
+"""
+Métricas de polarización de las ego-redes (etapa `polarization`).
+
+El notebook calculaba la entropía con una `pd.Series` por red y el índice E-I
+recorriendo aristas contra un dict, red por red. Aquí cada red se reduce a
+códigos enteros de cluster (`codes`) y a arreglos de aristas, y las métricas
+salen de `np.bincount`:
+
+- `entropia`: entropía (bits) de la distribución de clusters;
+- `indice E-I`: (externas - internas) / total sobre la red no dirigida;
+- `asortatividad`: asortatividad nominal de la partición (la de
+  `nx.attribute_assortativity_coefficient` sobre la red no dirigida);
+- `modularidad`: modularidad de la partición dada (no ponderada, como
+  `nx.community.modularity(..., weight=None)`).
+
+Todas las ego-redes de una plataforma se evalúan en una llamada a partir del
+`GraphData` de la plataforma, sin construir subgrafos de networkx:
+
+    from pipeline.polarization import ego_polarization_metrics
+    polarization_df = ego_polarization_metrics(graph, usernames, platform="X", category="Y")
+"""
+import numpy as np
+import pandas as pd
+
+from pipeline.ego import ego_node_indices
+
+METRIC_COLUMNS = ['entropia', 'indice E-I', 'asortatividad', 'modularidad']
+
+
+def entropy(codes):
+    """Entropía de las etiquetas (mismo épsilon que `calculate_entropy`)"""
+    if len(codes) == 0:
+        return 0.0
+    counts = np.bincount(codes)
+    probabilities = counts[counts > 0] / len(codes)
+    return float(-np.sum(probabilities * np.log2(probabilities + 1e-9)))
+
+
+def undirected_edges(sources, targets, num_nodes):
+    """Aristas únicas (u < v) de la red no dirigida, como `to_undirected()`"""
+    low, high = np.minimum(sources, targets), np.maximum(sources, targets)
+    pairs = np.unique(low.astype(np.int64) * num_nodes + high)
+    return pairs // num_nodes, pairs % num_nodes
+
+
+def e_i_index(codes, low, high):
+    if len(low) == 0:
+        return np.nan
+    external = np.count_nonzero(codes[low] != codes[high])
+    return (2 * external - len(low)) / len(low)
+
+
+def partition_assortativity(codes, low, high, num_codes):
+    """Coeficiente de asortatividad nominal a partir de la matriz de mezcla"""
+    if len(low) == 0:
+        return np.nan
+    # Cada arista no dirigida cuenta en ambos sentidos (self-loops una vez)
+    loops = low == high
+    a = np.concatenate([codes[low], codes[high[~loops]]])
+    b = np.concatenate([codes[high], codes[low[~loops]]])
+    mixing = np.bincount(a * num_codes + b, minlength=num_codes * num_codes).reshape(num_codes, num_codes)
+    mixing = mixing / mixing.sum()
+    expected = (mixing.sum(axis=1) * mixing.sum(axis=0)).sum()
+    if expected == 1:
+        return np.nan
+    return float((np.trace(mixing) - expected) / (1 - expected))
+
+
+def partition_modularity(codes, low, high, num_codes):
+    """Modularidad Q = Σ_c [L_c / m - (d_c / 2m)²] de la red no dirigida"""
+    m = len(low)
+    if m == 0:
+        return np.nan
+    internal = np.bincount(codes[low][codes[low] == codes[high]], minlength=num_codes)
+    degree = np.bincount(codes[low], minlength=num_codes) + np.bincount(codes[high], minlength=num_codes)
+    return float((internal / m - (degree / (2 * m)) ** 2).sum())
+
+
+def partition_metrics(codes, sources, targets):
+    """Métricas de polarización de una red dada por códigos de nodo y aristas dirigidas"""
+    codes = np.asarray(codes, dtype=np.int64)
+    num_nodes = len(codes)
+    low, high = undirected_edges(np.asarray(sources), np.asarray(targets), max(num_nodes, 1))
+    # Códigos compactos 0..k-1 para las matrices k x k
+    _, compact = np.unique(codes, return_inverse=True)
+    num_codes = int(compact.max()) + 1 if num_nodes else 0
+    return {
+        'entropia': entropy(compact),
+        'indice E-I': e_i_index(compact, low, high),
+        'asortatividad': partition_assortativity(compact, low, high, num_codes),
+        'modularidad': partition_modularity(compact, low, high, num_codes),
+    }
+
+
+def cluster_codes(labels):
+    """Nombres de cluster ordenados y código entero de cada nodo"""
+    names, codes = np.unique(np.asarray(labels).astype(str), return_inverse=True)
+    return names.tolist(), codes
+
+
+def _induced_edges(graph, nodes, member):
+    """Aristas entre `nodes` (índices globales), renumeradas 0..len(nodes)-1"""
+    starts, ends = graph.indptr[nodes], graph.indptr[nodes + 1]
+    lengths = ends - starts
+    positions = np.repeat(starts - np.cumsum(np.r_[0, lengths[:-1]]), lengths) + np.arange(lengths.sum())
+    sources = np.repeat(np.arange(len(nodes)), lengths)
+    targets = graph.indices[positions]
+    keep = member[targets] >= 0
+    return sources[keep], member[targets[keep]]
+
+
+def ego_polarization_metrics(graph, usernames=None, attribute='cluster_name', platform=None, category=None):
+    """
+    Métricas de polarización de la ego-red de cada usuario de `usernames`
+    (todos por defecto) sobre el `GraphData` de la plataforma, en un DataFrame
+    con las columnas de `polarization_df`.
+    """
+    _, codes = cluster_codes(graph.node_attrs[attribute])
+    if usernames is None:
+        usernames = graph.usernames.tolist()
+    member = np.full(graph.num_nodes, -1, dtype=np.int64)
+
+    rows = []
+    for username in usernames:
+        nodes = ego_node_indices(graph, graph.index[username])
+        member[nodes] = np.arange(len(nodes))
+        sources, targets = _induced_edges(graph, nodes, member)
+        member[nodes] = -1
+        rows.append({
+            'platform': platform,
+            'category': category,
+            'username': username,
+            **partition_metrics(codes[nodes], sources, targets),
+        })
+    return pd.DataFrame(rows, columns=['platform', 'category', 'username'] + METRIC_COLUMNS)
+
+
+def analyze_polarization_metrics(graph, cluster_name):
+    """Compatibilidad con el notebook para una red de networkx (con las métricas nuevas)"""
+    labels = [graph.nodes[node].get(cluster_name) for node in graph.nodes]
+    if all(label is None for label in labels):
+        return {}
+    index = {node: i for i, node in enumerate(graph.nodes)}
+    edges = np.array([(index[u], index[v]) for u, v in graph.edges], dtype=np.int64).reshape(-1, 2)
+    _, codes = cluster_codes(labels)
+    return partition_metrics(codes, edges[:, 0], edges[:, 1])
+
+
+def batch_polarization_metrics(individual_networks, cluster_name='cluster_name'):
+    """`polarization_df` para el dict anidado `individual_networks` de networkx"""
+    rows = []
+    for platform, category_data in individual_networks.items():
+        for category, networks in category_data.items():
+            for username, network in networks.items():
+                rows.append({
+                    'platform': platform, 'category': category, 'username': username,
+                    **analyze_polarization_metrics(network, cluster_name),
+                })
+    return pd.DataFrame(rows, columns=['platform', 'category', 'username'] + METRIC_COLUMNS)
@@ -0,0 +1,311 @@
+# pipeline/similarity.py
+"""
+Similitud dispersa para plataformas con muchos usuarios (etapa `similarity`).
+
+La similitud combinada del notebook es una matriz densa n x n por cada
+representación, de la que la red sólo conserva el 10% superior. Con las filas
+normalizadas, la combinación ponderada es un producto interno:
+
+    S = sum_f w_f X_f X_f^T = Z Z^T,   con Z = [sqrt(w_f) X_f]
+
+así que basta con calcular, por bloques de filas, las parejas que interesan:
+
+- `k`: los k vecinos más similares de cada usuario;
+- `threshold`: las parejas con similitud mayor que un umbral;
+- ambos: los k mejores entre los que superan el umbral.
+
+El resultado es una matriz dispersa CSR (float32) con la diagonal excluida,
+lista para construir la red (`pipeline.graph.create_sparse_influence_network`).
+La memoria es O(bloque x n) en lugar de O(n²).
+
+Para representaciones densas (doc2vec, tópicos) puede usarse un índice HNSW
+(`method='hnsw'`, requiere `hnswlib`) que propone candidatos; sus puntajes se
+recalculan de forma exacta con todas las representaciones, incluido TF-IDF.
+
+    from pipeline.similarity import sparse_similarity, sampled_threshold
+    from pipeline.graph import create_sparse_influence_network
+    threshold = sampled_threshold(store, weights, percentile=90)
+    adjacency = sparse_similarity(store, weights, k=30, threshold=threshold)
+    G = create_sparse_influence_network(platform_df, store.usernames, adjacency)
+
+Cuando se necesita la matriz combinada completa (misma que `combine_matrices`
+del notebook), se escribe por bloques en un `.npy` float32 mapeado en disco,
+sin materializar las matrices individuales; el percentil y las aristas se
+calculan también por bloques sobre el mapa:
+
+    combined = combined_similarity_memmap(store, weights_per_platform[platform], path)
+    G = create_influence_network_memmap(platform_df, store.usernames, combined)
+"""
+import os
+import tempfile
+
+import numpy as np
+import scipy.sparse as sp
+
+DEFAULT_BLOCK_SIZE = 1024
+SIMILARITY_DTYPE = np.float32
+
+
+def _weighted_features(store, weights):
+    """(matriz normalizada, peso) de cada representación con peso distinto de cero"""
+    names = [name for name, weight in weights.items() if weight]
+    if any(weights[name] < 0 for name in names):
+        raise ValueError("Los pesos de las representaciones deben ser no negativos")
+    store.normalize(names)
+    return [(store[name], SIMILARITY_DTYPE(weights[name])) for name in names]
+
+
+def similarity_block(features, start, stop):
+    """Filas [start, stop) de la similitud combinada (denso, float32)"""
+    n = features[0][0].shape[0]
+    block = np.zeros((stop - start, n), dtype=SIMILARITY_DTYPE)
+    for matrix, weight in features:
+        product = matrix[start:stop] @ matrix.T
+        if sp.issparse(product):
+            product = product.toarray()
+        block += weight * product.astype(SIMILARITY_DTYPE, copy=False)
+    return block
+
+
+def _select(block, start, k, threshold):
+    """Columnas y pesos conservados de cada fila del bloque"""
+    rows = np.arange(block.shape[0])
+    block[rows, rows + start] = -np.inf   # sin aristas de un usuario consigo mismo
+    if threshold is not None:
+        block[block <= threshold] = -np.inf
+
+    if k is not None and k < block.shape[1] - 1:
+        top = np.argpartition(block, -k, axis=1)[:, -k:]
+        top.sort(axis=1)
+        values = np.take_along_axis(block, top, axis=1)
+        keep = np.isfinite(values)
+        counts = keep.sum(axis=1)
+        return counts, top[keep], values[keep]
+
+    keep = np.isfinite(block)
+    cols = np.nonzero(keep)[1]
+    return keep.sum(axis=1), cols, block[keep]
+
+
+def _assemble(n, counts, cols, values):
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.concatenate(counts) if counts else [], out=indptr[1:])
+    indices = np.concatenate(cols).astype(np.int32) if cols else np.zeros(0, dtype=np.int32)
+    data = np.concatenate(values).astype(SIMILARITY_DTYPE) if values else np.zeros(0, dtype=SIMILARITY_DTYPE)
+    return sp.csr_matrix((data, indices, indptr), shape=(n, n))
+
+
+def blocked_similarity(store, weights, k=None, threshold=None, block_size=DEFAULT_BLOCK_SIZE):
+    """
+    Vecinos exactos por bloques de filas. Con `threshold` igual al umbral del
+    notebook se obtienen exactamente sus mismas aristas.
+    """
+    if k is None and threshold is None:
+        raise ValueError("Indica `k`, `threshold` o ambos")
+    features = _weighted_features(store, weights)
+    n = len(store)
+    counts, cols, values = [], [], []
+    for start in range(0, n, block_size):
+        stop = min(start + block_size, n)
+        block_counts, block_cols, block_values = _select(similarity_block(features, start, stop), start, k, threshold)
+        counts.append(block_counts)
+        cols.append(block_cols)
+        values.append(block_values)
+    return _assemble(n, counts, cols, values)
+
+
+def _pair_scores(features, rows, cols, block_size=65536):
+    """Similitud combinada exacta de las parejas (rows[i], cols[i])"""
+    scores = np.zeros(len(rows), dtype=SIMILARITY_DTYPE)
+    for start in range(0, len(rows), block_size):
+        r, c = rows[start:start + block_size], cols[start:start + block_size]
+        for matrix, weight in features:
+            if sp.issparse(matrix):
+                dots = np.asarray(matrix[r].multiply(matrix[c]).sum(axis=1)).ravel()
+            else:
+                dots = np.einsum('ij,ij->i', matrix[r], matrix[c])
+            scores[start:start + block_size] += weight * dots.astype(SIMILARITY_DTYPE, copy=False)
+    return scores
+
+
+def hnsw_similarity(store, weights, k, threshold=None, candidates=None, ef=None, seed=42):
+    """
+    Vecinos aproximados: un índice HNSW sobre las representaciones densas
+    propone `candidates` vecinos por usuario (4k por defecto) y se conservan
+    los k con mayor similitud combinada exacta.
+    """
+    try:
+        import hnswlib
+    except ImportError as e:
+        raise ImportError("method='hnsw' requiere el paquete `hnswlib` (pip install hnswlib)") from e
+
+    features = _weighted_features(store, weights)
+    dense = [(matrix, weight) for matrix, weight in features if not sp.issparse(matrix)]
+    if not dense:
+        raise ValueError("El índice HNSW necesita al menos una representación densa")
+    n = len(store)
+    candidates = min(candidates or 4 * k, n - 1)
+
+    Z = np.hstack([np.sqrt(weight) * matrix for matrix, weight in dense]).astype(np.float32)
+    index = hnswlib.Index(space='ip', dim=Z.shape[1])
+    index.init_index(max_elements=n, ef_construction=200, M=16, random_seed=seed)
+    index.add_items(Z, np.arange(n))
+    index.set_ef(max(ef or 2 * candidates, candidates + 1))
+    labels, _ = index.knn_query(Z, k=candidates + 1)
+
+    rows = np.repeat(np.arange(n), labels.shape[1])
+    cols = labels.ravel().astype(np.int64)
+    not_self = rows != cols
+    rows, cols = rows[not_self], cols[not_self]
+    scores = _pair_scores(features, rows, cols)
+    if threshold is not None:
+        above = scores > threshold
+        rows, cols, scores = rows[above], cols[above], scores[above]
+
+    # k mejores por fila: orden por (fila, -puntaje) y rango dentro de cada fila
+    order = np.lexsort((-scores, rows))
+    rows, cols, scores = rows[order], cols[order], scores[order]
+    row_start = np.searchsorted(rows, rows, side='left')
+    keep = (np.arange(len(rows)) - row_start) < k
+    adjacency = sp.csr_matrix((scores[keep], (rows[keep], cols[keep])), shape=(n, n), dtype=SIMILARITY_DTYPE)
+    adjacency.sort_indices()
+    return adjacency
+
+
+def sparse_similarity(store, weights, k=None, threshold=None, method='blocked', block_size=DEFAULT_BLOCK_SIZE):
+    """
+    Similitud combinada dispersa. `method='hnsw'` (sólo con `k`) usa el
+    índice aproximado si `hnswlib` está instalado; 'auto' lo usa cuando está
+    disponible y hay `k`, y si no recurre al cálculo exacto por bloques.
+    """
+    if method == 'auto':
+        try:
+            import hnswlib  # noqa: F401
+            method = 'hnsw' if k is not None else 'blocked'
+        except ImportError:
+            method = 'blocked'
+    if method == 'hnsw':
+        if k is None:
+            raise ValueError("method='hnsw' requiere `k`")
+        return hnsw_similarity(store, weights, k, threshold=threshold)
+    if method == 'blocked':
+        return blocked_similarity(store, weights, k=k, threshold=threshold, block_size=block_size)
+    raise ValueError(f"Método de similitud desconocido: {method}")
+
+
+def sampled_threshold(store, weights, percentile=90, sample_rows=2000, seed=42):
+    """
+    Estimación del percentil de la similitud combinada (el umbral del
+    notebook) a partir de una muestra de filas, sin construir la matriz n x n.
+    """
+    features = _weighted_features(store, weights)
+    n = len(store)
+    rng = np.random.default_rng(seed)
+    rows = np.sort(rng.choice(n, size=min(sample_rows, n), replace=False))
+    values = []
+    for start in range(0, len(rows), DEFAULT_BLOCK_SIZE):
+        chunk = rows[start:start + DEFAULT_BLOCK_SIZE]
+        block = np.zeros((len(chunk), n), dtype=SIMILARITY_DTYPE)
+        for matrix, weight in features:
+            product = matrix[chunk] @ matrix.T
+            block += weight * (product.toarray() if sp.issparse(product) else product)
+        # La diagonal vale 0 en la matriz del notebook
+        block[np.arange(len(chunk)), chunk] = 0
+        values.append(block.ravel())
+    return float(np.percentile(np.concatenate(values), percentile))
+
+
+def combined_similarity_memmap(store, weights, path, block_size=DEFAULT_BLOCK_SIZE):
+    """
+    Similitud combinada n x n (float32, diagonal en 0) escrita por bloques de
+    filas en `path` (.npy). Devuelve el arreglo mapeado en modo lectura.
+    """
+    features = _weighted_features(store, weights)
+    n = len(store)
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", suffix=".npy", dir=directory)
+    os.close(fd)
+    try:
+        combined = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=SIMILARITY_DTYPE, shape=(n, n))
+        for start in range(0, n, block_size):
+            stop = min(start + block_size, n)
+            block = similarity_block(features, start, stop)
+            block[np.arange(stop - start), np.arange(start, stop)] = 0
+            combined[start:stop] = block
+        combined.flush()
+        del combined
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return np.load(path, mmap_mode='r')
+
+
+def _sortable_keys(values):
+    """Claves uint32 con el mismo orden que los float32 (sin NaN)"""
+    bits = np.ascontiguousarray(values, dtype=np.float32).view(np.uint32)
+    return np.where(bits >> 31, ~bits, bits | np.uint32(0x80000000))
+
+
+def _key_to_float(key):
+    key = np.uint32(key)
+    bits = key & np.uint32(0x7FFFFFFF) if key >> 31 else ~key
+    return np.array([bits], dtype=np.uint32).view(np.float32)[0]
+
+
+def blocked_order_statistics(matrix, ranks, block_size=DEFAULT_BLOCK_SIZE):
+    """
+    Valores de `matrix` en las posiciones `ranks` de su ordenamiento, en dos
+    pasadas por bloques: histograma de los 16 bits altos de la clave y luego
+    de los 16 bajos dentro de los intervalos elegidos. Exacto, memoria O(bloque).
+    """
+    def blocks():
+        for start in range(0, matrix.shape[0], block_size):
+            yield _sortable_keys(matrix[start:start + block_size]).ravel()
+
+    high = np.zeros(1 << 16, dtype=np.int64)
+    for keys in blocks():
+        high += np.bincount(keys >> 16, minlength=1 << 16)
+    high_cumulative = np.cumsum(high)
+    prefixes = [int(np.searchsorted(high_cumulative, rank, side='right')) for rank in ranks]
+
+    wanted = sorted(set(prefixes))
+    low = {prefix: np.zeros(1 << 16, dtype=np.int64) for prefix in wanted}
+    for keys in blocks():
+        for prefix in wanted:
+            selected = keys[(keys >> 16) == prefix]
+            if len(selected):
+                low[prefix] += np.bincount(selected & np.uint32(0xFFFF), minlength=1 << 16)
+
+    values = []
+    for rank, prefix in zip(ranks, prefixes):
+        below = high_cumulative[prefix - 1] if prefix else 0
+        suffix = int(np.searchsorted(np.cumsum(low[prefix]), rank - below, side='right'))
+        values.append(_key_to_float((prefix << 16) | suffix))
+    return values
+
+
+def blocked_percentile(matrix, percentile, block_size=DEFAULT_BLOCK_SIZE):
+    """Percentil (interpolación lineal, como `np.percentile`) calculado por bloques"""
+    position = percentile / 100 * (matrix.size - 1)
+    lower = int(np.floor(position))
+    upper = min(lower + 1, matrix.size - 1)
+    values = blocked_order_statistics(matrix, [lower, upper], block_size)
+    # np.percentile sobre los dos vecinos reproduce su misma interpolación
+    return np.percentile(np.array(values, dtype=matrix.dtype), (position - lower) * 100)
+
+
+def threshold_adjacency(matrix, threshold, block_size=DEFAULT_BLOCK_SIZE):
+    """Valores de `matrix` mayores que `threshold`, por bloques de filas, como CSR"""
+    n = matrix.shape[0]
+    counts, cols, values = [], [], []
+    for start in range(0, n, block_size):
+        block = np.asarray(matrix[start:start + block_size])
+        keep = block > threshold
+        counts.append(keep.sum(axis=1))
+        cols.append(np.nonzero(keep)[1])
+        values.append(block[keep])
+    return _assemble(n, counts, cols, values)
@@ -0,0 +1,641 @@
+# pipeline/stages.py
+"""
+Pipeline del notebook como etapas con nombre y caché en disco.
+
+Etapas: `ingest`, `clean`, `features`, `cluster`, `similarity`, `graph`,
+`ego`, `metrics` y `render`. La salida de cada etapa se guarda en
+`<cache_dir>/<etapa>/<clave>.pkl` y su clave es el hash de:
+
+- la versión de la etapa (`STAGE_VERSIONS`);
+- sus parámetros (los de `pipeline.config` que usa);
+- los digests (sha256 del contenido) de las salidas de las que depende.
+
+Como las claves dependen del contenido y no del momento de ejecución, al
+repetir el pipeline sólo se recalcula lo invalidado:
+
+- cambiar un nombre en `CLUSTER_NAMES` sólo vuelve a dibujar (`render`);
+- cambiar los pesos de similitud recalcula `similarity` y lo posterior, sin
+  repetir limpieza, doc2vec, NMF ni clustering;
+- si cambia `data.csv`, las plataformas cuyos usuarios seleccionados no
+  cambiaron conservan todas sus etapas.
+
+    from pipeline.stages import run_pipeline
+    results, report = run_pipeline("data.csv", jobs=4)
+    print(format_stage_report(report))
+"""
+import hashlib
+import io
+import json
+import logging
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from pipeline import config
+from pipeline.clustering import METRICS, MODELS, get_labels_with_late_fusion
+from pipeline.cohesion import batch_cohesion_metrics
+from pipeline.doc2vec import doc2vec_embeddings
+from pipeline.ego import ego_network
+from pipeline.export import APP_DIR, PLOTS_DIR, atomic_write, write_figure_html
+from pipeline.features import FeatureStore, tfidf_features
+from pipeline.graph import CANDIDATE_LABELS, EDGE_PERCENTILE
+from pipeline.graph_store import GRAPH_FILENAME, GraphData, save_graph_data, to_networkx
+from pipeline.ingest import load_top_users
+from pipeline.layout import compute_layout
+from pipeline.plots import (
+    cluster_analysis_figure, density_figure, network_figure, plot_cohesion, plot_polarization
+)
+from pipeline.polarization import ego_polarization_metrics
+from pipeline.similarity import blocked_percentile, combined_similarity_memmap, threshold_adjacency
+from pipeline.text import clean_top_users
+from pipeline.topics import topic_model
+
+logger = logging.getLogger(__name__)
+
+STAGES = ('ingest', 'clean', 'features', 'cluster', 'similarity', 'graph', 'ego', 'metrics', 'render')
+
+# Subir la versión de una etapa invalida sus resultados guardados (y los posteriores)
+STAGE_VERSIONS = {stage: 1 for stage in STAGES}
+
+DEFAULT_CACHE_DIR = os.path.normpath(os.path.join(APP_DIR, os.pardir, ".pipeline_cache"))
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    return repr(value)
+
+
+def stable_hash(obj):
+    """sha256 de una estructura JSON (claves ordenadas)"""
+    text = json.dumps(obj, sort_keys=True, default=_json_default, ensure_ascii=False)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def value_digest(value):
+    """Digest del contenido de un valor (sha256 de su pickle)"""
+    return hashlib.sha256(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)).hexdigest()
+
+
+class LastOutput:
+    """Valor JSON guardado en `path` (p. ej. los archivos de un render)"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def get(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def set(self, value):
+        atomic_write(self.path, json.dumps(value, ensure_ascii=False, indent=1))
+
+
+class StageCache:
+    """Salidas de las etapas en disco, direccionadas por el hash de sus entradas"""
+
+    def __init__(self, root=DEFAULT_CACHE_DIR):
+        self.root = root
+        self.report = []
+
+    def key(self, stage, params, inputs):
+        return stable_hash({
+            'stage': stage,
+            'version': STAGE_VERSIONS[stage],
+            'params': params or {},
+            'inputs': inputs or {},
+        })
+
+    def paths(self, stage, key):
+        base = os.path.join(self.root, stage, key)
+        return base + ".pkl", base + ".json"
+
+    def workdir(self, name):
+        path = os.path.join(self.root, "work", name)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def last_output(self, name, output_root):
+        """Registro de la última salida de `name` en `output_root`, independiente de la clave"""
+        key = stable_hash({'name': name, 'output_root': os.path.abspath(output_root)})
+        return LastOutput(os.path.join(self.workdir("last"), key + ".json"))
+
+    def _load(self, stage, key):
+        data_path, meta_path = self.paths(stage, key)
+        # El .json se escribe después del .pkl: si existe, la salida está completa
+        if not os.path.exists(meta_path):
+            return None
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(data_path, 'rb') as f:
+                return pickle.load(f), meta
+        except (OSError, ValueError, EOFError, pickle.UnpicklingError) as e:
+            logger.warning("Caché ilegible en %s/%s, se recalcula: %s", stage, key[:12], e)
+            return None
+
+    def run(self, stage, compute, params=None, inputs=None, label=None, validate=None, digest=None):
+        """
+        Salida de la etapa: la guardada si la clave ya existe (y `validate`,
+        si se da, la acepta) o la de `compute()`. Devuelve un dict con
+        `value`, `digest`, `cached` y `seconds`. `digest(value)` sustituye al
+        sha256 del pickle cuando la salida lleva datos que no son contenido
+        (tiempos, memoria) y no deben invalidar las etapas posteriores.
+        """
+        key = self.key(stage, params, inputs)
+        started = time.perf_counter()
+        loaded = self._load(stage, key)
+        if loaded is not None and (validate is None or validate(loaded[0])):
+            value, meta = loaded
+            result = {'value': value, 'digest': meta['digest'], 'cached': True,
+                      'seconds': time.perf_counter() - started}
+        else:
+            value = compute()
+            payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            digest = digest(value) if digest is not None else hashlib.sha256(payload).hexdigest()
+            data_path, meta_path = self.paths(stage, key)
+            atomic_write(data_path, payload, mode='wb')
+            seconds = time.perf_counter() - started
+            atomic_write(meta_path, json.dumps({
+                'stage': stage, 'label': label, 'digest': digest, 'seconds': seconds,
+                'params': params or {}, 'inputs': inputs or {},
+            }, default=_json_default, ensure_ascii=False, indent=1))
+            result = {'value': value, 'digest': digest, 'cached': False, 'seconds': seconds}
+
+        self.report.append({'stage': stage, 'label': label, 'cached': result['cached'], 'seconds': result['seconds']})
+        logger.info("%-10s %-12s %s (%.2fs)", stage, label or '', "caché" if result['cached'] else "calculada",
+                    result['seconds'])
+        return result
+
+
+# --- Etapas ---------------------------------------------------------------
+
+def ingest_stage(data_path, top_n, candidate_fixes):
+    """`top_users` por plataforma, con las correcciones de candidato aplicadas"""
+    top_users, _ = load_top_users(data_path, n=top_n)
+    fixed = top_users['username'].map(candidate_fixes)
+    top_users['candidate_name'] = fixed.where(fixed.notna(), top_users['candidate_name'])
+    return {
+        platform: frame.reset_index(drop=True)
+        for platform, frame in top_users.groupby('platform', sort=True, observed=True)
+    }
+
+
+def clean_stage(df, workers=1):
+    df = df.copy()
+    clean_top_users(df, workers=workers)
+    return df
+
+
+def features_stage(df, tfidf_params, doc2vec_params, topic_params, workers=1, doc2vec_path=None):
+    """
+    TF-IDF, doc2vec y tópicos en un `FeatureStore` normalizado. Con
+    `doc2vec_path` el encoder se entrena una sola vez y se guarda ahí, junto a
+    la caché de embeddings por documento (`<ruta>-embeddings.npz`).
+    """
+    store = FeatureStore(df['username'])
+    store.add('tf-idf_vectors', tfidf_features(df['clean_doc'], **tfidf_params))
+    cache_path = doc2vec_path[:-len(".npz")] + "-embeddings.npz" if doc2vec_path else None
+    store.add('doc2vec_tf_embs', doc2vec_embeddings(df, doc2vec_params, model_path=doc2vec_path, cache_path=cache_path))
+    topic_vectors, topic_labels, topic_report = topic_model(df['clean_doc'], workers=workers, **topic_params)
+    store.add('topic_vectors', topic_vectors)
+    store.normalize()
+    return {'store': store, 'topic_labels': topic_labels, 'topic_report': topic_report}
+
+
+def features_digest(value):
+    """Digest de las matrices y etiquetas de tópicos, sin los reportes de tiempos y memoria"""
+    store = value['store']
+    features = {
+        name: (matrix.data, matrix.indices, matrix.indptr, matrix.shape) if sp.issparse(matrix) else matrix
+        for name, matrix in store.features.items()
+    }
+    return value_digest({
+        'usernames': store.usernames,
+        'features': features,
+        'normalized': sorted(store.normalized),
+        'topic_labels': value['topic_labels'],
+    })
+
+
+def cluster_stage(store, n_iter, results_path=None, workers=1):
+    """Etiquetas de la fusión tardía y peso de cada representación"""
+    views = [
+        store[column].toarray() if sp.issparse(store[column]) else store[column]
+        for column in config.VECTOR_COLUMNS
+    ]
+    labels, info, _ = get_labels_with_late_fusion(
+        views, config.VECTOR_COLUMNS, METRICS, MODELS, n_iter=n_iter, results_path=results_path, workers=workers
+    )
+    return {
+        'labels': np.asarray(labels),
+        'weights': {view: float(weight) for view, weight in info['weights'].items()},
+    }
+
+
+def similarity_stage(store, weights, percentile, workdir):
+    """Aristas (CSR) de la similitud combinada sobre el percentil, sin guardar la matriz n x n"""
+    path = os.path.join(workdir, f"combined-{os.getpid()}.npy")
+    try:
+        combined = combined_similarity_memmap(store, weights, path)
+        adjacency = threshold_adjacency(combined, blocked_percentile(combined, percentile))
+        del combined
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+    return adjacency
+
+
+def graph_stage(df, labels, adjacency, layout_features):
+    """
+    Red compacta con layout. Los nombres de comunidad no forman parte de esta
+    etapa (se aplican al dibujar), así que cambiarlos no recalcula el layout.
+    """
+    candidates = df['candidate_name'].astype(str).to_numpy(dtype=str)
+    node_attrs = {
+        'candidate': candidates,
+        'candidate_label': np.array([CANDIDATE_LABELS.get(c, 0) for c in candidates]),
+        'num_interaction': df['num_interaction'].to_numpy(),
+        'cluster': np.asarray(labels),
+    }
+    n = len(df)
+    graph = GraphData(df['username'], adjacency.indptr, adjacency.indices, adjacency.data,
+                      np.zeros((n, 2)), node_attrs)
+    graph.pos = compute_layout(graph, features=layout_features)
+    return graph
+
+
+def with_cluster_names(graph, cluster_names):
+    """Copia de la red con `cluster_name` a partir de `cluster` y `cluster_names`"""
+    names = np.array([cluster_names.get(int(c), str(c)) for c in graph.node_attrs['cluster'].tolist()])
+    return GraphData(graph.usernames, graph.indptr, graph.indices, graph.weights, graph.pos,
+                     {**graph.node_attrs, 'cluster_name': names})
+
+
+def ego_stage(graph, categories):
+    """Ego-red de cada usuario de cada categoría presente en la red"""
+    return {
+        category: {user: ego_network(graph, user) for user in users if user in graph.index}
+        for category, users in categories.items()
+    }
+
+
+def metrics_stage(platform, graph, egos, cohesion_mode, results_path=None, workers=1):
+    """`cohesion_df` y `polarization_df` de las ego-redes de la plataforma"""
+    networks = {platform: {
+        category: {user: to_networkx(ego) for user, ego in users.items()}
+        for category, users in egos.items()
+    }}
+    cohesion = batch_cohesion_metrics(networks, results_path=results_path, mode=cohesion_mode, workers=workers)
+    polarization = pd.concat([
+        ego_polarization_metrics(graph, list(users), attribute='cluster', platform=platform, category=category)
+        for category, users in egos.items()
+    ], ignore_index=True)
+    return {'cohesion': cohesion, 'polarization': polarization}
+
+
+def _written_files(paths):
+    return {path: file_sha256(path) for path in paths}
+
+
+def _files_unchanged(written):
+    """Los archivos generados siguen en disco y sin modificar"""
+    try:
+        return all(file_sha256(path) == digest for path, digest in written.items())
+    except OSError:
+        return False
+
+
+def remove_stale_files(previous, current):
+    """
+    Borrar los archivos de una ejecución anterior (`{ruta: sha256}`) que ya no
+    se generan, sólo si siguen sin modificar desde que se escribieron.
+    """
+    for path, digest in (previous or {}).items():
+        if path in current or not os.path.exists(path):
+            continue
+        if file_sha256(path) == digest:
+            os.remove(path)
+
+
+def render_platform(platform, graph, cluster_names, output_root):
+    """`graph.npz`, red y densidad de la plataforma en `static/plots/platforms/<plataforma>/`"""
+    graph = with_cluster_names(graph, cluster_names)
+    folder = os.path.join(output_root, "platforms", platform)
+    paths = [os.path.join(folder, GRAPH_FILENAME),
+             os.path.join(folder, "network_plot.html"),
+             os.path.join(folder, "density_plot.html")]
+    save_graph_data(graph, paths[0])
+    write_figure_html(
+        network_figure(graph, title=f"Red de Usuarios de {platform} por similtud discursiva"), paths[1],
+        output_root=output_root
+    )
+    write_figure_html(
+        density_figure(graph.pos, title=f"Plot de densidad de usuarios de {platform} por similtud discursiva"),
+        paths[2], output_root=output_root
+    )
+    return _written_files(paths)
+
+
+def _safe_filename(name):
+    return str(name).replace('/', '-').replace(os.sep, '-')
+
+
+def wordcloud_png(text):
+    """PNG de la nube de palabras (None si `wordcloud` no está instalado)"""
+    try:
+        from wordcloud import WordCloud
+    except ImportError:
+        return None
+    image = WordCloud(width=600, height=400, background_color='white', colormap='viridis').generate(text).to_image()
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def render_clusters(platform, df, graph, cluster_names, output_root, previous=None):
+    """
+    `cluster_<nombre>.html` y `wordcloud_<nombre>.png` de cada comunidad de la
+    plataforma. `previous` son los archivos del render anterior: los que ya no
+    se generan (p. ej. tras renombrar una comunidad) se borran; cualquier otro
+    archivo de la carpeta se conserva.
+    """
+    graph = with_cluster_names(graph, cluster_names)
+    df = df.assign(cluster_name=graph.node_attrs['cluster_name'])
+    folder = os.path.join(output_root, "platforms", platform, "clusters")
+    paths = []
+    for c_name, cluster_df in df.groupby('cluster_name', sort=True):
+        top_users = cluster_df.sort_values(by='num_interaction', ascending=False).head(5)['username'].tolist()
+        fig = cluster_analysis_figure(
+            cluster_df['candidate_name'].value_counts(), f'Análisis de Comunidad: {c_name}',
+            len(cluster_df), cluster_df['num_interaction'].mean(), top_users
+        )
+        path = os.path.join(folder, f"cluster_{_safe_filename(c_name)}.html")
+        write_figure_html(fig, path, output_root=output_root)
+        paths.append(path)
+
+        text = " ".join(cluster_df['clean_doc'].dropna().astype(str))
+        png = wordcloud_png(text) if text.strip() else None
+        if png is None:
+            logger.warning("%s - %s: sin nube de palabras (falta `wordcloud` o no hay texto)", platform, c_name)
+            continue
+        path = os.path.join(folder, f"wordcloud_{_safe_filename(c_name)}.png")
+        atomic_write(path, png, mode='wb')
+        paths.append(path)
+
+    remove_stale_files(previous, set(paths))
+    return _written_files(paths)
+
+
+def render_user(platform, category, username, ego, cluster_names, output_root):
+    """Red y densidad de la ego-red en `static/plots/individual/<categoría>/<usuario (plataforma)>/`"""
+    ego = with_cluster_names(ego, cluster_names)
+    folder = os.path.join(output_root, "individual", category, _safe_filename(f"{username} ({platform})"))
+    paths = [os.path.join(folder, "network.html")]
+    write_figure_html(
+        network_figure(ego, title=f"Red de {username} en {platform}", highlight_node=username), paths[0],
+        output_root=output_root
+    )
+    # El KDE necesita al menos tres puntos no colineales
+    fig = None
+    if ego.num_nodes >= 3:
+        try:
+            fig = density_figure(ego.pos, title=f"Densidad de la red de {username}")
+        except (np.linalg.LinAlgError, ValueError):
+            pass
+    if fig is not None:
+        paths.append(os.path.join(folder, "density.html"))
+        write_figure_html(fig, paths[1], output_root=output_root)
+    return _written_files(paths)
+
+
+def render_metrics(cohesion_df, polarization_df, output_root):
+    """Comparación por categoría de las métricas de cohesión y polarización"""
+    paths = []
+    for folder, df, title, plot in (
+        ("cohesion", cohesion_df, "<b>Comparación de metricas de cohesión para: {}</b>", plot_cohesion),
+        ("polarization", polarization_df, "Comparación de métricas de polarización para: {}", plot_polarization),
+    ):
+        if df.empty:
+            continue
+        df = df.assign(username=df['username'] + ' (' + df['platform'] + ')')
+        for category, category_df in df.groupby('category', sort=True):
+            path = os.path.join(output_root, folder, f"{category}.html")
+            write_figure_html(plot(category_df, title.format(category)), path, output_root=output_root)
+            paths.append(path)
+    return _written_files(paths)
+
+
+# --- Orquestación -----------------------------------------------------------
+
+def run_platform(cache, platform, df, digest, cluster_names=None, categories=None, weights=None,
+                 workers=1, output_root=PLOTS_DIR, render=True):
+    """Etapas de una plataforma a partir de sus `top_users` (digest `digest`)"""
+    stages = {}
+    stages['clean'] = cache.run(
+        'clean', lambda: clean_stage(df, workers), inputs={'users': digest}, label=platform
+    )
+    clean_df = stages['clean']['value']
+
+    # El encoder doc2vec se guarda por plataforma y parámetros: los usuarios nuevos sólo se codifican
+    doc2vec_path = os.path.join(
+        cache.workdir("doc2vec"), f"{platform}-{stable_hash(config.DOC2VEC_PARAMS)[:16]}.npz"
+    )
+    stages['features'] = cache.run(
+        'features',
+        lambda: features_stage(clean_df, config.TFIDF_PARAMS, config.DOC2VEC_PARAMS, config.TOPIC_PARAMS,
+                               workers, doc2vec_path=doc2vec_path),
+        params={'tfidf': config.TFIDF_PARAMS, 'doc2vec': config.DOC2VEC_PARAMS, 'topics': config.TOPIC_PARAMS},
+        inputs={'clean': stages['clean']['digest']}, label=platform, digest=features_digest
+    )
+    store = stages['features']['value']['store']
+
+    stages['cluster'] = cache.run(
+        'cluster',
+        lambda: cluster_stage(
+            store, config.CLUSTER_ITERATIONS,
+            results_path=os.path.join(cache.workdir("clustering"), f"{platform}.jsonl"), workers=workers
+        ),
+        params={'n_iter': config.CLUSTER_ITERATIONS, 'views': config.VECTOR_COLUMNS,
+                'models': MODELS, 'metrics': sorted(METRICS)},
+        inputs={'features': stages['features']['digest']}, label=platform
+    )
+
+    # Pesos de la fusión tardía, salvo que se indiquen otros para la plataforma
+    similarity_weights = (weights or {}).get(platform) or stages['cluster']['value']['weights']
+    stages['similarity'] = cache.run(
+        'similarity',
+        lambda: similarity_stage(store, similarity_weights, EDGE_PERCENTILE, cache.workdir("similarity")),
+        params={'weights': similarity_weights, 'percentile': EDGE_PERCENTILE},
+        inputs={'features': stages['features']['digest']}, label=platform
+    )
+
+    stages['graph'] = cache.run(
+        'graph',
+        lambda: graph_stage(clean_df, stages['cluster']['value']['labels'], stages['similarity']['value'],
+                            store['doc2vec_tf_embs']),
+        inputs={'clean': stages['clean']['digest'], 'cluster': stages['cluster']['digest'],
+                'similarity': stages['similarity']['digest'], 'features': stages['features']['digest']},
+        label=platform
+    )
+    graph = stages['graph']['value']
+
+    categories = config.CATEGORIES if categories is None else categories
+    stages['ego'] = cache.run(
+        'ego', lambda: ego_stage(graph, categories),
+        params={'categories': categories}, inputs={'graph': stages['graph']['digest']}, label=platform
+    )
+
+    stages['metrics'] = cache.run(
+        'metrics',
+        lambda: metrics_stage(
+            platform, graph, stages['ego']['value'], config.COHESION_MODE,
+            results_path=os.path.join(cache.workdir("cohesion"), f"{platform}.jsonl"), workers=workers
+        ),
+        params={'cohesion_mode': config.COHESION_MODE},
+        inputs={'graph': stages['graph']['digest'], 'ego': stages['ego']['digest']}, label=platform
+    )
+
+    if render:
+        names = (cluster_names or config.CLUSTER_NAMES).get(platform, {})
+        stages['render'] = cache.run(
+            'render', lambda: render_platform(platform, graph, names, output_root),
+            params={'cluster_names': names, 'output_root': os.path.abspath(output_root)},
+            inputs={'graph': stages['graph']['digest']}, label=platform, validate=_files_unchanged
+        )
+        # Archivos del último render de comunidades en esta salida, con cualquier nombre de comunidad
+        last_render = cache.last_output(f"{platform}/clusters", output_root)
+        stages['render_clusters'] = cache.run(
+            'render', lambda: render_clusters(platform, clean_df, graph, names, output_root, last_render.get()),
+            params={'cluster_names': names, 'output_root': os.path.abspath(output_root)},
+            inputs={'clean': stages['clean']['digest'], 'graph': stages['graph']['digest']},
+            label=f"{platform} (comunidades)", validate=_files_unchanged
+        )
+        last_render.set(stages['render_clusters']['value'])
+    return stages
+
+
+def _platform_task(args):
+    cache_dir, platform, df, digest, options = args
+    cache = StageCache(cache_dir)
+    stages = run_platform(cache, platform, df, digest, **options)
+    return platform, stages, cache.report
+
+
+def user_render_tasks(platform, stages, cluster_names=None):
+    """(plataforma, categoría, usuario, ego-red, nombres de comunidad, digest de `ego`) por usuario"""
+    names = (cluster_names or config.CLUSTER_NAMES).get(platform, {})
+    for category, users in stages['ego']['value'].items():
+        for username, ego in users.items():
+            yield platform, category, username, ego, names, stages['ego']['digest']
+
+
+def _user_task(args):
+    cache_dir, output_root, (platform, category, username, ego, names, ego_digest) = args
+    cache = StageCache(cache_dir)
+    cache.run(
+        'render', lambda: render_user(platform, category, username, ego, names, output_root),
+        params={'platform': platform, 'category': category, 'username': username,
+                'cluster_names': names, 'output_root': os.path.abspath(output_root)},
+        inputs={'ego': ego_digest}, label=f"{username} ({platform})", validate=_files_unchanged
+    )
+    return cache.report
+
+
+def run_pipeline(data_path, cache_dir=DEFAULT_CACHE_DIR, output_root=PLOTS_DIR, platforms=None,
+                 cluster_names=None, categories=None, weights=None, top_n=config.TOP_USERS,
+                 jobs=1, workers=1, render=True):
+    """
+    Ejecutar (o reutilizar) todas las etapas. Con `jobs > 1` las plataformas y
+    las páginas por usuario se procesan en un pool de procesos; `workers` son
+    los procesos de cada plataforma en limpieza, tópicos, clustering y
+    cohesión. `weights` permite fijar los pesos de similitud por plataforma en
+    lugar de los de la fusión tardía. Devuelve `(etapas por plataforma,
+    reporte de etapas)`.
+    """
+    cache = StageCache(cache_dir)
+    ingest = cache.run(
+        'ingest', lambda: ingest_stage(data_path, top_n, config.CANDIDATE_FIXES),
+        params={'top_n': top_n, 'candidate_fixes': config.CANDIDATE_FIXES},
+        inputs={'data': file_sha256(data_path)}
+    )
+
+    options = {'cluster_names': cluster_names, 'categories': categories, 'weights': weights,
+               'workers': workers, 'output_root': output_root, 'render': render}
+    # Cada plataforma se direcciona por su propio contenido, no por el del CSV completo
+    tasks = [
+        (cache_dir, platform, df, value_digest(df), options)
+        for platform, df in ingest['value'].items()
+        if not platforms or platform in platforms
+    ]
+
+    results = {}
+    pool = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else None
+    try:
+        run = pool.map if pool else map
+        for platform, stages, report in run(_platform_task, tasks):
+            results[platform] = stages
+            cache.report.extend(report)
+
+        if render and results:
+            user_tasks = [
+                (cache_dir, output_root, task)
+                for platform, stages in results.items()
+                for task in user_render_tasks(platform, stages, cluster_names)
+            ]
+            for report in run(_user_task, user_tasks):
+                cache.report.extend(report)
+    finally:
+        if pool:
+            pool.shutdown()
+
+    if render and results:
+        metrics = [stages['metrics'] for stages in results.values()]
+        cache.run(
+            'render',
+            lambda: render_metrics(
+                pd.concat([m['value']['cohesion'] for m in metrics], ignore_index=True),
+                pd.concat([m['value']['polarization'] for m in metrics], ignore_index=True),
+                output_root
+            ),
+            params={'output_root': os.path.abspath(output_root)},
+            inputs={'metrics': sorted(m['digest'] for m in metrics)}, label='métricas',
+            validate=_files_unchanged
+        )
+    return results, cache.report
+
+
+def format_stage_report(report):
+    """
+    Resumen por etapa: ejecuciones, cuántas vinieron de la caché y segundos
+    (sumados entre procesos cuando las plataformas corren en paralelo).
+    """
+    lines = []
+    for stage in STAGES:
+        entries = [entry for entry in report if entry['stage'] == stage]
+        if not entries:
+            continue
+        cached = sum(entry['cached'] for entry in entries)
+        seconds = sum(entry['seconds'] for entry in entries)
+        lines.append(f"{stage:<10} {len(entries):>5} ejecuciones, {cached:>5} en caché, {seconds:9.2f}s")
+    return "\n".join(lines)
@@ -0,0 +1,169 @@
+# pipeline/text.py
+"""
+Limpieza de textos del pipeline (etapa `clean`).
+
+Reemplaza a `clean_text` del notebook, que reconstruía
+`set(stopwords.words('spanish'))` en cada publicación. Aquí las stopwords se
+cargan una sola vez como `frozenset`, la expresión regular está compilada y
+los textos se limpian por lotes (opcionalmente en varios procesos):
+
+    from pipeline.text import clean_top_users
+    report = clean_top_users(top_users, workers=4)
+
+La salida es idéntica a la del notebook: `clean_text` usa las stopwords de NLTK
+sin los términos extra, porque la versión original sombreaba el conjunto
+extendido con una variable local. Para usar el conjunto extendido se pasa
+`stop_words=extended_stopwords()`.
+
+Medir el rendimiento sobre un CSV (desde la carpeta `app/`):
+
+    python -m pipeline.text data.csv [--workers 4] [--extended]
+"""
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+# Términos específicos del contexto que se añaden a las stopwords de NLTK
+EXTRA_STOPWORDS = frozenset([
+    'rt', 'https', 'creativecommonsorglicensesby40', 'http', 'creative',
+    'atribución', 'commons', 'licencia', '_', '40', 'com', '__',
+    'httpscreativecommonsorglicensesby40', 'httpaudionautixcom'
+])
+
+_PUNCTUATION_RE = re.compile(r'[^\w\s]')
+
+# Separador de textos dentro de un lote: es espacio en blanco para `\s` y
+# `str.split`, por lo que sobrevive a la limpieza y no altera los tokens
+_BATCH_SEPARATOR = '\x1e'
+
+
+@lru_cache(maxsize=None)
+def base_stopwords():
+    """Stopwords en español de NLTK (se descargan la primera vez si faltan)"""
+    import nltk
+    from nltk.corpus import stopwords
+
+    try:
+        words = stopwords.words('spanish')
+    except LookupError:
+        nltk.download('stopwords', quiet=True)
+        words = stopwords.words('spanish')
+    return frozenset(words)
+
+
+@lru_cache(maxsize=None)
+def extended_stopwords():
+    """Stopwords de NLTK más los términos extra del contexto"""
+    return base_stopwords() | EXTRA_STOPWORDS
+
+
+def clean_text(text, stop_words=None):
+    """Minúsculas, sin puntuación y sin stopwords (igual que en el notebook)"""
+    if stop_words is None:
+        stop_words = base_stopwords()
+    tokens = _PUNCTUATION_RE.sub('', text.lower()).split()
+    return ' '.join([w for w in tokens if w not in stop_words])
+
+
+def clean_texts(texts, stop_words=None):
+    """
+    Limpiar una lista de textos. `lower` y la expresión regular se aplican una
+    sola vez sobre el lote completo; luego se separa y se filtra cada texto.
+    """
+    if stop_words is None:
+        stop_words = base_stopwords()
+    texts = [str(text) for text in texts]
+    if not texts:
+        return []
+    joined = _BATCH_SEPARATOR.join(texts)
+    # Si algún texto ya contiene el separador, se limpia uno por uno
+    if joined.count(_BATCH_SEPARATOR) != len(texts) - 1:
+        return [clean_text(text, stop_words) for text in texts]
+
+    cleaned = _PUNCTUATION_RE.sub('', joined.lower()).split(_BATCH_SEPARATOR)
+    return [' '.join([w for w in part.split() if w not in stop_words]) for part in cleaned]
+
+
+def _clean_chunk(args):
+    """Limpiar un bloque de usuarios (se ejecuta en un proceso del pool)"""
+    text_lists, stop_words = args
+    return [clean_texts(texts, stop_words) for texts in text_lists]
+
+
+def clean_text_lists(text_lists, stop_words=None, workers=1, chunk_size=256):
+    """
+    Limpiar las listas de textos de cada usuario. Con `workers > 1` los
+    usuarios se reparten en bloques de `chunk_size` entre procesos; el orden
+    de salida es el de entrada.
+
+    Devuelve `(listas_limpias, reporte)`, donde el reporte incluye textos,
+    caracteres y textos por segundo.
+    """
+    if stop_words is None:
+        stop_words = base_stopwords()
+    text_lists = [list(texts) for texts in text_lists]
+
+    started = time.perf_counter()
+    if workers > 1 and len(text_lists) > chunk_size:
+        chunks = [
+            (text_lists[i:i + chunk_size], stop_words)
+            for i in range(0, len(text_lists), chunk_size)
+        ]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            cleaned = [texts for chunk in pool.map(_clean_chunk, chunks) for texts in chunk]
+    else:
+        cleaned = _clean_chunk((text_lists, stop_words))
+    elapsed = time.perf_counter() - started
+
+    num_texts = sum(len(texts) for texts in text_lists)
+    num_chars = sum(len(str(text)) for texts in text_lists for text in texts)
+    report = {
+        'users': len(text_lists),
+        'texts': num_texts,
+        'chars': num_chars,
+        'seconds': elapsed,
+        'texts_per_second': num_texts / elapsed if elapsed > 0 else float('inf'),
+        'mb_per_second': num_chars / 1024 / 1024 / elapsed if elapsed > 0 else float('inf'),
+        'workers': workers,
+    }
+    return cleaned, report
+
+
+def clean_top_users(top_users, stop_words=None, workers=1, chunk_size=256):
+    """
+    Añadir a `top_users` las columnas `clean_text`, `doc` y `clean_doc`
+    (las mismas que generaba el notebook) y devolver el reporte de rendimiento.
+    """
+    cleaned, report = clean_text_lists(
+        top_users['text'], stop_words=stop_words, workers=workers, chunk_size=chunk_size
+    )
+    top_users['clean_text'] = cleaned
+    top_users['doc'] = [' '.join(map(str, texts)) for texts in top_users['text']]
+    top_users['clean_doc'] = [' '.join(texts) for texts in cleaned]
+    return report
+
+
+def format_report(report):
+    return (
+        f"{report['texts']:,} textos de {report['users']:,} usuarios en {report['seconds']:.2f}s "
+        f"({report['texts_per_second']:,.0f} textos/s, {report['mb_per_second']:.1f} MB/s, "
+        f"{report['workers']} proceso(s))"
+    )
+
+
+if __name__ == "__main__":
+    import argparse
+
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description="Medir la limpieza de textos sobre un CSV")
+    parser.add_argument("csv", help="CSV con columnas 'username' y 'text'")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--extended", action="store_true", help="Usar las stopwords extendidas")
+    args = parser.parse_args()
+
+    data = pd.read_csv(args.csv, usecols=['username', 'text'])
+    users = data.groupby('username')['text'].apply(list).reset_index()
+    stop_words = extended_stopwords() if args.extended else base_stopwords()
+    print(format_report(clean_top_users(users, stop_words=stop_words, workers=args.workers)))
@@ -0,0 +1,197 @@
+# pipeline/topics.py
+"""
+Modelado de temas con NMF (etapa `features`, vectores de tópicos).
+
+El notebook ajustaba 14 modelos NMF independientes (2..15 temas) para elegir
+el número de temas y luego volvía a vectorizar el corpus y a ajustar el
+modelo ganador. Aquí:
+
+- el corpus se vectoriza una sola vez (`CountVectorizer`, igual que antes);
+- el barrido puede hacerse con arranque en caliente (`strategy='warm'`): el
+  modelo de k+1 temas parte de W/H del de k temas más la componente k-ésima
+  de NNDSVD, o con ajustes independientes en paralelo (`'independent'`,
+  idénticos a los del notebook);
+- el barrido se detiene cuando la curva de error se aplana (mejora relativa
+  menor que `tol` durante `patience` pasos); con `tol=None` se recorre el
+  rango completo y se elige el mínimo, como `find_best_num_topics`;
+- el modelo ganador se reutiliza, sin volver a ajustarlo.
+
+    from pipeline.topics import topic_model
+    topic_vectors, topic_labels, report = topic_model(platform_df['clean_doc'])
+"""
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from sklearn.decomposition import NMF
+from sklearn.feature_extraction.text import CountVectorizer
+from sklearn.utils.extmath import randomized_svd
+
+DEFAULT_TOPIC_RANGE = range(2, 16)
+TOP_WORDS = 10
+
+
+def nndsvd_components(X, n_components, random_state=42):
+    """
+    Inicialización NNDSVD de rango `n_components` (misma fórmula que la de
+    scikit-learn). Cada componente sólo depende de su tripleta singular, así
+    que una sola SVD sirve para todos los k del barrido.
+    """
+    U, S, V = randomized_svd(X, n_components, random_state=random_state)
+    W = np.zeros_like(U)
+    H = np.zeros_like(V)
+
+    # La tripleta singular principal es no negativa y se usa tal cual
+    W[:, 0] = np.sqrt(S[0]) * np.abs(U[:, 0])
+    H[0, :] = np.sqrt(S[0]) * np.abs(V[0, :])
+
+    for j in range(1, n_components):
+        x, y = U[:, j], V[j, :]
+        x_p, y_p = np.maximum(x, 0), np.maximum(y, 0)
+        x_n, y_n = np.abs(np.minimum(x, 0)), np.abs(np.minimum(y, 0))
+        x_p_nrm, y_p_nrm = np.linalg.norm(x_p), np.linalg.norm(y_p)
+        x_n_nrm, y_n_nrm = np.linalg.norm(x_n), np.linalg.norm(y_n)
+        m_p, m_n = x_p_nrm * y_p_nrm, x_n_nrm * y_n_nrm
+        if m_p > m_n:
+            u, v, sigma = x_p / x_p_nrm, y_p / y_p_nrm, m_p
+        else:
+            u, v, sigma = x_n / x_n_nrm, y_n / y_n_nrm, m_n
+        lbd = np.sqrt(S[j] * sigma)
+        W[:, j] = lbd * u
+        H[j, :] = lbd * v
+
+    eps = 1e-6
+    W[W < eps] = 0
+    H[H < eps] = 0
+    return W, H
+
+
+def _fit_nmf(X, n_topics, max_iter, random_state, W=None, H=None):
+    """Ajustar NMF (NNDSVD o inicialización dada) y devolver (W, modelo)"""
+    init = 'custom' if W is not None else 'nndsvd'
+    model = NMF(n_components=n_topics, init=init, random_state=random_state, max_iter=max_iter)
+    W_fit = model.fit_transform(X, W=W, H=H) if W is not None else model.fit_transform(X)
+    return W_fit, model
+
+
+def _fit_independent(args):
+    X, n_topics, max_iter, random_state = args
+    started = time.perf_counter()
+    W, model = _fit_nmf(X, n_topics, max_iter, random_state)
+    return n_topics, W, model, time.perf_counter() - started
+
+
+def _is_flat(errors, tol, patience):
+    """Las últimas `patience` mejoras relativas fueron menores que `tol`"""
+    if tol is None or len(errors) <= patience:
+        return False
+    recent = errors[-(patience + 1):]
+    return all((prev - cur) / prev < tol for prev, cur in zip(recent, recent[1:]) if prev > 0)
+
+
+def _choose_k(ks, errors, tol, patience):
+    """
+    Número de temas elegido: el último antes de la primera meseta (los temas
+    añadidos en ella apenas mejoraron) o, si no la hay, el de menor error.
+    """
+    for end in range(patience + 1, len(errors) + 1):
+        if _is_flat(errors[:end], tol, patience):
+            return ks[end - patience - 1]
+    return ks[int(np.argmin(errors))]
+
+
+def topic_sweep(X, topic_range=DEFAULT_TOPIC_RANGE, strategy='warm', tol=0.01, patience=2,
+                workers=1, max_iter=200, random_state=42):
+    """
+    Barrer números de temas sobre la matriz término-documento `X`. Devuelve
+    un dict con los errores por k, el k elegido, su W y su modelo ajustado.
+    """
+    ks_all = list(topic_range)
+    ks, errors, seconds = [], [], {}
+    fitted = {}
+    started = time.perf_counter()
+
+    if strategy == 'warm':
+        init_W, init_H = nndsvd_components(X, ks_all[-1], random_state=random_state)
+        W = H = None
+        for k in ks_all:
+            k_started = time.perf_counter()
+            if W is None:
+                W, model = _fit_nmf(X, k, max_iter, random_state)
+            else:
+                # Se añaden las componentes k-ésimas de NNDSVD a la solución anterior
+                previous = W.shape[1]
+                W0 = np.hstack([W, init_W[:, previous:k]])
+                H0 = np.vstack([H, init_H[previous:k]])
+                W, model = _fit_nmf(X, k, max_iter, random_state, W=W0, H=H0)
+            H = model.components_
+            ks.append(k)
+            errors.append(model.reconstruction_err_)
+            seconds[k] = time.perf_counter() - k_started
+            fitted[k] = (W, model)
+            if _is_flat(errors, tol, patience):
+                break
+    elif strategy == 'independent':
+        # Lotes del tamaño del pool, en orden creciente, para poder parar antes
+        pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+        try:
+            batch_size = max(workers, 1)
+            for i in range(0, len(ks_all), batch_size):
+                batch = [(X, k, max_iter, random_state) for k in ks_all[i:i + batch_size]]
+                results = pool.map(_fit_independent, batch) if pool else map(_fit_independent, batch)
+                for k, W, model, elapsed in results:
+                    ks.append(k)
+                    errors.append(model.reconstruction_err_)
+                    seconds[k] = elapsed
+                    fitted[k] = (W, model)
+                if _is_flat(errors, tol, patience):
+                    break
+        finally:
+            if pool:
+                pool.shutdown()
+    else:
+        raise ValueError(f"Estrategia de barrido desconocida: {strategy}")
+
+    # Si la meseta apareció a mitad de un lote, se elige según el primer punto en que se detectó
+    best_k = _choose_k(ks, errors, tol, patience)
+    W, model = fitted[best_k]
+    return {
+        'errors': dict(zip(ks, errors)),
+        'seconds': seconds,
+        'best_k': best_k,
+        'W': W,
+        'model': model,
+        'total_seconds': time.perf_counter() - started,
+    }
+
+
+def topic_labels_from_model(model, feature_names, top_n=TOP_WORDS):
+    """Etiqueta de cada tema con sus palabras de mayor peso"""
+    labels = {}
+    for topic_idx, component in enumerate(model.components_):
+        top_words = [feature_names[i] for i in component.argsort()[:-top_n - 1:-1]]
+        labels[topic_idx] = ", ".join(top_words)
+    return labels
+
+
+def topic_model(docs, topic_range=DEFAULT_TOPIC_RANGE, strategy='warm', tol=0.01, patience=2,
+                workers=1, max_iter=200, random_state=42):
+    """
+    Vectorizar, elegir el número de temas y devolver `(vectores, etiquetas,
+    reporte)` con el modelo ganador del barrido (float32, n_docs x temas).
+    """
+    vectorizer = CountVectorizer()
+    doc_term_matrix = vectorizer.fit_transform(docs)
+    sweep = topic_sweep(
+        doc_term_matrix, topic_range, strategy=strategy, tol=tol, patience=patience,
+        workers=workers, max_iter=max_iter, random_state=random_state
+    )
+    labels = topic_labels_from_model(sweep['model'], vectorizer.get_feature_names_out())
+    report = {key: sweep[key] for key in ('errors', 'seconds', 'best_k', 'total_seconds')}
+    return sweep['W'].astype(np.float32), labels, report
+
+
+def find_best_num_topics(texts, max_topics=15):
+    """Compatibilidad con el notebook: barrido completo con ajustes independientes"""
+    doc_term_matrix = CountVectorizer().fit_transform(texts)
+    return topic_sweep(doc_term_matrix, range(2, max_topics + 1), strategy='independent', tol=None)['best_k']
@@ -0,0 +1,128 @@
+# utils/artifacts.py
+import os
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.settings import ARTIFACT_CACHE_MAX_BYTES
+
+
+class ArtifactCache:
+    """
+    Caché LRU en memoria para los artefactos generados (HTML de Plotly, etc.).
+
+    Cada entrada se indexa por ruta + mtime + tamaño: si el archivo se edita en
+    disco la clave cambia, se vuelve a leer y la versión anterior se descarta.
+    El límite se aplica sobre el total de bytes en memoria, no sobre el número
+    de entradas. Es compartida por todas las sesiones del proceso.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # clave -> (contenido, bytes)
+        self._keys_by_path = {}        # ruta -> clave vigente
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def read_text(self, path, encoding='utf-8'):
+        """Devolver el contenido del archivo, desde memoria si es posible"""
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        key = (path, stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        # La lectura se hace fuera del lock para no bloquear otras sesiones
+        with open(path, 'r', encoding=encoding) as f:
+            content = f.read()
+
+        self._store(path, key, content)
+        return content
+
+    def _store(self, path, key, content):
+        size = sys.getsizeof(content)
+        with self._lock:
+            # Descartar la versión anterior del mismo archivo (mtime distinto)
+            old_key = self._keys_by_path.get(path)
+            if old_key is not None and old_key != key:
+                self._discard(old_key)
+
+            # Un archivo más grande que toda la caché se sirve sin guardarlo
+            if size > self.max_bytes or key in self._entries:
+                return
+
+            self._entries[key] = (content, size)
+            self._keys_by_path[path] = key
+            self._total_bytes += size
+
+            while self._total_bytes > self.max_bytes and self._entries:
+                oldest_key = next(iter(self._entries))
+                self._discard(oldest_key)
+                self.evictions += 1
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._total_bytes -= entry[1]
+        if self._keys_by_path.get(key[0]) == key:
+            del self._keys_by_path[key[0]]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_path.clear()
+            self._total_bytes = 0
+
+    def stats(self):
+        """Resumen de uso: aciertos, fallos, expulsiones y memoria ocupada"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._total_bytes,
+                'max_bytes': self.max_bytes,
+            }
+
+
+# Instancia única por proceso, compartida por todas las páginas y sesiones
+_artifact_cache = ArtifactCache(ARTIFACT_CACHE_MAX_BYTES)
+
+
+def load_text_artifact(path):
+    """Leer un artefacto de texto (HTML) a través de la caché compartida"""
+    return _artifact_cache.read_text(path)
+
+
+def artifact_cache_stats():
+    return _artifact_cache.stats()
+
+
+# Hilos para precargar artefactos en segundo plano sin bloquear el rerun
+_prefetch_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="artifact-prefetch")
+
+
+def _prefetch_one(path):
+    try:
+        _artifact_cache.read_text(path)
+    except (OSError, UnicodeDecodeError):
+        # La precarga es una optimización: los errores se reportan al renderizar
+        pass
+
+
+def prefetch_artifacts(paths):
+    """Calentar la caché con los artefactos que probablemente se verán después"""
+    for path in paths:
+        _prefetch_executor.submit(_prefetch_one, path)
@@ -0,0 +1,35 @@
+# utils/graphs.py
+import numpy as np
+import streamlit as st
+
+from pipeline.graph_store import load_graph_data
+from utils.manifest import artifact_path
+from utils.user_index import UserIndex
+
+
+@st.cache_resource(show_spinner=False, max_entries=16)
+def _load_graph(path, sha256):
+    # El sha256 forma parte de la clave: un graph.npz regenerado se vuelve a cargar
+    return load_graph_data(path)
+
+
+def load_platform_graph(record):
+    """Red compacta de una plataforma, cargada una vez por proceso y compartida entre sesiones"""
+    return _load_graph(artifact_path(record), record['sha256'])
+
+
+@st.cache_resource(show_spinner=False, max_entries=16)
+def _load_user_index(path, sha256):
+    return UserIndex.from_graph(_load_graph(path, sha256))
+
+
+def load_user_index(record):
+    """Índice de búsqueda de los usuarios de la red, construido una vez por proceso"""
+    return _load_user_index(artifact_path(record), record['sha256'])
+
+
+def weight_threshold_mask(graph, quantile):
+    """Máscara de aristas cuyo peso supera el cuantil indicado (0 = todas)"""
+    if quantile <= 0 or graph.num_edges == 0:
+        return None
+    return graph.weights >= np.quantile(graph.weights, quantile)
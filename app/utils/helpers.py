@@ -1,24 +1,19 @@
 # utils/helpers.py
 import streamlit as st
-import os
 
-def create_platform_metrics(platform_folder):
-    """Crear métricas básicas de la plataforma"""
+from utils.user_index import UserIndex
+
+def create_platform_metrics(platform_entry):
+    """Crear métricas básicas de la plataforma a partir de su entrada en el manifiesto"""
     metrics = {}
     try:
-        network_file = os.path.join(platform_folder, "network_plot.html")
-        density_file = os.path.join(platform_folder, "density_plot.html")
-        clusters_folder = os.path.join(platform_folder, "clusters")
-
-        metrics['network_available'] = os.path.exists(network_file)
-        metrics['density_available'] = os.path.exists(density_file)
+        artifacts = platform_entry.get('artifacts', {})
 
-        if os.path.exists(clusters_folder):
-            cluster_files = [f for f in os.listdir(clusters_folder) 
-                           if f.startswith("cluster_") and f.endswith(".html")]
-            metrics['total_clusters'] = len(cluster_files)
-        else:
-            metrics['total_clusters'] = 0
+        metrics['network_available'] = "network_plot.html" in artifacts or "graph.npz" in artifacts
+        metrics['density_available'] = "density_plot.html" in artifacts
+        metrics['total_clusters'] = sum(
+            1 for files in platform_entry.get('clusters', {}).values() if files.get('html')
+        )
 
     except Exception as e:
         # Considera retornar el error en lugar de mostrarlo directamente aquí,
@@ -29,4 +24,16 @@ def create_platform_metrics(platform_folder):
         metrics['density_available'] = False
         metrics['total_clusters'] = 0
 
-    return metrics
\ No newline at end of file
+    return metrics
+
+
+@st.cache_resource(show_spinner=False, max_entries=32)
+def _category_user_index(category, generated_at, _users):
+    # `generated_at` cambia cada vez que se reconstruye el manifiesto
+    return UserIndex(_users)
+
+
+def category_user_index(manifest, category):
+    """Índice de búsqueda de los usuarios de una categoría del manifiesto"""
+    users = list((manifest.get('individual') or {}).get(category, {}).keys())
+    return _category_user_index(category, manifest['generated_at'], users)
@@ -0,0 +1,326 @@
+# utils/manifest.py
+"""
+Índice precalculado de los artefactos en `static/plots`.
+
+En lugar de recorrer las carpetas en cada rerun, las páginas consultan un
+manifiesto (`static/plots/manifest.json`) con plataformas, comunidades,
+categorías, usuarios y sus archivos disponibles (tamaño, mtime y sha256).
+
+Generar el manifiesto desde la raíz del repositorio (`--gzip` escribe además
+variantes precomprimidas de cada HTML):
+
+    python app/utils/manifest.py [--gzip]
+"""
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from urllib.parse import quote
+
+MANIFEST_VERSION = 1
+MANIFEST_FILENAME = "manifest.json"
+
+# Intervalo mínimo (segundos) entre comprobaciones de vigencia del manifiesto
+MANIFEST_CHECK_INTERVAL = 30
+
+current_script_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.join(current_script_dir, os.pardir)
+PLOTS_ROOT = os.path.normpath(os.path.join(parent_dir, "static", "plots"))
+
+PLATFORM_ARTIFACTS = ("network_plot.html", "density_plot.html", "graph.npz")
+INDIVIDUAL_ARTIFACTS = ("network.html", "density.html")
+
+
+def _visible_entries(path):
+    """Entradas de un directorio que no comienzan con '.' (vacío si no existe)"""
+    try:
+        with os.scandir(path) as it:
+            return sorted((e for e in it if not e.name.startswith('.')), key=lambda e: e.name)
+    except (FileNotFoundError, NotADirectoryError):
+        return []
+
+
+def _file_sha256(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class _RecordBuilder:
+    """Construye registros de archivo reutilizando hashes de un manifiesto previo"""
+
+    def __init__(self, root, previous=None):
+        self.root = root
+        self.previous = previous or {}
+
+    def __call__(self, path):
+        stat = os.stat(path)
+        rel_path = os.path.relpath(path, self.root).replace(os.sep, '/')
+        old = self.previous.get(rel_path)
+        if old and old['size'] == stat.st_size and old['mtime_ns'] == stat.st_mtime_ns:
+            sha = old['sha256']
+        else:
+            sha = _file_sha256(path)
+        return {
+            'path': rel_path,
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'sha256': sha,
+        }
+
+
+def _iter_records(node):
+    """Recorrer recursivamente un manifiesto y devolver todos sus registros"""
+    if isinstance(node, dict):
+        if 'sha256' in node and 'path' in node:
+            yield node
+        else:
+            for value in node.values():
+                yield from _iter_records(value)
+
+
+def _watched_dirs(root):
+    """
+    Directorios cuyo mtime forma la firma del árbol. Añadir o quitar una
+    plataforma, comunidad, categoría o usuario modifica alguno de ellos.
+    No se incluyen las carpetas por usuario para que la comprobación siga
+    siendo barata con miles de usuarios. La raíz no se vigila porque el
+    propio manifiesto vive en ella.
+    """
+    dirs = []
+    for section in ("platforms", "individual"):
+        section_path = os.path.join(root, section)
+        dirs.append(section_path)
+        for entry in _visible_entries(section_path):
+            if entry.is_dir():
+                dirs.append(entry.path)
+                if section == "platforms":
+                    dirs.append(os.path.join(entry.path, "clusters"))
+    dirs.append(os.path.join(root, "polarization"))
+    dirs.append(os.path.join(root, "cohesion"))
+    return dirs
+
+
+def tree_signature(root=PLOTS_ROOT):
+    signature = {}
+    for path in _watched_dirs(root):
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        signature[os.path.relpath(path, root).replace(os.sep, '/')] = mtime
+    return signature
+
+
+def build_manifest(root=PLOTS_ROOT, previous=None):
+    """Recorrer `static/plots` una sola vez y construir el manifiesto"""
+    # La firma se toma antes del recorrido: un cambio a mitad forzará otra pasada
+    signature = tree_signature(root)
+    previous_records = {r['path']: r for r in _iter_records(previous or {})}
+    record = _RecordBuilder(root, previous_records)
+
+    platforms = {}
+    for platform_dir in _visible_entries(os.path.join(root, "platforms")):
+        if not platform_dir.is_dir():
+            continue
+        artifacts = {}
+        for name in PLATFORM_ARTIFACTS:
+            path = os.path.join(platform_dir.path, name)
+            if os.path.isfile(path):
+                artifacts[name] = record(path)
+
+        clusters = {}
+        clusters_path = os.path.join(platform_dir.path, "clusters")
+        for entry in _visible_entries(clusters_path):
+            if not entry.is_file():
+                continue
+            name = entry.name
+            if name.startswith("cluster_") and name.endswith(".html"):
+                kind, cluster_name = "html", name[len("cluster_"):-len(".html")]
+            elif name.startswith("wordcloud_") and name.endswith(".png"):
+                kind, cluster_name = "wordcloud", name[len("wordcloud_"):-len(".png")]
+            else:
+                continue
+            clusters.setdefault(cluster_name, {'html': None, 'wordcloud': None})
+            clusters[cluster_name][kind] = record(entry.path)
+
+        platforms[platform_dir.name] = {
+            'artifacts': artifacts,
+            'clusters_folder': os.path.isdir(clusters_path),
+            'clusters': clusters,
+        }
+
+    individual = None
+    individual_path = os.path.join(root, "individual")
+    if os.path.isdir(individual_path):
+        individual = {}
+        for category_dir in _visible_entries(individual_path):
+            if not category_dir.is_dir():
+                continue
+            users = {}
+            for user_dir in _visible_entries(category_dir.path):
+                if not user_dir.is_dir():
+                    continue
+                users[user_dir.name] = {
+                    name: record(os.path.join(user_dir.path, name))
+                    for name in INDIVIDUAL_ARTIFACTS
+                    if os.path.isfile(os.path.join(user_dir.path, name))
+                }
+            individual[category_dir.name] = users
+
+    def html_files(folder):
+        folder_path = os.path.join(root, folder)
+        if not os.path.isdir(folder_path):
+            return None
+        return {
+            entry.name[:-len(".html")]: record(entry.path)
+            for entry in _visible_entries(folder_path)
+            if entry.is_file() and entry.name.endswith(".html")
+        }
+
+    return {
+        'version': MANIFEST_VERSION,
+        'generated_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'signature': signature,
+        'platforms': platforms,
+        'individual': individual,
+        'polarization': html_files("polarization"),
+        'cohesion': html_files("cohesion"),
+    }
+
+
+def write_manifest(manifest, root=PLOTS_ROOT):
+    """Escribir el manifiesto de forma atómica (archivo temporal + rename)"""
+    fd, tmp_path = tempfile.mkstemp(prefix=".manifest-", suffix=".json", dir=root)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, os.path.join(root, MANIFEST_FILENAME))
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def read_manifest(root=PLOTS_ROOT):
+    try:
+        with open(os.path.join(root, MANIFEST_FILENAME), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if manifest.get('version') != MANIFEST_VERSION:
+        return None
+    return manifest
+
+
+def refresh_manifest(root=PLOTS_ROOT, previous=None):
+    """Reconstruir y guardar el manifiesto (en memoria si no se puede escribir)"""
+    manifest = build_manifest(root, previous=previous)
+    try:
+        write_manifest(manifest, root)
+    except OSError:
+        pass
+    return manifest
+
+
+class _ManifestState:
+    def __init__(self):
+        self.manifest = None
+        self.checked_at = 0.0
+        self.lock = threading.Lock()
+
+
+_state = _ManifestState()
+
+
+def get_manifest(root=PLOTS_ROOT, max_age=MANIFEST_CHECK_INTERVAL):
+    """
+    Manifiesto compartido por todas las páginas. Se carga una vez por proceso
+    y, como mucho cada `max_age` segundos, se compara la firma de directorios;
+    si el árbol cambió (o no existe el archivo) se reconstruye.
+    """
+    now = time.monotonic()
+    with _state.lock:
+        if _state.manifest is not None and now - _state.checked_at < max_age:
+            return _state.manifest
+
+        manifest = _state.manifest or read_manifest(root)
+        if manifest is None or manifest.get('signature') != tree_signature(root):
+            manifest = refresh_manifest(root, previous=manifest)
+
+        _state.manifest = manifest
+        _state.checked_at = now
+        return manifest
+
+
+def artifact_path(record, root=PLOTS_ROOT):
+    """Ruta absoluta de un registro del manifiesto"""
+    return os.path.join(root, *record['path'].split('/'))
+
+
+def artifact_url(record, static_prefix="app/static"):
+    """
+    URL pública del artefacto bajo el servidor estático de Streamlit. El
+    parámetro `v` (prefijo del sha256) cambia con el contenido, así que el
+    navegador puede reutilizar su copia mientras el archivo no cambie.
+    """
+    return f"{static_prefix}/plots/{quote(record['path'])}?v={record['sha256'][:12]}"
+
+
+def precompress_artifacts(manifest, root=PLOTS_ROOT, min_size=1024):
+    """
+    Escribir variantes `.gz` junto a cada HTML del manifiesto (para servidores
+    como nginx con `gzip_static on` delante de Streamlit). Sólo se regeneran
+    las que faltan o son más antiguas que el original.
+    """
+    written = 0
+    for record in _iter_records(manifest):
+        if not record['path'].endswith(".html") or record['size'] < min_size:
+            continue
+        path = artifact_path(record, root)
+        gz_path = path + ".gz"
+        try:
+            if os.stat(gz_path).st_mtime_ns >= record['mtime_ns']:
+                continue
+        except FileNotFoundError:
+            pass
+        tmp_path = gz_path + ".tmp"
+        with open(path, 'rb') as src, gzip.open(tmp_path, 'wb', compresslevel=9) as dst:
+            shutil.copyfileobj(src, dst)
+        os.replace(tmp_path, gz_path)
+        written += 1
+    return written
+
+
+def list_platforms(manifest):
+    return list(manifest['platforms'].keys())
+
+
+def list_categories(manifest):
+    return sorted((manifest.get('individual') or {}).keys())
+
+
+def list_users(manifest, category):
+    return sorted((manifest.get('individual') or {}).get(category, {}).keys())
+
+
+if __name__ == "__main__":
+    started = time.perf_counter()
+    manifest = refresh_manifest(previous=read_manifest())
+    records = list(_iter_records(manifest))
+    total_mb = sum(r['size'] for r in records) / 1024 / 1024
+    print(
+        f"Manifiesto generado en {time.perf_counter() - started:.2f}s: "
+        f"{len(manifest['platforms'])} plataformas, {len(records)} archivos ({total_mb:.1f} MB) "
+        f"-> {os.path.join(PLOTS_ROOT, MANIFEST_FILENAME)}"
+    )
+    if "--gzip" in sys.argv[1:]:
+        print(f"Variantes .gz escritas: {precompress_artifacts(manifest)}")
@@ -0,0 +1,42 @@
+# utils/settings.py
+import os
+
+
+def _env_int(name, default):
+    """Leer un entero desde una variable de entorno, con valor por defecto"""
+    value = os.environ.get(name)
+    if value is None or value.strip() == "":
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        return default
+
+
+# Tamaño máximo (en MB) de la caché en memoria de artefactos HTML/imagen
+ARTIFACT_CACHE_MAX_MB = _env_int("DASHBOARD_ARTIFACT_CACHE_MB", 256)
+ARTIFACT_CACHE_MAX_BYTES = ARTIFACT_CACHE_MAX_MB * 1024 * 1024
+
+# Modo de las vistas de análisis:
+#   "lazy"  -> sólo se carga y envía la vista activa (selector de vistas)
+#   "eager" -> todas las pestañas se renderizan en cada rerun (st.tabs)
+VIEW_MODE = os.environ.get("DASHBOARD_VIEW_MODE", "lazy").strip().lower()
+if VIEW_MODE not in ("lazy", "eager"):
+    VIEW_MODE = "lazy"
+
+# Precargar en segundo plano el artefacto de la siguiente vista (modo "lazy")
+PREFETCH_NEXT_VIEW = _env_int("DASHBOARD_PREFETCH", 1) == 1
+
+# Cómo se envían los HTML de Plotly al navegador:
+#   "static" -> iframe apuntando a la URL de `static/` (caché del navegador, ETag)
+#   "inline" -> el HTML completo viaja por el websocket en cada rerun
+#   "auto"   -> "static" si la versión de Streamlit sirve .html con su Content-Type
+PLOT_RENDER_MODE = os.environ.get("DASHBOARD_PLOT_RENDER_MODE", "auto").strip().lower()
+if PLOT_RENDER_MODE not in ("static", "inline", "auto"):
+    PLOT_RENDER_MODE = "auto"
+
+# Prefijo de URL con el que Streamlit publica la carpeta `app/static`
+STATIC_URL_PREFIX = os.environ.get("DASHBOARD_STATIC_URL_PREFIX", "app/static").rstrip("/")
+
+# Usuarios por página en el buscador de usuarios
+USER_SEARCH_PAGE_SIZE = max(1, _env_int("DASHBOARD_USER_PAGE_SIZE", 50))
@@ -0,0 +1,156 @@
+# utils/user_index.py
+"""
+Índice de búsqueda de usuarios.
+
+Se construye una vez por proceso a partir de la red de una plataforma (o de la
+lista de usuarios de una categoría) y resuelve búsquedas sin recorrer la lista
+completa:
+
+- prefijos de palabra (usuario, candidato y comunidad) por búsqueda binaria
+  sobre un arreglo ordenado de tokens;
+- subcadenas del nombre de usuario mediante trigramas (listas de posiciones
+  ordenadas que se intersecan y luego se verifican).
+
+Las búsquedas ignoran mayúsculas y acentos, y los resultados salen ordenados
+por número de interacciones (de mayor a menor).
+"""
+import re
+import unicodedata
+
+import numpy as np
+
+DEFAULT_PAGE_SIZE = 50
+
+_TOKEN_RE = re.compile(r"[^\w]+")
+
+
+def normalize(text):
+    """Minúsculas y sin acentos ('Ñuñoa' -> 'nunoa')"""
+    decomposed = unicodedata.normalize("NFKD", str(text))
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+
+def _tokens(text):
+    return [token for token in _TOKEN_RE.split(normalize(text)) if token]
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class UserIndex:
+    """Índice de prefijos y trigramas; los ids internos son el ranking"""
+
+    def __init__(self, usernames, candidates=None, cluster_names=None, interactions=None):
+        usernames = [str(name) for name in usernames]
+        n = len(usernames)
+        interactions = np.zeros(n) if interactions is None else np.asarray(interactions, dtype=np.float64)
+        normalized = [normalize(name) for name in usernames]
+
+        # Ranking: más interacciones primero; en empate, orden alfabético
+        order = np.lexsort((np.asarray(normalized, dtype=str), -interactions)) if n else np.arange(0)
+        self.usernames = [usernames[i] for i in order]
+        self.interactions = interactions[order]
+        self.candidates = [str(candidates[i]) for i in order] if candidates is not None else None
+        self.cluster_names = [str(cluster_names[i]) for i in order] if cluster_names is not None else None
+        self._haystacks = [normalized[i] for i in order]
+
+        # Tokens de cada campo -> ids (arreglo ordenado para búsqueda binaria)
+        token_keys, token_ids = [], []
+        for rank in range(n):
+            fields = [self.usernames[rank]]
+            if self.candidates is not None:
+                fields.append(self.candidates[rank])
+            if self.cluster_names is not None:
+                fields.append(self.cluster_names[rank])
+            tokens = {self._haystacks[rank]}
+            for field in fields:
+                tokens.update(_tokens(field))
+            token_keys.extend(tokens)
+            token_ids.extend([rank] * len(tokens))
+        keys = np.asarray(token_keys, dtype=str)
+        key_order = np.argsort(keys, kind='stable')
+        self._token_keys = keys[key_order]
+        self._token_ids = np.asarray(token_ids, dtype=np.int32)[key_order]
+
+        # Trigramas del nombre de usuario -> ids ordenados
+        postings = {}
+        for rank, haystack in enumerate(self._haystacks):
+            for gram in _trigrams(haystack):
+                postings.setdefault(gram, []).append(rank)
+        self._trigrams = {gram: np.asarray(ids, dtype=np.int32) for gram, ids in postings.items()}
+
+    @classmethod
+    def from_graph(cls, graph):
+        """Índice a partir de la tabla de nodos de un `GraphData`"""
+        attrs = graph.node_attrs
+        candidates = attrs.get('candidate')
+        cluster_names = attrs.get('cluster_name')
+        interactions = attrs.get('num_interaction')
+        return cls(
+            graph.usernames.tolist(),
+            candidates=candidates.tolist() if candidates is not None else None,
+            cluster_names=cluster_names.tolist() if cluster_names is not None else None,
+            interactions=interactions if interactions is not None else None,
+        )
+
+    def __len__(self):
+        return len(self.usernames)
+
+    def _prefix_mask(self, term, mask):
+        """Marcar en `mask` los ids con algún token que empiece por `term`"""
+        lo = np.searchsorted(self._token_keys, term, side='left')
+        hi = np.searchsorted(self._token_keys, term + "\U0010ffff", side='left')
+        mask[self._token_ids[lo:hi]] = True
+
+    def _substring_mask(self, term, mask):
+        """Marcar en `mask` los ids cuyo usuario contiene `term` (len >= 3)"""
+        grams = sorted(_trigrams(term), key=lambda gram: len(self._trigrams.get(gram, ())))
+        if grams[0] not in self._trigrams:
+            return
+        candidates = self._trigrams[grams[0]]
+        for gram in grams[1:]:
+            candidates = np.intersect1d(candidates, self._trigrams[gram], assume_unique=True)
+            if len(candidates) == 0:
+                return
+        # Los trigramas sólo filtran: se confirma la subcadena
+        haystacks = self._haystacks
+        mask[[i for i in candidates.tolist() if term in haystacks[i]]] = True
+
+    def search_ids(self, query):
+        """Ids (en orden de ranking) que cumplen todos los términos de la búsqueda"""
+        terms = _tokens(query)
+        if not terms:
+            return np.arange(len(self), dtype=np.int32)
+        # Máscaras booleanas sobre los ids: unir e intersecar cuesta O(n) sin ordenar
+        result = np.ones(len(self), dtype=bool)
+        term_mask = np.empty(len(self), dtype=bool)
+        for term in terms:
+            term_mask[:] = False
+            self._prefix_mask(term, term_mask)
+            if len(term) >= 3:
+                self._substring_mask(term, term_mask)
+            result &= term_mask
+        return np.flatnonzero(result).astype(np.int32)
+
+    def row(self, rank):
+        return {
+            'username': self.usernames[rank],
+            'candidate': self.candidates[rank] if self.candidates is not None else None,
+            'cluster_name': self.cluster_names[rank] if self.cluster_names is not None else None,
+            'num_interaction': self.interactions[rank].item(),
+        }
+
+    def search(self, query, page=0, page_size=DEFAULT_PAGE_SIZE):
+        """Página `page` (desde 0) de resultados, con el total de coincidencias"""
+        ids = self.search_ids(query)
+        total = len(ids)
+        pages = max(1, -(-total // page_size))
+        page = min(max(page, 0), pages - 1)
+        window = ids[page * page_size:(page + 1) * page_size]
+        return {
+            'results': [self.row(rank) for rank in window.tolist()],
+            'total': total,
+            'page': page,
+            'pages': pages,
+        }